@@ -24,6 +24,8 @@ from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
+from pnid_graph import PnidGraph, connection_endpoints
+
 
 @dataclass
 class ComponentDiff:
@@ -69,33 +71,18 @@ def load_jsonld(path: Path) -> dict[str, Any]:
 
 def extract_components(data: dict[str, Any]) -> dict[str, dict[str, Any]]:
     """Extract components as dict keyed by @id."""
-    components = {}
-    graph = data.get("@graph", [])
-    for item in graph:
-        if item.get("@type") not in ["pnid:Connection", "pnid:Pipe"]:
-            comp_id = item.get("@id")
-            if comp_id:
-                components[comp_id] = item
-    return components
+    return PnidGraph.from_jsonld(data).component_map()
 
 
 def extract_connections(data: dict[str, Any]) -> list[dict[str, Any]]:
     """Extract connections/pipes from JSON-LD."""
-    connections = []
-    graph = data.get("@graph", [])
-    for item in graph:
-        item_type = item.get("@type")
-        if item_type in ["pnid:Connection", "pnid:Pipe"]:
-            connections.append(item)
-    return connections
+    return PnidGraph.from_jsonld(data).edges
 
 
 def normalize_connection(conn: dict[str, Any]) -> tuple[str, str]:
     """Return normalized (source, target) tuple for connection matching."""
-    source = conn.get("pnid:connectsFrom", {}).get("@id", "")
-    target = conn.get("pnid:connectsTo", {}).get("@id", "")
     # Normalize order (bidirectional edges)
-    return tuple(sorted([source, target]))
+    return tuple(sorted(connection_endpoints(conn)))
 
 
 def get_position(comp: dict[str, Any]) -> tuple[float, float] | None:
@@ -230,11 +217,14 @@ def compare_pnids(path1: Path, path2: Path, include_positions: bool = False) ->
     data1 = load_jsonld(path1)
     data2 = load_jsonld(path2)
 
-    comps1 = extract_components(data1)
-    comps2 = extract_components(data2)
+    graph1 = PnidGraph.from_jsonld(data1)
+    graph2 = PnidGraph.from_jsonld(data2)
+
+    comps1 = graph1.component_map()
+    comps2 = graph2.component_map()
 
-    conns1 = extract_connections(data1)
-    conns2 = extract_connections(data2)
+    conns1 = graph1.edges
+    conns2 = graph2.edges
 
     only_c1, only_c2, c_diffs = compare_components(comps1, comps2, include_positions)
     only_conn1, only_conn2, conn_diffs = compare_connections(conns1, conns2)
@@ -310,8 +300,8 @@ def print_comparison(result: ComparisonResult) -> None:
     if result.connections_only_in_1:
         print(f"🔗 Connections only in File 1 ({len(result.connections_only_in_1)}):")
         for conn in result.connections_only_in_1:
-            src = conn.get("pnid:connectsFrom", {}).get("@id", "?")
-            tgt = conn.get("pnid:connectsTo", {}).get("@id", "?")
+            src, tgt = connection_endpoints(conn)
+            src, tgt = src or "?", tgt or "?"
             conn_id = conn.get("@id", "")
             print(f"  - {src} → {tgt} ({conn_id})")
         print()
@@ -320,8 +310,8 @@ def print_comparison(result: ComparisonResult) -> None:
     if result.connections_only_in_2:
         print(f"🔗 Connections only in File 2 ({len(result.connections_only_in_2)}):")
         for conn in result.connections_only_in_2:
-            src = conn.get("pnid:connectsFrom", {}).get("@id", "?")
-            tgt = conn.get("pnid:connectsTo", {}).get("@id", "?")
+            src, tgt = connection_endpoints(conn)
+            src, tgt = src or "?", tgt or "?"
             conn_id = conn.get("@id", "")
             print(f"  - {src} → {tgt} ({conn_id})")
         print()
@@ -332,8 +322,8 @@ def print_comparison(result: ComparisonResult) -> None:
         for diff in result.connection_diffs:
             c1 = diff["from_file1"]
             c2 = diff["from_file2"]
-            src1 = c1.get("pnid:connectsFrom", {}).get("@id", "?")
-            tgt1 = c1.get("pnid:connectsTo", {}).get("@id", "?")
+            src1, tgt1 = connection_endpoints(c1)
+            src1, tgt1 = src1 or "?", tgt1 or "?"
             print(f"  Connection: {src1} → {tgt1}")
             print(f"    File 1: {c1}")
             print(f"    File 2: {c2}")
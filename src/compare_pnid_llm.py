@@ -10,6 +10,7 @@ Usage:
     python src/compare_pnid_llm.py <file1.json> <file2.json>
     python src/compare_pnid_llm.py <file1.json> <file2.json> --reasoning high
     python src/compare_pnid_llm.py <file1.json> <file2.json> --json
+    python src/compare_pnid_llm.py <file1.json> <file2.json> --no-cache
 """
 
 import json
@@ -22,6 +23,8 @@ from dotenv import load_dotenv
 from openai import AzureOpenAI
 from pydantic import BaseModel, Field
 
+from llm_cache import get_cache, make_key
+
 # Load environment variables
 load_dotenv()
 
@@ -164,7 +167,12 @@ def pnid_to_text(data: dict[str, Any]) -> str:
 
 
 def compare_with_llm(
-    text1: str, text2: str, file1: str, file2: str, reasoning_effort: str = "high"
+    text1: str,
+    text2: str,
+    file1: str,
+    file2: str,
+    reasoning_effort: str = "high",
+    use_cache: bool = True,
 ) -> dict[str, Any]:
     """
     Use GPT-4.5 with reasoning to compare two P&ID text representations.
@@ -175,6 +183,7 @@ def compare_with_llm(
         file1: Path to first file (for reference)
         file2: Path to second file (for reference)
         reasoning_effort: OpenAI reasoning effort (low, medium, high)
+        use_cache: Reuse a cached result for an identical prompt/model (see llm_cache)
 
     Returns:
         dict with comparison results
@@ -240,15 +249,31 @@ Provide a structured comparison with:
 Be precise and thorough in your analysis.
 """
 
+    system_message = (
+        "You are an expert P&ID analyst. Provide precise, structured comparisons in JSON format."
+    )
+
+    # Identical prompt + model + schema gives a cached result without an API call
+    cache = get_cache(use_cache)
+    key = make_key(
+        provider="azure-openai",
+        model=deployment,
+        prompt=[system_message, prompt],
+        schema=ComparisonResult,
+        endpoint=endpoint,
+        reasoning_effort=reasoning_effort,
+    )
+    cached = cache.get(key) if cache else None
+    if cached is not None:
+        print("♻️  Using cached comparison result", file=sys.stderr)
+        return cached
+
     # Call GPT-4.5 with reasoning using structured outputs
     try:
         response = client.beta.chat.completions.parse(
             model=deployment,
             messages=[
-                {
-                    "role": "system",
-                    "content": "You are an expert P&ID analyst. Provide precise, structured comparisons in JSON format.",
-                },
+                {"role": "system", "content": system_message},
                 {"role": "user", "content": prompt},
             ],
             reasoning_effort=reasoning_effort,
@@ -278,6 +303,8 @@ Be precise and thorough in your analysis.
             result["reasoning_tokens"] = 0
         result["total_tokens"] = response.usage.total_tokens
 
+        if cache:
+            cache.put(key, result)
         return result
 
     except json.JSONDecodeError as e:
@@ -385,7 +412,7 @@ def main():
     """Main entry point."""
     if len(sys.argv) < 3:
         print(
-            "Usage: python src/compare_pnid_llm.py <file1.json> <file2.json> [--reasoning low|medium|high] [--json]"
+            "Usage: python src/compare_pnid_llm.py <file1.json> <file2.json> [--reasoning low|medium|high] [--json] [--no-cache]"
         )
         print("\nExamples:")
         print(
@@ -400,6 +427,7 @@ def main():
 
     # Parse optional flags
     json_output = "--json" in sys.argv
+    use_cache = "--no-cache" not in sys.argv
     reasoning_effort = "high"  # Default
     if "--reasoning" in sys.argv:
         idx = sys.argv.index("--reasoning")
@@ -429,7 +457,9 @@ def main():
     text2 = pnid_to_text(data2)
 
     print(f"🧠 Analyzing with LLM (reasoning: {reasoning_effort})...", file=sys.stderr)
-    result = compare_with_llm(text1, text2, str(path1), str(path2), reasoning_effort)
+    result = compare_with_llm(
+        text1, text2, str(path1), str(path2), reasoning_effort, use_cache=use_cache
+    )
 
     # Output results
     if json_output:
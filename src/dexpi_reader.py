@@ -9,14 +9,27 @@ to JSON-LD format compatible with the dwg_reader.py output.
 Usage:
     python src/dexpi_reader.py <input.xml> [-o output.json]
     python src/dexpi_reader.py dexpi_example.xml -o pnid_dexpi.json
+
+Batch mode (several files, a directory or a glob pattern; -o is then a directory):
+    python src/dexpi_reader.py data/input/TrainingTestCases-master -r -o data/output/dexpi
+    python src/dexpi_reader.py "data/input/**/*.xml" --workers 4
 """
 
 import argparse
+import glob
+import hashlib
 import json
+import os
 import sys
+import time
 import xml.etree.ElementTree as ET
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Literal, NamedTuple
+
+from json_io import write_json_atomic
 
 # DEXPI/Proteus XML namespaces
 NAMESPACES = {
@@ -62,138 +75,529 @@ DEXPI_CLASS_TO_TYPE = {
 }
 
 
-def parse_dexpi_xml(xml_path: Path) -> dict[str, Any]:
+# Element names (namespace removed) extracted as components
+COMPONENT_TAGS = frozenset(
+    [
+        "Equipment",
+        "PipingComponent",
+        "ProcessInstrument",
+        "Valve",
+        "Pump",
+        "Vessel",
+        "Tank",
+        "Instrument",
+        "HeatExchanger",
+        "Nozzle",
+    ]
+)
+
+ParseMethod = Literal["stream", "tree"]
+
+
+def parse_dexpi_xml(
+    xml_path: Path, method: ParseMethod = "stream", verbose: bool = True
+) -> dict[str, Any]:
     """
     Parse a DEXPI XML file and convert to JSON-LD.
 
     Args:
         xml_path: Path to DEXPI XML file
+        method: "stream" (default) feeds the file to an incremental XML parser and
+            extracts everything in one pass without building the element tree; "tree"
+            loads the whole document with ET.parse first. Both produce the same JSON-LD.
+        verbose: Print the file being parsed
 
     Returns:
         JSON-LD dictionary with @context and @graph
     """
-    print(f"Parsing DEXPI XML: {xml_path}")
+    if verbose:
+        print(f"Parsing DEXPI XML: {xml_path}")
+
+    if method == "tree":
+        nodes, edges = _collect_from_tree(xml_path)
+    else:
+        nodes, edges = _collect_streaming(xml_path)
+
+    # Build JSON-LD structure
+    jsonld = {
+        "@context": {
+            "pid": "https://example.com/pid#",
+            "schema": "https://schema.org/",
+            "connectedTo": {"@id": "pid:connectedTo", "@type": "@id"},
+            "name": "schema:name",
+            "tag": "pid:tag",
+            "dexpiClass": "pid:dexpiClass",
+            "x": "pid:x",
+            "y": "pid:y",
+        },
+        "@graph": nodes + edges,
+    }
+
+    return jsonld
+
+
+def _local_name(tag: str) -> str:
+    """Element name without its namespace."""
+    return tag.split("}")[-1]
+
+
+def _component_node(
+    attrib: Mapping[str, str],
+    tag: str,
+    elem_id: str,
+    tag_name: str | None,
+    x: float | None,
+    y: float | None,
+) -> dict[str, Any]:
+    """JSON-LD node for a component element, from its attributes."""
+    component_name = attrib.get("ComponentName") or attrib.get("Name") or attrib.get("name")
+    component_class = attrib.get("ComponentClass") or attrib.get("Class") or tag
+
+    # Map to P&ID type
+    pid_type = DEXPI_CLASS_TO_TYPE.get(component_class, "pid:Component")
+
+    node = {
+        "@id": f"pid:{elem_id}",
+        "@type": pid_type,
+        "name": component_name or tag_name or elem_id,
+        "tag": tag_name,
+        "dexpiClass": component_class,
+        "x": x,
+        "y": y,
+    }
 
+    # Remove None values
+    return {k: v for k, v in node.items() if v is not None}
+
+
+def _connection_edge(attrib: Mapping[str, str]) -> dict[str, Any] | None:
+    """JSON-LD edge for a Connection element's attributes, or None if an end is missing."""
+    from_ref = attrib.get("FromID")
+    to_ref = attrib.get("ToID")
+
+    if not (from_ref and to_ref):
+        return None
+    # Create unique ID for connection
+    conn_id = f"{from_ref}--{to_ref}"
+    return {
+        "@id": f"pid:{conn_id}",
+        "@type": "pid:Connection",
+        "connectedTo": [f"pid:{from_ref}", f"pid:{to_ref}"],
+    }
+
+
+def _location_xy(attrib: Mapping[str, str]) -> tuple[str | None, str | None]:
+    """Raw X/Y attribute values of a Location element."""
+    return attrib.get("X") or attrib.get("x"), attrib.get("Y") or attrib.get("y")
+
+
+def _to_coordinates(xy: tuple[str | None, str | None] | None) -> tuple[float | None, float | None]:
+    if xy is None:
+        return None, None
+    x_val, y_val = xy
+    return (float(x_val) if x_val else None), (float(y_val) if y_val else None)
+
+
+def _collect_from_tree(xml_path: Path) -> tuple[list[dict], list[dict]]:
+    """Nodes and edges from the fully loaded element tree (two passes over root.iter())."""
     tree = ET.parse(xml_path)
     root = tree.getroot()
 
     nodes = []
     edges = []
 
-    # Try to find elements with and without namespace
-    # DEXPI files may use different namespace prefixes
-
     # Find all elements that look like equipment/components
     for elem in root.iter():
-        tag = elem.tag.split("}")[-1]  # Remove namespace
+        tag = _local_name(elem.tag)  # Remove namespace
         elem_id = elem.get("ID") or elem.get("id")
 
         if not elem_id:
             continue
 
-        # Extract component data
-        component_name = elem.get("ComponentName") or elem.get("Name") or elem.get("name")
-        component_class = elem.get("ComponentClass") or elem.get("Class") or tag
         tag_name = elem.get("TagName") or elem.get("Tag")
 
         # Get text content for tag/description
         if not tag_name:
             for child in elem:
-                child_tag = child.tag.split("}")[-1]
+                child_tag = _local_name(child.tag)
                 if "tag" in child_tag.lower() and child.text:
                     tag_name = child.text.strip()
                     break
 
         # Extract position if available - look for Position/Location nested structure
-        x, y = None, None
+        xy = None
         for child in elem:
-            child_tag = child.tag.split("}")[-1]
+            child_tag = _local_name(child.tag)
             if "position" in child_tag.lower():
                 # Look for Location child element
+                xy = (None, None)
                 for location in child:
-                    location_tag = location.tag.split("}")[-1]
+                    location_tag = _local_name(location.tag)
                     if "location" in location_tag.lower():
-                        x_val = location.get("X") or location.get("x")
-                        y_val = location.get("Y") or location.get("y")
-                        if x_val:
-                            x = float(x_val)
-                        if y_val:
-                            y = float(y_val)
+                        xy = _location_xy(location.attrib)
                         break
                 break
             elif "location" in child_tag.lower():
-                x_val = child.get("X") or child.get("x")
-                y_val = child.get("Y") or child.get("y")
-                if x_val:
-                    x = float(x_val)
-                if y_val:
-                    y = float(y_val)
+                xy = _location_xy(child.attrib)
                 break
+        x, y = _to_coordinates(xy)
 
         # Determine if this is a component worth extracting
-        if tag in [
-            "Equipment",
-            "PipingComponent",
-            "ProcessInstrument",
-            "Valve",
-            "Pump",
-            "Vessel",
-            "Tank",
-            "Instrument",
-            "HeatExchanger",
-            "Nozzle",
-        ]:
-            # Map to P&ID type
-            pid_type = DEXPI_CLASS_TO_TYPE.get(component_class, "pid:Component")
-
-            node = {
-                "@id": f"pid:{elem_id}",
-                "@type": pid_type,
-                "name": component_name or tag_name or elem_id,
-                "tag": tag_name,
-                "dexpiClass": component_class,
-                "x": x,
-                "y": y,
-            }
-
-            # Remove None values
-            node = {k: v for k, v in node.items() if v is not None}
-            nodes.append(node)
+        if tag in COMPONENT_TAGS:
+            nodes.append(_component_node(elem.attrib, tag, elem_id, tag_name, x, y))
 
     # Look for Connection elements (standard in DEXPI)
     for elem in root.iter():
-        tag = elem.tag.split("}")[-1]
-
-        if tag == "Connection":
-            from_ref = elem.get("FromID")
-            to_ref = elem.get("ToID")
-
-            if from_ref and to_ref:
-                # Create unique ID for connection
-                conn_id = f"{from_ref}--{to_ref}"
-                edge = {
-                    "@id": f"pid:{conn_id}",
-                    "@type": "pid:Connection",
-                    "connectedTo": [f"pid:{from_ref}", f"pid:{to_ref}"],
-                }
+        if _local_name(elem.tag) == "Connection":
+            edge = _connection_edge(elem.attrib)
+            if edge is not None:
                 edges.append(edge)
 
-    # Build JSON-LD structure
-    jsonld = {
-        "@context": {
-            "pid": "https://example.com/pid#",
-            "schema": "https://schema.org/",
-            "connectedTo": {"@id": "pid:connectedTo", "@type": "@id"},
-            "name": "schema:name",
-            "tag": "pid:tag",
-            "dexpiClass": "pid:dexpiClass",
-            "x": "pid:x",
-            "y": "pid:y",
-        },
-        "@graph": nodes + edges,
+    return nodes, edges
+
+
+class _TagKind(NamedTuple):
+    """What the stream parser needs to know about an element name (cached per raw tag)."""
+
+    local: str  # name without namespace
+    is_component: bool
+    is_connection: bool
+    is_tag: bool  # named like "...Tag..." (its text can be a parent's tag name)
+    is_position: bool
+    is_location: bool
+
+    @classmethod
+    def of(cls, raw_tag: str) -> "_TagKind":
+        local = _local_name(raw_tag)
+        lowered = local.lower()
+        return cls(
+            local,
+            local in COMPONENT_TAGS,
+            local == "Connection",
+            "tag" in lowered,
+            "position" in lowered,
+            "location" in lowered,
+        )
+
+
+@dataclass(slots=True)
+class _OpenElement:
+    """What an element still being parsed needs to know about its finished children."""
+
+    kind: _TagKind
+    attrib: dict[str, str]
+    elem_id: str | None
+    node_index: int | None  # reserved slot in the node list (components only)
+    text: list[str] | None  # text before the first child (collected for "...Tag..." elements)
+    has_children: bool = False
+    child_tag_text: str | None = None  # text of the first child named like "...Tag..."
+    position: tuple[str | None, str | None] | None = None  # from first Position/Location child
+    first_location: tuple[str | None, str | None] | None = None  # first Location child's X/Y
+
+    @property
+    def collects(self) -> bool:
+        """Whether children report to this element (it has an ID, or is a Position)."""
+        return bool(self.elem_id) or self.kind.is_position
+
+
+class _DexpiStreamTarget:
+    """
+    XMLParser target that collects nodes and edges in a single pass without building a tree.
+
+    Components and Connections are recognised on their start tag, so both keep document
+    order. The child information an element with an ID needs (tag text, Position/Location
+    coordinates) is summarised on it as each child ends; only elements that collect or
+    report such information get an _OpenElement, and nothing is kept once they end, so
+    memory is bounded by the nesting depth rather than the file size.
+    """
+
+    def __init__(self) -> None:
+        self.nodes: list[dict | None] = []
+        self.edges: list[dict] = []
+        self._stack: list[_OpenElement | None] = []
+        self._kinds: dict[str, _TagKind] = {}
+
+    def start(self, tag: str, attrib: dict[str, str]) -> None:
+        kind = self._kinds.get(tag)
+        if kind is None:
+            kind = self._kinds[tag] = _TagKind.of(tag)
+        parent = self._stack[-1] if self._stack else None
+        if parent is not None:
+            parent.has_children = True
+
+        elem_id = attrib.get("ID") or attrib.get("id")
+        node_index = None
+        if kind.is_component and elem_id:
+            node_index = len(self.nodes)
+            self.nodes.append(None)
+        elif kind.is_connection:
+            edge = _connection_edge(attrib)
+            if edge is not None:
+                self.edges.append(edge)
+
+        reports = (
+            parent is not None
+            and parent.collects
+            and (kind.is_tag or kind.is_position or kind.is_location)
+        )
+        if elem_id or kind.is_position or reports:
+            text = [] if kind.is_tag and reports else None
+            self._stack.append(_OpenElement(kind, attrib, elem_id, node_index, text))
+        else:
+            self._stack.append(None)
+
+    def data(self, data: str) -> None:
+        state = self._stack[-1] if self._stack else None
+        if state is not None and state.text is not None and not state.has_children:
+            state.text.append(data)
+
+    def end(self, tag: str) -> None:
+        state = self._stack.pop()
+        if state is None:
+            return
+        kind = state.kind
+        attrib = state.attrib
+        if state.elem_id:
+            tag_name = attrib.get("TagName") or attrib.get("Tag") or state.child_tag_text
+            x, y = _to_coordinates(state.position)
+            if state.node_index is not None:
+                self.nodes[state.node_index] = _component_node(
+                    attrib, kind.local, state.elem_id, tag_name, x, y
+                )
+
+        parent = self._stack[-1] if self._stack else None
+        if parent is None:
+            return
+        if state.text and parent.child_tag_text is None:
+            text = "".join(state.text)
+            if text:
+                parent.child_tag_text = text.strip()
+        if kind.is_location and parent.first_location is None:
+            parent.first_location = _location_xy(attrib)
+        if parent.position is None:
+            if kind.is_position:
+                parent.position = state.first_location or (None, None)
+            elif kind.is_location:
+                parent.position = _location_xy(attrib)
+
+    def close(self) -> tuple[list[dict], list[dict]]:
+        return self.nodes, self.edges
+
+
+def _collect_streaming(xml_path: Path, chunk_size: int = 1 << 16) -> tuple[list[dict], list[dict]]:
+    """Nodes and edges from one incremental pass, feeding the file to the parser in chunks."""
+    parser = ET.XMLParser(target=_DexpiStreamTarget())
+    with open(xml_path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            parser.feed(chunk)
+    return parser.close()
+
+
+# Batch conversion state and per-run summary (written to the batch output directory)
+BATCH_STATE_FILE = "batch_state.json"
+BATCH_SUMMARY_FILE = "summary.json"
+DEFAULT_BATCH_OUTPUT = Path("data/output/dexpi")
+
+
+def collect_xml_files(inputs: Sequence[str], recursive: bool = False) -> list[Path]:
+    """
+    Expand XML files, directories and glob patterns into a de-duplicated list of XML files.
+
+    Args:
+        inputs: XML files, directories or glob patterns (``**`` allowed)
+        recursive: Also include XML files in subdirectories of directory inputs
+
+    Returns:
+        XML paths in input order (sorted within each directory or pattern)
+
+    Raises:
+        FileNotFoundError: If an input matches nothing
+    """
+    files: list[Path] = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            pattern = "**/*.xml" if recursive else "*.xml"
+            found = sorted(p for p in path.glob(pattern) if p.is_file())
+        elif path.is_file():
+            found = [path]
+        else:
+            found = sorted(
+                Path(p)
+                for p in glob.glob(item, recursive=True)
+                if p.lower().endswith(".xml") and Path(p).is_file()
+            )
+        if not found:
+            raise FileNotFoundError(f"No DEXPI XML files found for input: {item}")
+        files.extend(found)
+
+    seen: set[Path] = set()
+    unique = []
+    for xml_path in files:
+        key = xml_path.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(xml_path)
+    return unique
+
+
+def _batch_output_paths(xml_files: list[Path], output_dir: Path) -> dict[Path, Path]:
+    """Output file per input, mirroring the inputs' directory layout below their common parent."""
+    resolved = [p.resolve() for p in xml_files]
+    common = Path(os.path.commonpath([str(p.parent) for p in resolved]))
+    return {
+        xml_path: output_dir / path.relative_to(common).with_suffix(".json")
+        for xml_path, path in zip(xml_files, resolved, strict=True)
     }
 
-    return jsonld
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _convert_for_batch(
+    xml_path: Path, output_path: Path, previous_sha256: str | None, method: ParseMethod
+) -> dict[str, Any]:
+    """
+    Process-pool task: convert one file unless its content hash matches the last run.
+
+    Returns:
+        Job entry with status ("ok", "unchanged" or "failed"), source mtime/size/hash,
+        component and connection counts, and hash/parse/write timings in seconds
+    """
+    start = time.perf_counter()
+    stat = xml_path.stat()
+    entry: dict[str, Any] = {
+        "input": str(xml_path),
+        "output": str(output_path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+    }
+    try:
+        entry["sha256"] = _file_sha256(xml_path)
+        hashed = time.perf_counter()
+        entry["hash_s"] = round(hashed - start, 3)
+        if entry["sha256"] == previous_sha256 and output_path.exists():
+            entry["status"] = "unchanged"
+        else:
+            jsonld = parse_dexpi_xml(xml_path, method=method, verbose=False)
+            parsed = time.perf_counter()
+            write_json_atomic(output_path, jsonld, indent=2)
+            graph = jsonld["@graph"]
+            connections = sum(item["@type"] == "pid:Connection" for item in graph)
+            entry.update(
+                status="ok",
+                components=len(graph) - connections,
+                connections=connections,
+                parse_s=round(parsed - hashed, 3),
+                write_s=round(time.perf_counter() - parsed, 3),
+            )
+    except Exception as e:
+        entry.update(status="failed", error=f"{type(e).__name__}: {e}")
+    entry["elapsed_s"] = round(time.perf_counter() - start, 3)
+    return entry
+
+
+def convert_batch(
+    xml_files: list[Path],
+    output_dir: Path,
+    workers: int | None = None,
+    method: ParseMethod = "stream",
+    force: bool = False,
+) -> dict[str, Any]:
+    """
+    Convert many DEXPI files in a process pool, skipping files unchanged since the last run.
+
+    A file is skipped without being read when its mtime and size match the state recorded
+    in ``output_dir`` by the previous run and its output still exists. Otherwise it is
+    hashed (in the worker) and converted only if its SHA-256 differs from the recorded
+    one. Outputs are written to a temporary file and renamed, so an interrupted run never
+    leaves a truncated JSON-LD file.
+
+    Args:
+        xml_files: DEXPI XML files (see collect_xml_files)
+        output_dir: Directory for the JSON-LD files (mirroring the input layout), the
+            batch state and the run summary
+        workers: Number of processes (None = one per CPU, 1 = convert in this process)
+        method: Parser used for each file (see parse_dexpi_xml)
+        force: Convert every given file, ignoring the recorded state (the state of
+            files not in this run is kept)
+
+    Returns:
+        Summary dictionary (also written to summary.json) with one entry per file
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    state_path = output_dir / BATCH_STATE_FILE
+    state: dict[str, dict[str, Any]] = {}
+    if state_path.exists():
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+    outputs = _batch_output_paths(xml_files, output_dir)
+
+    entries: list[dict[str, Any]] = []
+    jobs: list[tuple[Path, Path, str | None]] = []
+    for xml_path in xml_files:
+        output_path = outputs[xml_path]
+        # force ignores the recorded state, but files outside this run keep theirs
+        previous = None if force else state.get(str(xml_path.resolve()))
+        stat = xml_path.stat()
+        if (
+            previous
+            and previous["mtime_ns"] == stat.st_mtime_ns
+            and previous["size"] == stat.st_size
+            and Path(previous["output"]) == output_path
+            and output_path.exists()
+        ):
+            entries.append({**previous, "status": "skipped", "elapsed_s": 0.0})
+        else:
+            jobs.append((xml_path, output_path, previous["sha256"] if previous else None))
+
+    print(f"🔍 {len(jobs)} file(s) to check, {len(entries)} unchanged since the last run")
+    start = time.perf_counter()
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 1 and len(jobs) > 1 else None
+    try:
+        if pool is None:
+            results = (_convert_for_batch(*job, method) for job in jobs)
+        else:
+            results = pool.map(_convert_for_batch, *zip(*jobs, strict=True), [method] * len(jobs))
+        for done, entry in enumerate(results, start=1):
+            entries.append(entry)
+            name = Path(entry["input"]).name
+            if entry["status"] == "ok":
+                print(
+                    f"✅ [{done}/{len(jobs)}] {name}: {entry['components']} components, "
+                    f"{entry['connections']} connections "
+                    f"(parse {entry['parse_s']:.2f}s, write {entry['write_s']:.2f}s)"
+                )
+            elif entry["status"] == "unchanged":
+                print(f"⏭️  [{done}/{len(jobs)}] {name}: content unchanged")
+            else:
+                print(f"❌ [{done}/{len(jobs)}] {name}: {entry['error']}")
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        # Record what was converted so far, even if the run was interrupted
+        for entry in entries:
+            if entry["status"] in ("ok", "unchanged", "skipped"):
+                state[str(Path(entry["input"]).resolve())] = {
+                    key: entry[key] for key in ("input", "output", "mtime_ns", "size", "sha256")
+                }
+        write_json_atomic(state_path, state, indent=2)
+
+    summary = {
+        "total": len(entries),
+        "ok": sum(e["status"] == "ok" for e in entries),
+        "failed": sum(e["status"] == "failed" for e in entries),
+        "skipped": sum(e["status"] in ("skipped", "unchanged") for e in entries),
+        "method": method,
+        "elapsed_s": round(time.perf_counter() - start, 3),
+        "files": entries,
+    }
+    write_json_atomic(output_dir / BATCH_SUMMARY_FILE, summary, indent=2)
+    return summary
 
 
 def main() -> None:
@@ -207,25 +611,72 @@ Examples:
 
   # Specify output file
   python src/dexpi_reader.py dexpi_example.xml -o pnid_dexpi.json
+
+  # Convert a whole corpus on 4 processes (unchanged files are skipped on re-runs)
+  python src/dexpi_reader.py data/input/TrainingTestCases-master -r --workers 4
         """,
     )
-    parser.add_argument("input", type=Path, help="Path to DEXPI XML file")
+    parser.add_argument(
+        "input",
+        nargs="+",
+        help="DEXPI XML file; several files, directories or glob patterns select batch mode",
+    )
     parser.add_argument(
         "-o",
         "--output",
         type=Path,
         default=None,
-        help="Path to output JSON-LD file (default: input with .json extension)",
+        help="Output JSON-LD file (default: input with .json extension); in batch mode the "
+        f"output directory (default: {DEFAULT_BATCH_OUTPUT})",
+    )
+    parser.add_argument(
+        "--method",
+        choices=["stream", "tree"],
+        default="stream",
+        help="stream: single incremental pass with bounded memory (default); "
+        "tree: load the whole XML tree first",
+    )
+    parser.add_argument(
+        "-r", "--recursive", action="store_true", help="Batch: recurse into directories"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Batch: number of processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Batch: convert every file, even if unchanged since the last run",
     )
 
     args = parser.parse_args()
 
+    if len(args.input) > 1 or not Path(args.input[0]).is_file():
+        try:
+            xml_files = collect_xml_files(args.input, recursive=args.recursive)
+        except FileNotFoundError as e:
+            print(f"❌ Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        output_dir = args.output or DEFAULT_BATCH_OUTPUT
+        summary = convert_batch(
+            xml_files, output_dir, workers=args.workers, method=args.method, force=args.force
+        )
+        print(
+            f"\n📊 {summary['ok']} converted, {summary['skipped']} unchanged, "
+            f"{summary['failed']} failed in {summary['elapsed_s']:.2f}s"
+        )
+        print(f"   Output: {output_dir}")
+        sys.exit(1 if summary["failed"] else 0)
+
+    input_path = Path(args.input[0])
     try:
         # Parse DEXPI XML
-        jsonld = parse_dexpi_xml(args.input)
+        jsonld = parse_dexpi_xml(input_path, method=args.method)
 
         # Determine output path
-        output_path = args.output or args.input.with_suffix(".json")
+        output_path = args.output or input_path.with_suffix(".json")
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
         # Write JSON-LD
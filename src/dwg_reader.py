@@ -2,15 +2,26 @@
 from __future__ import annotations
 
 import argparse
+import io
 import json
-import math
+import mmap
 import re
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import asdict, dataclass
+from functools import partial
+from itertools import pairwise
 from pathlib import Path
-from typing import Iterable, Literal
+from typing import Iterable, Iterator, Literal, NamedTuple
 
 import ezdxf  # pip install ezdxf
+import numpy as np
+from ezdxf.addons import iterdxf
+from ezdxf.entities import factory
+from ezdxf.entities.subentity import entity_linker
+from ezdxf.filemanagement import dxf_file_info
+from ezdxf.lldxf.extendedtags import ExtendedTags
+from ezdxf.lldxf.tagger import ascii_tags_loader, tag_compiler
 
 # ---------------------------
 # Data structures
@@ -82,6 +93,9 @@ DEFAULT_PIPE_LAYER_PATTERNS: list[str] = [
     r"^PIPING",
 ]
 
+# Entity types read in streaming mode (everything the extractors use)
+STREAM_TYPES = ("INSERT", "LINE", "LWPOLYLINE")
+
 # Attribute names to harvest from INSERTs
 ATTR_PRIORITY = {
     "TAG": "tag",
@@ -99,19 +113,80 @@ ATTR_PRIORITY = {
 # ---------------------------
 
 
-def _distance(a: tuple[float, float], b: tuple[float, float]) -> float:
-    return math.hypot(a[0] - b[0], a[1] - b[1])
-
-
-def _match_any(patterns: Iterable[str], text: str) -> bool:
-    return any(re.search(p, text, flags=re.IGNORECASE) for p in patterns)
+class EntityClassifier:
+    """
+    Precompiled block-type and pipe-layer rules with memo tables.
 
+    Drawings reuse a small set of block names, layers and attribute tags across many
+    entities, so each name is matched against the rules once and the answer is remembered.
+    One classifier is used per document (or per worker in scan_dxf_parallel).
+    """
 
-def _map_block_type(block_name: str, rules: list[tuple[str, str]]) -> str | None:
-    for pattern, type_iri in rules:
-        if re.search(pattern, block_name, flags=re.IGNORECASE):
+    def __init__(
+        self,
+        block_type_rules: list[tuple[str, str]] = DEFAULT_BLOCK_NAME_TO_TYPE,
+        pipe_layer_patterns: list[str] = DEFAULT_PIPE_LAYER_PATTERNS,
+    ):
+        """
+        Args:
+            block_type_rules: (regex, type IRI) pairs; the first matching rule wins.
+            pipe_layer_patterns: Regexes identifying pipe layers.
+        """
+        self._type_rules = [(re.compile(p, re.IGNORECASE), iri) for p, iri in block_type_rules]
+        self._pipe_patterns = [re.compile(p, re.IGNORECASE) for p in pipe_layer_patterns]
+        self._block_types: dict[str, str | None] = {}
+        self._pipe_layers: dict[str, bool] = {}
+        self._attribute_fields: dict[str, str | None] = {}
+
+    def block_type(self, block_name: str) -> str | None:
+        """Component type IRI for a block name, or None if no rule matches."""
+        try:
+            return self._block_types[block_name]
+        except KeyError:
+            type_iri = next(
+                (iri for pattern, iri in self._type_rules if pattern.search(block_name)), None
+            )
+            self._block_types[block_name] = type_iri
             return type_iri
-    return None
+
+    def is_pipe_layer(self, layer: str) -> bool:
+        """Whether entities on ``layer`` are pipe geometry."""
+        try:
+            return self._pipe_layers[layer]
+        except KeyError:
+            is_pipe = any(pattern.search(layer) for pattern in self._pipe_patterns)
+            self._pipe_layers[layer] = is_pipe
+            return is_pipe
+
+    def attribute_field(self, attrib_tag: str) -> str | None:
+        """PIDNode field ("name", "tag", "line_number") an ATTRIB tag fills, or None."""
+        try:
+            return self._attribute_fields[attrib_tag]
+        except KeyError:
+            field = ATTR_PRIORITY.get(attrib_tag.strip().upper())
+            self._attribute_fields[attrib_tag] = field
+            return field
+
+
+def _harvest_attributes(
+    insert, classifier: EntityClassifier
+) -> tuple[str | None, str | None, str | None]:
+    """(name, tag, line_number) from an INSERT's attributes (first value per field wins)."""
+    name: str | None = None
+    tag: str | None = None
+    line_number: str | None = None
+
+    for attrib in insert.attribs:
+        field = classifier.attribute_field(attrib.dxf.tag or "")
+        if field is not None:
+            val_text = (attrib.dxf.text or "").strip()
+            if field == "name":
+                name = name or val_text
+            elif field == "tag":
+                tag = tag or val_text
+            elif field == "line_number":
+                line_number = line_number or val_text
+    return name, tag, line_number
 
 
 # ---------------------------
@@ -119,61 +194,352 @@ def _map_block_type(block_name: str, rules: list[tuple[str, str]]) -> str | None
 # ---------------------------
 
 
-def extract_nodes_from_inserts(
-    doc: ezdxf.EZDXF,
-    block_type_rules: list[tuple[str, str]] = DEFAULT_BLOCK_NAME_TO_TYPE,
-) -> list[PIDNode]:
-    """Extract PID components from INSERT entities (block references)."""
-    msp = doc.modelspace()
-    nodes: list[PIDNode] = []
-
-    for insert in msp.query("INSERT"):
-        block_name: str = insert.dxf.name or ""
-        comp_type = _map_block_type(block_name, block_type_rules)
-        if not comp_type:
-            # Skip blocks we can't classify; you can change this to include all.
-            continue
+@dataclass
+class ModelspaceScan:
+    """Everything extracted from one pass over the modelspace entities."""
+
+    nodes: list[PIDNode]  # classified INSERTs
+    unknown_nodes: list[PIDNode]  # unclassified INSERTs (if requested), numbered after nodes
+    pipe_vertices: list[PipeVertex]  # LINE endpoints first, then LWPOLYLINE vertices
+    pipe_segments: np.ndarray  # (S, 4) [x1, y1, x2, y2]; LINEs first, then LWPOLYLINEs
+
+
+def scan_modelspace(
+    entities: Iterable,
+    classifier: EntityClassifier | None = None,
+    include_unknown_blocks: bool = False,
+    collect_vertices: bool = True,
+    collect_segments: bool = True,
+) -> ModelspaceScan:
+    """
+    Extract nodes and pipe geometry in a single pass, dispatching on entity type.
+
+    Args:
+        entities: Modelspace entities (e.g. ``doc.modelspace()``); any other entity
+            types are skipped.
+        classifier: Block-type and pipe-layer rules (defaults if None).
+        include_unknown_blocks: Also collect unclassified INSERTs as pid:Component.
+        collect_vertices: Collect pipe vertices (for infer_connectivity).
+        collect_segments: Collect pipe segments (for infer_network_connectivity).
+
+    Returns:
+        ModelspaceScan; the lists are in the same order as separate per-type queries.
+    """
+    rows = _scan_rows(
+        entities,
+        classifier or EntityClassifier(),
+        include_unknown_blocks,
+        collect_vertices,
+        collect_segments,
+    )
+    return _assemble_scan([rows])
+
+
+def scan_dxf_parallel(
+    dxf_path: Path,
+    classifier: EntityClassifier | None = None,
+    include_unknown_blocks: bool = False,
+    collect_vertices: bool = True,
+    collect_segments: bool = True,
+    workers: int | None = None,
+    chunk_bytes: int = 8 * 1024 * 1024,
+) -> ModelspaceScan:
+    """
+    scan_modelspace over a DXF file, parsing chunks of its ENTITIES section in a process pool.
+
+    The section is cut into byte ranges of about ``chunk_bytes`` at top-level entity
+    boundaries (never between an INSERT and its ATTRIBs), each worker streams and scans its
+    ranges with its own copy of the classifier, and the partial results are concatenated
+    in file order, so the scan is identical to ``scan_modelspace(stream_modelspace(path))``.
+    Like streaming mode, the file must be an ASCII DXF.
+
+    Args:
+        dxf_path: DXF file.
+        classifier, include_unknown_blocks, collect_vertices, collect_segments:
+            As for scan_modelspace.
+        workers: Number of processes (None = one per CPU).
+        chunk_bytes: Target size of each parsed range.
+
+    Returns:
+        ModelspaceScan.
+    """
+    classifier = classifier or EntityClassifier()
+    encoding = dxf_file_info(str(dxf_path)).encoding
+    ranges = _entity_byte_ranges(dxf_path, chunk_bytes)
+    scan_chunk = partial(
+        _scan_chunk,
+        str(dxf_path),
+        encoding,
+        classifier=classifier,
+        include_unknown_blocks=include_unknown_blocks,
+        collect_vertices=collect_vertices,
+        collect_segments=collect_segments,
+    )
+    if len(ranges) > 1 and (workers is None or workers > 1):
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(scan_chunk, ranges))
+    else:
+        parts = [scan_chunk(byte_range) for byte_range in ranges]
+    return _assemble_scan(parts)
+
+
+class _ScanRows(NamedTuple):
+    """Unnumbered scan results for one run of entities (picklable, for pool workers)."""
+
+    # (block_name, type, name, tag, layer, x, y, line_number)
+    nodes: list[tuple]
+    unknown: list[tuple[str, str | None, float, float]]
+    line_points: list[tuple[float, float, str]]
+    poly_points: list[tuple[float, float, str]]
+    line_segments: np.ndarray
+    poly_segments: np.ndarray
+
+
+def _scan_rows(
+    entities: Iterable,
+    classifier: EntityClassifier,
+    include_unknown_blocks: bool,
+    collect_vertices: bool,
+    collect_segments: bool,
+) -> _ScanRows:
+    """Single pass over ``entities`` collecting rows in entity order (see scan_modelspace)."""
+    nodes: list[tuple] = []
+    unknown: list[tuple[str, str | None, float, float]] = []
+    line_points: list[tuple[float, float, str]] = []
+    poly_points: list[tuple[float, float, str]] = []
+    line_segments = _RowBuffer(4)
+    poly_segments = _RowBuffer(4)
+
+    for entity in entities:
+        kind = entity.dxftype()
+        if kind == "INSERT":
+            block_name: str = entity.dxf.name or ""
+            comp_type = classifier.block_type(block_name)
+            x, y, _ = entity.dxf.insert  # (x, y, z)
+            if not comp_type:
+                # Skip blocks we can't classify unless asked to include them
+                if include_unknown_blocks:
+                    unknown.append((block_name, entity.dxf.layer, float(x), float(y)))
+                continue
 
-        # Position
-        x, y, _ = insert.dxf.insert  # (x, y, z)
+            name, tag, line_number = _harvest_attributes(entity, classifier)
+            # Fallbacks
+            if not name and tag:
+                name = tag
+            if not name and block_name:
+                name = block_name
 
-        # Harvest attributes
-        name: str | None = None
-        tag: str | None = None
-        line_number: str | None = None
+            nodes.append(
+                (
+                    block_name,
+                    comp_type,
+                    name,
+                    tag,
+                    entity.dxf.layer,
+                    float(x),
+                    float(y),
+                    line_number,
+                )
+            )
 
-        for attrib in insert.attribs:
-            raw_tag = (attrib.dxf.tag or "").strip().upper()
-            val_text = (attrib.dxf.text or "").strip()
-            if raw_tag in ATTR_PRIORITY:
-                field = ATTR_PRIORITY[raw_tag]
-                if field == "name":
-                    name = name or val_text
-                elif field == "tag":
-                    tag = tag or val_text
-                elif field == "line_number":
-                    line_number = line_number or val_text
-
-        # Fallbacks
-        if not name and tag:
-            name = tag
-        if not name and block_name:
-            name = block_name
-
-        node = PIDNode(
-            id=f"pid:{block_name}_{len(nodes) + 1}",
+        elif kind == "LINE":
+            layer = entity.dxf.layer or ""
+            if not classifier.is_pipe_layer(layer):
+                continue
+            start, end = entity.dxf.start, entity.dxf.end
+            x1, y1, x2, y2 = float(start.x), float(start.y), float(end.x), float(end.y)
+            if collect_vertices:
+                line_points.append((x1, y1, layer))
+                line_points.append((x2, y2, layer))
+            if collect_segments:
+                line_segments.append((x1, y1, x2, y2))
+
+        elif kind == "LWPOLYLINE":
+            layer = entity.dxf.layer or ""
+            if not classifier.is_pipe_layer(layer):
+                continue
+            pts = [(float(x), float(y)) for x, y, *_ in entity.get_points()]
+            if collect_vertices:
+                poly_points.extend((x, y, layer) for x, y in pts)
+            if collect_segments:
+                if entity.closed and len(pts) > 2:
+                    pts.append(pts[0])
+                poly_segments.extend((*a, *b) for a, b in pairwise(pts))
+
+    return _ScanRows(
+        nodes,
+        unknown,
+        line_points,
+        poly_points,
+        line_segments.to_array(),
+        poly_segments.to_array(),
+    )
+
+
+def _assemble_scan(parts: list[_ScanRows]) -> ModelspaceScan:
+    """Concatenate per-chunk rows in order and number nodes and vertices."""
+    node_rows = [row for part in parts for row in part.nodes]
+    unknown = [row for part in parts for row in part.unknown]
+    nodes = [
+        PIDNode(
+            id=f"pid:{block_name}_{k}",
             type=comp_type,
             name=name,
             tag=tag,
-            layer=insert.dxf.layer,
-            x=float(x),
-            y=float(y),
+            layer=layer,
+            x=x,
+            y=y,
             block_name=block_name,
             line_number=line_number,
         )
-        nodes.append(node)
+        for k, (block_name, comp_type, name, tag, layer, x, y, line_number) in enumerate(
+            node_rows, start=1
+        )
+    ]
+    unknown_nodes = [
+        PIDNode(
+            id=f"pid:{block_name}_{len(nodes) + k}",
+            type="pid:Component",
+            name=block_name,
+            tag=None,
+            layer=layer,
+            x=x,
+            y=y,
+            block_name=block_name,
+            line_number=None,
+        )
+        for k, (block_name, layer, x, y) in enumerate(unknown, start=1)
+    ]
+    points = [point for part in parts for point in part.line_points]
+    points += [point for part in parts for point in part.poly_points]
+    vertices = [
+        PipeVertex(id=f"pipev:{counter}", x=x, y=y, layer=layer)
+        for counter, (x, y, layer) in enumerate(points, start=1)
+    ]
+    segments = np.concatenate(
+        [part.line_segments for part in parts]
+        + [part.poly_segments for part in parts]
+        + [np.empty((0, 4))]
+    )
+    return ModelspaceScan(nodes, unknown_nodes, vertices, segments)
+
+
+# Group code 0 followed by an entity type that starts a top-level entity (not a sub-entity
+# of the INSERT/POLYLINE before it). A "0" line followed by a non-numeric line is always a
+# group code, because every value line is followed by a numeric group code line.
+_ENTITY_START = re.compile(
+    rb"\n *0\r?\n(?!(?:ATTRIB|SEQEND|VERTEX)\r?\n)[0-9]*[A-Z_][A-Z0-9_]*\r?\n"
+)
+_ENTITIES_SECTION = re.compile(rb"\n *0\r?\nSECTION\r?\n *2\r?\nENTITIES\r?\n")
+_END_SECTION = re.compile(rb"\n *0\r?\nENDSEC\r?\n")
+
+
+def _entity_byte_ranges(dxf_path: Path, chunk_bytes: int) -> list[tuple[int, int]]:
+    """Byte ranges covering the ENTITIES section, each starting at a top-level entity."""
+    with open(dxf_path, "rb") as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        section = _ENTITIES_SECTION.search(data)
+        if section is None:
+            raise ValueError(f"No ENTITIES section in {dxf_path}")
+        start = section.end()
+        end = _END_SECTION.search(data, start - 1).start() + 1
+        ranges: list[tuple[int, int]] = []
+        while start < end:
+            cut = _ENTITY_START.search(data, min(start + chunk_bytes, end) - 1, end)
+            stop = cut.start() + 1 if cut else end
+            ranges.append((start, stop))
+            start = stop
+    return ranges
+
+
+def _iter_entity_range(dxf_path: str, encoding: str, start: int, stop: int) -> Iterator:
+    """
+    Modelspace STREAM_TYPES entities in a byte range of the ENTITIES section.
+
+    Re-implements the loop of ``iterdxf.modelspace`` on a byte range, so it relies on ezdxf
+    internals (``entity_linker``, ``tag_compiler``, ``ascii_tags_loader``, ``factory``)
+    that are not public API. Checked against ezdxf 1.4.3 and 1.4.4; pyproject.toml pins
+    ezdxf below 1.5, and tests/test_dwg_reader.py compares the result with iterdxf.
+    """
+    with open(dxf_path, "rb") as fp:
+        fp.seek(start)
+        text = fp.read(stop - start).decode(encoding, errors="surrogateescape")
+    # Terminate the range like the end of a file, so the last entity is complete and flushed
+    text += "  0\nEOF\n"
+    requested = {*STREAM_TYPES, "ATTRIB", "SEQEND"}
+    linked_entity = entity_linker()
+    queued = None
+    tags: list = []
+    # Same entity assembly as iterdxf.modelspace
+    for tag in tag_compiler(ascii_tags_loader(io.StringIO(text, newline=None))):
+        if tag.code != 0:
+            tags.append(tag)
+            continue
+        if tags and tags[0].value in requested:
+            entity = factory.load(ExtendedTags(tags))
+            if not linked_entity(entity) and entity.dxf.paperspace == 0:
+                if queued is not None:
+                    yield queued
+                queued = entity
+        tags = [tag]
+    if queued is not None:
+        yield queued
+
+
+def _scan_chunk(dxf_path: str, encoding: str, byte_range: tuple[int, int], **options) -> _ScanRows:
+    """Process-pool task: scan one byte range of the ENTITIES section."""
+    return _scan_rows(_iter_entity_range(dxf_path, encoding, *byte_range), **options)
+
+
+class _RowBuffer:
+    """Append-only float64 rows, packed into NumPy chunks so long scans stay compact."""
+
+    def __init__(self, width: int, chunk_rows: int = 65536):
+        self.width = width
+        self.chunk_rows = chunk_rows
+        self._chunks: list[np.ndarray] = []
+        self._pending: list[tuple[float, ...]] = []
+
+    def append(self, row: tuple[float, ...]) -> None:
+        self._pending.append(row)
+        if len(self._pending) >= self.chunk_rows:
+            self._flush()
+
+    def extend(self, rows: Iterable[tuple[float, ...]]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._chunks.append(np.array(self._pending, dtype=np.float64))
+            self._pending = []
 
-    return nodes
+    def to_array(self) -> np.ndarray:
+        self._flush()
+        if not self._chunks:
+            return np.empty((0, self.width), dtype=np.float64)
+        return np.concatenate(self._chunks)
+
+
+def stream_modelspace(dxf_path: Path) -> Iterator:
+    """
+    Iterate the modelspace INSERT/LINE/LWPOLYLINE entities of a DXF file without loading it.
+
+    Uses ezdxf's iterdxf add-on, which parses the ENTITIES section entity by entity (with
+    each INSERT's ATTRIBs attached), so memory use does not grow with the file size.
+    The file must be a seekable ASCII DXF.
+    """
+    return iterdxf.modelspace(str(dxf_path), types=STREAM_TYPES)
+
+
+def extract_nodes_from_inserts(
+    doc: ezdxf.EZDXF,
+    block_type_rules: list[tuple[str, str]] = DEFAULT_BLOCK_NAME_TO_TYPE,
+) -> list[PIDNode]:
+    """Extract PID components from INSERT entities (block references)."""
+    classifier = EntityClassifier(block_type_rules, pipe_layer_patterns=[])
+    return scan_modelspace(
+        doc.modelspace(), classifier, collect_vertices=False, collect_segments=False
+    ).nodes
 
 
 def extract_pipe_vertices(
@@ -181,33 +547,23 @@ def extract_pipe_vertices(
     pipe_layer_patterns: list[str] = DEFAULT_PIPE_LAYER_PATTERNS,
 ) -> list[PipeVertex]:
     """Collect endpoints/vertices of pipe geometry from LINE and LWPOLYLINE."""
-    msp = doc.modelspace()
-    vertices: list[PipeVertex] = []
-    counter = 0
-
-    # LINE entities
-    for line in msp.query("LINE"):
-        layer = line.dxf.layer or ""
-        if not _match_any(pipe_layer_patterns, layer):
-            continue
-        start = (float(line.dxf.start.x), float(line.dxf.start.y))
-        end = (float(line.dxf.end.x), float(line.dxf.end.y))
-        counter += 1
-        vertices.append(PipeVertex(id=f"pipev:{counter}", x=start[0], y=start[1], layer=layer))
-        counter += 1
-        vertices.append(PipeVertex(id=f"pipev:{counter}", x=end[0], y=end[1], layer=layer))
-
-    # LWPOLYLINE entities
-    for pl in msp.query("LWPOLYLINE"):
-        layer = pl.dxf.layer or ""
-        if not _match_any(pipe_layer_patterns, layer):
-            continue
-        pts = [(float(x), float(y)) for x, y, *_ in pl.get_points()]
-        for x, y in pts:
-            counter += 1
-            vertices.append(PipeVertex(id=f"pipev:{counter}", x=x, y=y, layer=layer))
+    classifier = EntityClassifier([], pipe_layer_patterns)
+    return scan_modelspace(doc.modelspace(), classifier, collect_segments=False).pipe_vertices
+
 
-    return vertices
+def extract_pipe_segments(
+    doc: ezdxf.EZDXF,
+    pipe_layer_patterns: list[str] = DEFAULT_PIPE_LAYER_PATTERNS,
+) -> np.ndarray:
+    """
+    Collect pipe geometry from LINE and LWPOLYLINE as straight segments.
+
+    Returns:
+        (S, 4) float64 array of [x1, y1, x2, y2]; polylines contribute one row per
+        consecutive vertex pair (plus the closing pair for closed polylines).
+    """
+    classifier = EntityClassifier([], pipe_layer_patterns)
+    return scan_modelspace(doc.modelspace(), classifier, collect_vertices=False).pipe_segments
 
 
 def infer_connectivity(
@@ -218,25 +574,23 @@ def infer_connectivity(
     """
     Infer edges by snapping nodes to nearest pipe vertices and connecting
     nodes that share the same snapped vertex (i.e., meet at the same pipe junction).
+
+    All nodes are snapped in one batch query against a grid index of the vertices.
     """
     edges: list[PIDEdge] = []
 
     # Map: snapped vertex key -> list of node ids
     junctions: dict[str, list[str]] = {}
 
-    def nearest_vertex_key(x: float, y: float) -> str | None:
-        best_key: str | None = None
-        best_dist: float = float("inf")
-        for v in pipe_vertices:
-            d = _distance((x, y), (v.x, v.y))
-            if d < best_dist and d <= snap_tolerance:
-                best_dist = d
-                best_key = f"{round(v.x, 3)}:{round(v.y, 3)}"
-        return best_key
-
-    for node in nodes:
-        key = nearest_vertex_key(node.x, node.y)
-        if key:
+    if nodes and pipe_vertices:
+        vertex_xy = np.array([(v.x, v.y) for v in pipe_vertices], dtype=np.float64)
+        node_xy = np.array([(n.x, n.y) for n in nodes], dtype=np.float64)
+        nearest = snap_to_vertices(node_xy, vertex_xy, snap_tolerance)
+        for node, k in zip(nodes, nearest.tolist(), strict=True):
+            if k < 0:
+                continue
+            v = pipe_vertices[k]
+            key = f"{round(v.x, 3)}:{round(v.y, 3)}"
             junctions.setdefault(key, []).append(node.id)
 
     # Create edges for nodes sharing the same junction
@@ -251,6 +605,281 @@ def infer_connectivity(
     return edges
 
 
+def snap_to_vertices(points: np.ndarray, vertices: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Nearest vertex within ``tolerance`` of each point, using a uniform grid hash.
+
+    Vertices are bucketed into square cells of size ``tolerance``, so every vertex within
+    tolerance of a point lies in the 3x3 cells around the point's cell. Candidate pairs
+    come from a sorted-key join and are resolved with NumPy; ties go to the lowest vertex
+    index (the vertex a linear scan keeps).
+
+    Args:
+        points: (P, 2) array of query points.
+        vertices: (V, 2) array of vertex coordinates.
+        tolerance: Maximum snapping distance (drawing units).
+
+    Returns:
+        (P,) int64 array of vertex indices, -1 where no vertex is within tolerance.
+    """
+    result = np.full(len(points), -1, dtype=np.int64)
+    if not len(points) or not len(vertices) or tolerance < 0:
+        return result
+    cell = tolerance if tolerance > 0 else 1.0
+
+    vertex_cells = np.floor(vertices / cell).astype(np.int64)
+    low = vertex_cells.min(axis=0) - 1
+    high = vertex_cells.max(axis=0) + 1
+    height = int(high[1] - low[1]) + 1
+
+    def cell_keys(cells: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        valid = np.all((cells >= low) & (cells <= high), axis=1)
+        return (cells[:, 0] - low[0]) * height + (cells[:, 1] - low[1]), valid
+
+    vertex_keys, _ = cell_keys(vertex_cells)
+    order = np.argsort(vertex_keys, kind="stable")
+    sorted_keys = vertex_keys[order]
+
+    point_cells = np.floor(points / cell).astype(np.int64)
+    pair_points: list[np.ndarray] = []
+    pair_vertices: list[np.ndarray] = []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            keys, valid = cell_keys(point_cells + (dx, dy))
+            query = np.flatnonzero(valid)
+            lo = np.searchsorted(sorted_keys, keys[query], side="left")
+            hi = np.searchsorted(sorted_keys, keys[query], side="right")
+            hits = hi - lo
+            pair_points.append(np.repeat(query, hits))
+            pair_vertices.append(
+                order[np.repeat(lo - np.cumsum(hits) + hits, hits) + np.arange(hits.sum())]
+            )
+    pair_point = np.concatenate(pair_points)
+    pair_vertex = np.concatenate(pair_vertices)
+
+    dist = np.hypot(*(points[pair_point] - vertices[pair_vertex]).T)
+    within = dist <= tolerance
+    pair_point, pair_vertex, dist = pair_point[within], pair_vertex[within], dist[within]
+
+    # Closest vertex per point, lowest index on ties
+    best = np.lexsort((pair_vertex, dist, pair_point))
+    pair_point, pair_vertex = pair_point[best], pair_vertex[best]
+    first = np.ones(len(pair_point), dtype=bool)
+    first[1:] = pair_point[1:] != pair_point[:-1]
+    result[pair_point[first]] = pair_vertex[first]
+    return result
+
+
+def build_pipe_network(segments: np.ndarray, snap_tolerance: float = 5.0) -> np.ndarray:
+    """
+    Group pipe segments into connected pipe networks (union-find).
+
+    Two segments are joined when an endpoint of one lies within ``snap_tolerance`` of the
+    other segment: a shared or snapped endpoint, or a tee where a branch ends on the
+    interior of a run. Segments that merely cross are not joined.
+
+    Args:
+        segments: (S, 4) array of [x1, y1, x2, y2] (from extract_pipe_segments).
+        snap_tolerance: Snap distance in drawing units.
+
+    Returns:
+        (S,) int64 network label per segment (the lowest segment index in its network).
+    """
+    n = len(segments)
+    endpoints = segments.reshape(-1, 2)
+    point_idx, seg_idx = _segments_near_points(endpoints, segments, snap_tolerance)
+    owner = point_idx // 2
+    other = owner != seg_idx
+    return _union_find_labels(n, owner[other], seg_idx[other])
+
+
+def infer_network_connectivity(
+    nodes: list[PIDNode],
+    segments: np.ndarray,
+    snap_tolerance: float = 5.0,
+) -> tuple[list[PIDNode], list[PIDEdge]]:
+    """
+    Infer edges by following pipe geometry from node to node.
+
+    Every segment is cut at the points lying on it: its own endpoints, endpoints of other
+    segments that snap onto it (shared corners and tees) and the insertion points of
+    nodes within ``snap_tolerance``. Consecutive cut points along a segment are linked,
+    and the pipe pieces between nodes are merged with union-find. Two nodes connect when a
+    pipe run leads from one to the other without passing through another node, so a line
+    of in-line valves becomes a chain. A run that reaches three or more nodes (a tee
+    between components) gets a ``pid:PipeJunction`` node linked to each of them, which
+    keeps the output linear in the number of attachments.
+
+    Args:
+        nodes: Components (from extract_nodes_from_inserts).
+        segments: (S, 4) pipe segments (from extract_pipe_segments).
+        snap_tolerance: Snap distance in drawing units.
+
+    Returns:
+        (junction_nodes, edges); edges between components come first, ordered by node.
+    """
+    if not nodes or not len(segments):
+        return [], []
+    n_vertices = 2 * len(segments)
+    endpoints = segments.reshape(-1, 2)
+    node_xy = np.array([(node.x, node.y) for node in nodes], dtype=np.float64)
+
+    # Cut points per segment: endpoints (incl. its own) and node attachments.
+    # Vertices 0 .. 2S-1 are segment endpoints, 2S + i is node i.
+    end_idx, end_seg = _segments_near_points(endpoints, segments, snap_tolerance)
+    node_idx, node_seg = _segments_near_points(node_xy, segments, snap_tolerance)
+    stop_seg = np.concatenate([end_seg, node_seg])
+    stop_vertex = np.concatenate([end_idx, n_vertices + node_idx])
+    stop_t = _segment_param(
+        np.concatenate([endpoints[end_idx], node_xy[node_idx]]), segments[stop_seg]
+    )
+
+    # Link consecutive cut points along each segment. At equal t a node sits on the
+    # interior side of the endpoints, so a pipe ending at a node reaches it first.
+    is_node = stop_vertex >= n_vertices
+    side = np.where(is_node, 1, np.where(stop_t <= 0, 0, 2))
+    order = np.lexsort((stop_vertex, side, stop_t, stop_seg))
+    stop_seg, stop_vertex = stop_seg[order], stop_vertex[order]
+    link = (stop_seg[1:] == stop_seg[:-1]) & (stop_vertex[1:] != stop_vertex[:-1])
+    a, b = stop_vertex[:-1][link], stop_vertex[1:][link]
+    a_node, b_node = a >= n_vertices, b >= n_vertices
+
+    # Pipe runs: endpoints joined by pipe pieces that do not pass through a node
+    pipe = ~a_node & ~b_node
+    runs = _union_find_labels(n_vertices, a[pipe], b[pipe])
+
+    # Nodes touching each run; nodes cut next to each other connect directly
+    touch = a_node != b_node
+    touch_node = np.where(a_node, a, b)[touch] - n_vertices
+    touch_run = runs[np.where(a_node, b, a)[touch]]
+    members = np.unique(np.stack([touch_run, touch_node], axis=1), axis=0)
+    run_ids, first, size = np.unique(members[:, 0], return_index=True, return_counts=True)
+
+    pairs = [np.sort(np.stack([a, b], axis=1)[a_node & b_node] - n_vertices, axis=1)]
+    two = first[size == 2]
+    pairs.append(members[np.stack([two, two + 1], axis=1), 1].reshape(-1, 2))
+    pairs = np.unique(np.concatenate(pairs).astype(np.int64).reshape(-1, 2), axis=0)
+    edges = [PIDEdge(source=nodes[i].id, target=nodes[j].id) for i, j in pairs.tolist()]
+
+    # One junction per run reaching three or more nodes, placed at the run's centroid
+    counts = np.bincount(runs, minlength=n_vertices)
+    cx = np.bincount(runs, weights=endpoints[:, 0], minlength=n_vertices) / np.maximum(counts, 1)
+    cy = np.bincount(runs, weights=endpoints[:, 1], minlength=n_vertices) / np.maximum(counts, 1)
+    junctions: list[PIDNode] = []
+    for k, (run, start, count) in enumerate(
+        zip(
+            run_ids[size > 2].tolist(),
+            first[size > 2].tolist(),
+            size[size > 2].tolist(),
+            strict=True,
+        ),
+        start=1,
+    ):
+        junction = PIDNode(
+            id=f"pid:PipeJunction_{k}",
+            type="pid:PipeJunction",
+            name=None,
+            tag=None,
+            layer=None,
+            x=float(cx[run]),
+            y=float(cy[run]),
+            block_name=None,
+            line_number=None,
+        )
+        junctions.append(junction)
+        edges.extend(
+            PIDEdge(source=junction.id, target=nodes[i].id)
+            for i in members[start : start + count, 1].tolist()
+        )
+    return junctions, edges
+
+
+def _segment_param(points: np.ndarray, segments: np.ndarray) -> np.ndarray:
+    """Projection parameter (0..1, clamped) of each point along its paired segment."""
+    a, delta = segments[:, :2], segments[:, 2:] - segments[:, :2]
+    length_sq = (delta**2).sum(axis=1)
+    return np.clip(
+        ((points - a) * delta).sum(axis=1) / np.where(length_sq == 0, 1.0, length_sq), 0, 1
+    )
+
+
+def _segments_near_points(
+    points: np.ndarray, segments: np.ndarray, tolerance: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    All (point, segment) pairs with point-to-segment distance <= tolerance.
+
+    Segment bounding boxes, grown by the tolerance, are registered in a uniform grid; each
+    point is joined with the segments registered in its own cell, then filtered by the
+    exact distance.
+
+    Returns:
+        (point_indices, segment_indices), sorted by point then segment.
+    """
+    empty = np.empty(0, dtype=np.int64)
+    if not len(points) or not len(segments) or tolerance < 0:
+        return empty, empty
+    start, end = segments[:, :2], segments[:, 2:]
+    low = np.minimum(start, end) - tolerance
+    high = np.maximum(start, end) + tolerance
+    cell = max(float(np.median((high - low).max(axis=1))), tolerance, 1e-9)
+
+    c0 = np.floor(low / cell).astype(np.int64)
+    c1 = np.floor(high / cell).astype(np.int64)
+    origin = c0.min(axis=0)
+    height = int(c1[:, 1].max() - origin[1]) + 1
+    span = c1 - c0 + 1
+    counts = span[:, 0] * span[:, 1]
+    seg = np.repeat(np.arange(len(segments)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    cx = c0[seg, 0] + local % span[seg, 0]
+    cy = c0[seg, 1] + local // span[seg, 0]
+    keys = (cx - origin[0]) * height + (cy - origin[1])
+    order = np.argsort(keys, kind="stable")
+    sorted_keys, sorted_seg = keys[order], seg[order]
+
+    pc = np.floor(points / cell).astype(np.int64)
+    valid = np.all((pc >= origin) & (pc <= c1.max(axis=0)), axis=1)
+    query = np.flatnonzero(valid)
+    query_keys = (pc[query, 0] - origin[0]) * height + (pc[query, 1] - origin[1])
+    lo = np.searchsorted(sorted_keys, query_keys, side="left")
+    hi = np.searchsorted(sorted_keys, query_keys, side="right")
+    hits = hi - lo
+    point_idx = np.repeat(query, hits)
+    seg_idx = sorted_seg[np.repeat(lo - np.cumsum(hits) + hits, hits) + np.arange(hits.sum())]
+
+    # Exact point-to-segment distance (projection clamped to the segment)
+    p = points[point_idx]
+    a, b = start[seg_idx], end[seg_idx]
+    t = _segment_param(p, segments[seg_idx])
+    dist = np.hypot(*(p - (a + t[:, None] * (b - a))).T)
+    keep = dist <= tolerance
+    point_idx, seg_idx = point_idx[keep], seg_idx[keep]
+    order = np.lexsort((seg_idx, point_idx))
+    return point_idx[order], seg_idx[order]
+
+
+def _union_find_labels(n: int, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Connected-component labels of n items joined by pairs (a[i], b[i]).
+
+    Vectorized union-find: every round hooks each root onto the smallest root it is paired
+    with, then compresses paths fully. Labels are the smallest index in each component.
+    """
+    parent = np.arange(n, dtype=np.int64)
+    while True:
+        ra, rb = parent[a], parent[b]
+        differ = ra != rb
+        if not differ.any():
+            return parent
+        np.minimum.at(parent, np.maximum(ra, rb)[differ], np.minimum(ra, rb)[differ])
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+
+
 # ---------------------------
 # JSON-LD serialization
 # ---------------------------
@@ -350,12 +979,33 @@ def main() -> None:
         default=5.0,
         help="Snap tolerance (drawing units) for node-to-pipe junction.",
     )
+    parser.add_argument(
+        "--connectivity",
+        choices=["network", "vertex"],
+        default="network",
+        help=(
+            "network: connect nodes that follow each other along the pipe network (default); "
+            "vertex: only connect nodes that snap to the same pipe vertex."
+        ),
+    )
     parser.add_argument(
         "--context",
         type=str,
         default="https://example.com/pid#",
         help="Base IRI for the JSON-LD pid: namespace.",
     )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream modelspace entities from the file instead of loading the whole document "
+        "(bounded memory for very large DXF files).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parse the DXF entities in chunks on this many processes (default: serial).",
+    )
     parser.add_argument(
         "--include-unknown-blocks",
         action="store_true",
@@ -382,9 +1032,6 @@ def main() -> None:
     # DWG → DXF if needed
     dxf_path = maybe_convert_dwg_to_dxf(input_path)
 
-    # Load DXF
-    doc = ezdxf.readfile(str(dxf_path))
-
     # Build type rules
     type_rules = list(DEFAULT_BLOCK_NAME_TO_TYPE)
     if args.type_rule:
@@ -394,38 +1041,34 @@ def main() -> None:
             regex, iri = rule.split("=", 1)
             type_rules.append((regex, iri))
 
-    # Extract nodes
-    nodes = extract_nodes_from_inserts(doc, block_type_rules=type_rules)
-
-    # Optionally include unknown blocks
-    if args.include_unknown_blocks:
-        msp = doc.modelspace()
-        for insert in msp.query("INSERT"):
-            block_name = insert.dxf.name or ""
-            if _map_block_type(block_name, type_rules):
-                continue
-            x, y, _ = insert.dxf.insert
-            name = block_name
-            nodes.append(
-                PIDNode(
-                    id=f"pid:{block_name}_{len(nodes) + 1}",
-                    type="pid:Component",
-                    name=name,
-                    tag=None,
-                    layer=insert.dxf.layer,
-                    x=float(x),
-                    y=float(y),
-                    block_name=block_name,
-                    line_number=None,
-                )
-            )
-
-    # Pipe vertices
+    # Nodes and pipe geometry in one pass over the modelspace
     pipe_patterns = args.pipe_layer_pattern or DEFAULT_PIPE_LAYER_PATTERNS
-    pipe_vertices = extract_pipe_vertices(doc, pipe_layer_patterns=pipe_patterns)
+    classifier = EntityClassifier(type_rules, pipe_patterns)
+    scan_options = dict(
+        include_unknown_blocks=args.include_unknown_blocks,
+        collect_vertices=args.connectivity == "vertex",
+        collect_segments=args.connectivity == "network",
+    )
+    if args.workers and args.workers > 1:
+        scan = scan_dxf_parallel(dxf_path, classifier, workers=args.workers, **scan_options)
+    else:
+        # Load DXF (or stream its modelspace entities)
+        if args.stream:
+            entities = stream_modelspace(dxf_path)
+        else:
+            doc = ezdxf.readfile(str(dxf_path))
+            entities = doc.modelspace()
+        scan = scan_modelspace(entities, classifier, **scan_options)
+    nodes = scan.nodes + scan.unknown_nodes
 
     # Connectivity
-    edges = infer_connectivity(nodes, pipe_vertices, snap_tolerance=args.snap)
+    if args.connectivity == "network":
+        junctions, edges = infer_network_connectivity(
+            nodes, scan.pipe_segments, snap_tolerance=args.snap
+        )
+        nodes = nodes + junctions
+    else:
+        edges = infer_connectivity(nodes, scan.pipe_vertices, snap_tolerance=args.snap)
 
     # JSON-LD
     jsonld_obj = make_jsonld(nodes, edges, base_context_iri=args.context)
@@ -22,6 +22,8 @@ import sys
 from pathlib import Path
 from typing import Any
 
+from pnid_graph import CONNECTION_TYPES, PnidGraph
+
 
 def load_pnid(path: Path) -> dict[str, Any]:
     """Load P&ID from JSON-LD file."""
@@ -38,9 +40,8 @@ def save_pnid(pnid: dict[str, Any], path: Path) -> None:
 
 def separate_nodes_edges(graph: list[dict]) -> tuple[list[dict], list[dict]]:
     """Separate graph into nodes and edges."""
-    nodes = [n for n in graph if n.get("@type") != "pid:Connection"]
-    edges = [e for e in graph if e.get("@type") == "pid:Connection"]
-    return nodes, edges
+    pid_graph = PnidGraph.from_jsonld(graph)
+    return pid_graph.nodes, pid_graph.edges
 
 
 def add_random_components(pnid: dict[str, Any], count: int = 3) -> dict[str, Any]:
@@ -84,7 +85,8 @@ def remove_random_components(pnid: dict[str, Any], count: int = 5) -> dict[str,
     """Remove random components from the P&ID."""
     pnid = json.loads(json.dumps(pnid))  # Deep copy
     graph = pnid["@graph"]
-    nodes, edges = separate_nodes_edges(graph)
+    pid_graph = PnidGraph.from_jsonld(graph)
+    nodes = pid_graph.nodes
 
     if len(nodes) <= count:
         count = max(1, len(nodes) // 2)
@@ -93,16 +95,16 @@ def remove_random_components(pnid: dict[str, Any], count: int = 5) -> dict[str,
     to_remove = random.sample(nodes, count)
     remove_ids = {n["@id"] for n in to_remove}
 
-    # Remove nodes and their associated edges
-    new_graph = []
-    for item in graph:
-        if item["@id"] in remove_ids:
-            continue
-        if item.get("@type") == "pid:Connection":
-            connected = item.get("connectedTo", [])
-            if any(node_id in remove_ids for node_id in connected):
-                continue
-        new_graph.append(item)
+    # Remove nodes and every edge naming one of them, even if its other end is missing
+    removed_edges = {
+        id(pid_graph.edges[e])
+        for e in pid_graph.edges_with_endpoint(pid_graph.component_mask(remove_ids))
+    }
+    new_graph = [
+        item
+        for item in graph
+        if item.get("@id") not in remove_ids and id(item) not in removed_edges
+    ]
 
     pnid["@graph"] = new_graph
     return pnid
@@ -125,7 +127,7 @@ def remove_random_edges(pnid: dict[str, Any], fraction: float = 0.3) -> dict[str
     # Remove only connection objects whose @id is in remove_ids
     new_graph = []
     for item in graph:
-        if item.get("@type") == "pid:Connection" and item.get("@id") in remove_ids:
+        if item.get("@type") in CONNECTION_TYPES and item.get("@id") in remove_ids:
             continue
         new_graph.append(item)
 
@@ -161,7 +163,7 @@ def perturb_positions(pnid: dict[str, Any], max_offset: float = 20.0) -> dict[st
     graph = pnid["@graph"]
 
     for node in graph:
-        if node.get("@type") == "pid:Connection":
+        if node.get("@type") in CONNECTION_TYPES:
             continue
 
         x = node.get("x")
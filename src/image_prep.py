@@ -0,0 +1,138 @@
+"""Downscale and re-encode images before sending them to a vision LLM.
+
+Large scans hit provider upload limits, upload slowly and cost more image tokens than the
+model can use: providers downsample big images internally anyway. ImagePrep shrinks an
+image to a target long edge and/or pixel budget and optionally re-encodes it as JPEG or
+WebP, and records the sent size so coordinates returned by the model (in the sent image's
+pixel space) can be mapped back to the original image, per axis.
+
+Usage:
+    prep = ImagePrep(max_long_edge=1568, image_format="webp", quality=85)
+    prepared = prep.apply(image_bytes, "image/png")
+    content = BinaryContent(data=prepared.data, media_type=prepared.media_type)
+    ...
+    x_original, y_original = prepared.to_original(x, y)
+"""
+
+import io
+import math
+from dataclasses import dataclass
+from typing import Literal
+
+from PIL import Image
+
+ImageFormat = Literal["original", "jpeg", "webp", "png"]
+
+_FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+    "png": ("PNG", "image/png"),
+}
+
+
+@dataclass
+class PreparedImage:
+    """Encoded image as sent to the model, plus its relation to the original."""
+
+    data: bytes
+    media_type: str
+    original_size: tuple[int, int]  # (width, height)
+    size: tuple[int, int]  # (width, height) as sent
+
+    @property
+    def scale_x(self) -> float:
+        """Sent pixels per original pixel along x (1.0 = unchanged width)."""
+        return self.size[0] / self.original_size[0]
+
+    @property
+    def scale_y(self) -> float:
+        """Sent pixels per original pixel along y (1.0 = unchanged height)."""
+        return self.size[1] / self.original_size[1]
+
+    @property
+    def resized(self) -> bool:
+        """True if the sent image has a different size than the original."""
+        return self.size != self.original_size
+
+    def to_original(self, x: float, y: float) -> tuple[float, float]:
+        """Map a point from sent-image pixels back to original pixels."""
+        return x / self.scale_x, y / self.scale_y
+
+    def to_sent(self, x: float, y: float) -> tuple[float, float]:
+        """Map a point from original pixels to sent-image pixels."""
+        return x * self.scale_x, y * self.scale_y
+
+
+@dataclass
+class ImagePrep:
+    """Settings for the pre-send resize / re-encode stage (defaults leave the image untouched)."""
+
+    max_long_edge: int | None = None  # longest side in pixels after resizing
+    max_pixels: int | None = None  # width × height budget after resizing
+    image_format: ImageFormat = "original"
+    quality: int = 85  # JPEG/WebP quality
+
+    def scale_for(self, width: int, height: int) -> float:
+        """Downscale factor (≤ 1.0) that satisfies both limits."""
+        scale = 1.0
+        if self.max_long_edge:
+            scale = min(scale, self.max_long_edge / max(width, height))
+        if self.max_pixels:
+            scale = min(scale, math.sqrt(self.max_pixels / (width * height)))
+        return scale
+
+    def apply(self, data: bytes, media_type: str) -> PreparedImage:
+        """
+        Resize and re-encode ``data`` according to the settings.
+
+        The original bytes are passed through unchanged when no resize is needed and no
+        re-encoding is requested.
+
+        Args:
+            data: Encoded image bytes
+            media_type: MIME type of ``data``
+
+        Returns:
+            PreparedImage with the bytes to send and the sent size
+        """
+        with Image.open(io.BytesIO(data)) as image:
+            original_size = image.size
+            scale = self.scale_for(*original_size)
+            if scale >= 1.0 and self.image_format == "original":
+                return PreparedImage(data, media_type, original_size, original_size)
+
+            if scale < 1.0:
+                # Palette / bilevel images would be resized with nearest-neighbour only
+                if image.mode in ("P", "1"):
+                    image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+                size = (
+                    max(1, round(original_size[0] * scale)),
+                    max(1, round(original_size[1] * scale)),
+                )
+                # Rounding each side separately can leave x and y ratios slightly apart
+                image = image.resize(size, Image.Resampling.LANCZOS)
+
+            if self.image_format == "original":
+                # A resized image has no format; label the bytes with what we encode
+                pil_format = image.format or _pil_format_for(media_type)
+                out_media_type = Image.MIME.get(pil_format, media_type)
+            else:
+                pil_format, out_media_type = _FORMATS[self.image_format]
+
+            if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            elif image.mode == "P":
+                image = image.convert("RGBA")
+
+            buffer = io.BytesIO()
+            save_kwargs = {"quality": self.quality} if pil_format in ("JPEG", "WEBP") else {}
+            image.save(buffer, format=pil_format, **save_kwargs)
+            return PreparedImage(buffer.getvalue(), out_media_type, original_size, image.size)
+
+
+def _pil_format_for(media_type: str) -> str:
+    """Pillow format name for a MIME type (PNG if unknown)."""
+    for pil_format, known_media_type in _FORMATS.values():
+        if known_media_type == media_type:
+            return pil_format
+    return "PNG"
@@ -0,0 +1,25 @@
+"""Atomic JSON file writes shared by the batch tools.
+
+A result is written to a temporary file next to its destination and then renamed over
+it, so an interrupted run never leaves a truncated JSON file behind and readers see
+either the old or the new content.
+"""
+
+import json
+from pathlib import Path
+from typing import Any
+
+
+def write_json_atomic(path: Path, data: Any, **dump_kwargs: Any) -> None:
+    """Write ``data`` as JSON to ``path`` via a temporary file and rename.
+
+    Args:
+        path: Destination file (parent directories are created)
+        data: JSON-serialisable value
+        **dump_kwargs: Formatting options for json.dump (e.g. indent, ensure_ascii)
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(data, f, **dump_kwargs)
+    tmp_path.replace(path)
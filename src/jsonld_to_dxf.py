@@ -17,8 +17,11 @@ from pathlib import Path
 from typing import Any
 
 import ezdxf
+import numpy as np
 from ezdxf import units
 
+from pnid_graph import PnidGraph
+
 # Map P&ID types to DXF block definitions
 PID_TYPE_TO_BLOCK: dict[str, str] = {
     "pid:Valve": "VALVE",
@@ -106,10 +109,11 @@ def convert_jsonld_to_dxf(jsonld_path: Path, output_path: Path, spacing: float =
         raise ValueError("No @graph found in JSON-LD data")
 
     # Separate nodes and edges
-    nodes = [n for n in graph if n.get("@type") != "pid:Connection"]
-    edges = [n for n in graph if n.get("@type") == "pid:Connection"]
+    pid_graph = PnidGraph.from_jsonld(graph)
+    num_nodes = pid_graph.n_components
+    num_edges = pid_graph.num_edges
 
-    print(f"Found {len(nodes)} components and {len(edges)} connections")
+    print(f"Found {num_nodes} components and {num_edges} connections")
 
     # Create new DXF document
     doc = ezdxf.new("R2010", setup=True)
@@ -124,42 +128,27 @@ def convert_jsonld_to_dxf(jsonld_path: Path, output_path: Path, spacing: float =
     # Create standard blocks
     create_standard_blocks(doc)
 
-    # Track positions for connection drawing
-    component_positions: dict[str, tuple[float, float]] = {}
-
     # Auto-layout: assign positions if missing
-    has_coordinates = any(n.get("x") is not None and n.get("y") is not None for n in nodes)
+    has_coordinates = bool(np.any(~np.isnan(pid_graph.x) & ~np.isnan(pid_graph.y)))
 
-    if not has_coordinates:
+    if has_coordinates:
+        xs = np.nan_to_num(pid_graph.x, nan=0.0)
+        ys = np.nan_to_num(pid_graph.y, nan=0.0)
+    else:
         print("No spatial coordinates found, using grid layout")
-        cols = int(len(nodes) ** 0.5) + 1
-        for i, node in enumerate(nodes):
-            row = i // cols
-            col = i % cols
-            node["x"] = col * spacing
-            node["y"] = row * spacing
+        cols = int(num_nodes**0.5) + 1
+        order = np.arange(num_nodes)
+        xs = (order % cols) * spacing
+        ys = (order // cols) * spacing
 
     # Insert components
     print("Inserting components...")
-    for node in nodes:
-        node_id = node.get("@id", "")
-        node_type = node.get("@type", "pid:Component")
-        name = node.get("name") or node.get("tag") or node_id.split(":")[-1]
-
-        # Get or assign position
-        x = node.get("x", 0.0)
-        y = node.get("y", 0.0)
-
-        if x is None:
-            x = 0.0
-        if y is None:
-            y = 0.0
-
-        # Convert to float
-        x = float(x)
-        y = float(y)
-
-        component_positions[node_id] = (x, y)
+    for i in range(num_nodes):
+        node_id = pid_graph.ids[i]
+        node_type = pid_graph.types[i] or "pid:Component"
+        name = pid_graph.labels[i] or node_id.split(":")[-1]
+        x = float(xs[i])
+        y = float(ys[i])
 
         # Determine block type
         block_name = PID_TYPE_TO_BLOCK.get(node_type, "COMPONENT")
@@ -178,21 +167,20 @@ def convert_jsonld_to_dxf(jsonld_path: Path, output_path: Path, spacing: float =
             },
         )
 
-    # Draw connections
+    # Draw connections between components (terminal and missing endpoints are skipped)
     print("Drawing connections...")
-    for edge in edges:
-        connected_to = edge.get("connectedTo", [])
-        if len(connected_to) >= 2:
-            source_id = connected_to[0]
-            target_id = connected_to[1]
-
-            # Get positions
-            source_pos = component_positions.get(source_id)
-            target_pos = component_positions.get(target_id)
-
-            if source_pos and target_pos:
-                # Draw line between components
-                msp.add_line(source_pos, target_pos, dxfattribs={"layer": "CONNECTIONS"})
+    drawn = (
+        (pid_graph.source >= 0)
+        & (pid_graph.source < num_nodes)
+        & (pid_graph.target >= 0)
+        & (pid_graph.target < num_nodes)
+    )
+    for source, target in zip(pid_graph.source[drawn], pid_graph.target[drawn]):
+        msp.add_line(
+            (float(xs[source]), float(ys[source])),
+            (float(xs[target]), float(ys[target])),
+            dxfattribs={"layer": "CONNECTIONS"},
+        )
 
     # Add title
     msp.add_text(
@@ -205,8 +193,8 @@ def convert_jsonld_to_dxf(jsonld_path: Path, output_path: Path, spacing: float =
     doc.saveas(str(output_path))
 
     print(f"\n✅ Successfully created DXF file")
-    print(f"   Components: {len(nodes)}")
-    print(f"   Connections: {len(edges)}")
+    print(f"   Components: {num_nodes}")
+    print(f"   Connections: {num_edges}")
     print(f"   Output: {output_path}")
 
 
@@ -0,0 +1,201 @@
+"""Content-addressed on-disk cache for LLM extraction and comparison results.
+
+A remote LLM call is fully determined by what is sent: image bytes, prompt text, provider,
+model and the structured-output schema. This module hashes exactly those inputs into a key
+and stores the parsed result as JSON under that key, so re-running over unchanged inputs
+returns instantly without an API call. Any change to an input (a re-rendered image, an
+edited prompt, a different model, a new field in the schema) produces a new key.
+
+The cache is bounded in size: entries are touched on every hit and the least recently used
+ones are deleted once the total exceeds the limit.
+
+Configuration (environment):
+- PNID_LLM_CACHE=0              disable the cache entirely
+- PNID_LLM_CACHE_DIR=<path>     cache directory (default: data/cache/llm)
+- PNID_LLM_CACHE_MAX_MB=<n>     size limit in MB (default: 512)
+
+Usage:
+    from llm_cache import get_cache, make_key
+
+    cache = get_cache()  # None when disabled
+    key = make_key(provider="openai", model="gpt-5", prompt=prompt, images=[image_bytes], schema=PNID)
+    result = cache.get(key) if cache else None
+    if result is None:
+        result = call_llm(...)
+        if cache:
+            cache.put(key, result)
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / "data" / "cache" / "llm"
+DEFAULT_MAX_MB = 512
+
+# Eviction triggered by a write frees space down to this fraction of the limit, so a full
+# cache is not rescanned on every following write
+EVICT_LOW_WATER = 0.9
+
+# Bump to invalidate every existing entry after a change to the stored value format
+CACHE_FORMAT_VERSION = 1
+
+
+def make_key(
+    *,
+    provider: str,
+    model: str,
+    prompt: str | Sequence[str] = "",
+    images: Sequence[bytes] = (),
+    schema: type[BaseModel] | dict[str, Any] | None = None,
+    **params: Any,
+) -> str:
+    """Hash the inputs that determine an LLM response into a cache key.
+
+    Args:
+        provider: Provider name
+        model: Resolved model name (not None; pass the provider default explicitly)
+        prompt: System and/or user prompt text (a sequence is hashed in order)
+        images: Encoded image bytes sent with the request
+        schema: Pydantic output model (its JSON schema is hashed) or a JSON schema dict
+        **params: Any other request parameters that affect the response (e.g. reasoning effort)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        schema = schema.model_json_schema()
+
+    header = {
+        "version": CACHE_FORMAT_VERSION,
+        "provider": provider,
+        "model": model,
+        "prompt": [prompt] if isinstance(prompt, str) else list(prompt),
+        "schema": schema,
+        "params": params,
+        # Hash images separately so the header stays small
+        "images": [hashlib.sha256(data).hexdigest() for data in images],
+    }
+    encoded = json.dumps(header, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Size-bounded LRU cache of JSON values in a directory, one file per key."""
+
+    def __init__(self, cache_dir: str | Path = DEFAULT_CACHE_DIR, max_bytes: int | None = None):
+        """
+        Args:
+            cache_dir: Directory holding the cache files (created on first write)
+            max_bytes: Size limit; least recently used entries are evicted above it
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes if max_bytes is not None else DEFAULT_MAX_MB * 1024 * 1024
+        self._lock = threading.Lock()
+        # Running total of the directory size, from the last full scan plus this process's
+        # writes (None until the first scan); other processes' writes are seen on rescans
+        self._total_bytes: int | None = None
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Any | None:
+        """Return the cached value for ``key`` (and mark it recently used), or None on a miss."""
+        path = self._path(key)
+        try:
+            value = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a JSON-serialisable value under ``key``.
+
+        The directory is only scanned (and least recently used entries evicted) on the
+        first write and whenever the tracked total exceeds the size limit, so a write is
+        O(1) otherwise.
+        """
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(value, ensure_ascii=False).encode("utf-8")
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(data)
+        try:
+            replaced = path.stat().st_size
+        except FileNotFoundError:
+            replaced = 0
+        tmp_path.replace(path)
+
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += len(data) - replaced
+            over = self._total_bytes is None or self._total_bytes > self.max_bytes
+        if over:
+            self.evict(int(self.max_bytes * EVICT_LOW_WATER))
+
+    def evict(self, target_bytes: int | None = None) -> int:
+        """Delete least recently used entries until the cache fits ``max_bytes``.
+
+        Args:
+            target_bytes: Size to evict down to when over the limit (default: max_bytes)
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for path in self.cache_dir.glob("*/*.json"):
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+
+            removed = 0
+            target = self.max_bytes if target_bytes is None else min(target_bytes, self.max_bytes)
+            for _, size, path in sorted(entries) if total > self.max_bytes else ():
+                if total <= target:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+            self._total_bytes = total
+            return removed
+
+    def clear(self) -> None:
+        """Delete every cache entry."""
+        with self._lock:
+            for path in self.cache_dir.glob("*/*.json"):
+                path.unlink(missing_ok=True)
+            self._total_bytes = 0
+
+
+_default_cache: LLMCache | None = None
+
+
+def get_cache(enabled: bool = True) -> LLMCache | None:
+    """Return the process-wide cache configured from the environment, or None if disabled.
+
+    Args:
+        enabled: Caller-side opt-out (e.g. a --no-cache flag); PNID_LLM_CACHE=0 also disables
+    """
+    global _default_cache
+    if not enabled or os.getenv("PNID_LLM_CACHE", "1").lower() in {"0", "false", "no", "off"}:
+        return None
+    if _default_cache is None:
+        cache_dir = os.getenv("PNID_LLM_CACHE_DIR") or DEFAULT_CACHE_DIR
+        max_mb = float(os.getenv("PNID_LLM_CACHE_MAX_MB", DEFAULT_MAX_MB))
+        _default_cache = LLMCache(cache_dir, max_bytes=int(max_mb * 1024 * 1024))
+    return _default_cache
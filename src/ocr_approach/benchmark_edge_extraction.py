@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for the geometry post-processing in opencv_edge_extraction.
+
+Purpose:
+- Generate synthetic Hough-style line segments (axis-aligned pipe runs with shared
+  endpoints, like a dense P&ID sheet) at increasing sizes.
+- Time junction detection and pipe route tracing with the grid-indexed and the reference
+  pairwise-scan methods.
+- Check that both methods return identical junctions and routes.
+
+Usage:
+    python src/ocr_approach/benchmark_edge_extraction.py
+    python src/ocr_approach/benchmark_edge_extraction.py --sizes 1000 10000 100000 --scan-limit 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import time
+from typing import Any
+
+from opencv_edge_extraction import PNIDEdgeExtractor
+
+
+def make_synthetic_lines(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """
+    Generate ``count`` line segments laid out as connected pipe runs.
+
+    Segments are chained end-to-start with a few pixels of jitter so endpoint clustering
+    sees realistic near-coincident points and occasional 3+ way junctions.
+    """
+    rng = random.Random(seed)
+    # Keep density roughly constant: ~one segment per 60×60 px cell
+    side = max(1000, int((count * 3600) ** 0.5))
+    lines: list[dict[str, Any]] = []
+    x, y = rng.randrange(side), rng.randrange(side)
+
+    while len(lines) < count:
+        if rng.random() < 0.1:
+            # Start a new run somewhere else, sometimes branching off an existing endpoint
+            if lines and rng.random() < 0.5:
+                x, y = rng.choice(lines)["end"]
+            else:
+                x, y = rng.randrange(side), rng.randrange(side)
+
+        length = rng.randint(20, 120)
+        if rng.random() < 0.5:
+            x2, y2 = x + rng.choice((-length, length)), y + rng.randint(-2, 2)
+        else:
+            x2, y2 = x + rng.randint(-2, 2), y + rng.choice((-length, length))
+        x2 = min(max(x2, 0), side)
+        y2 = min(max(y2, 0), side)
+
+        x1, y1 = x + rng.randint(-3, 3), y + rng.randint(-3, 3)
+        angle = math.degrees(math.atan2(y2 - y1, x2 - x1))
+        lines.append(
+            {
+                "start": [x1, y1],
+                "end": [x2, y2],
+                "center": [int((x1 + x2) / 2), int((y1 + y2) / 2)],
+                "length": math.hypot(x2 - x1, y2 - y1),
+                "angle": angle,
+                "orientation": "vertical" if 60 < abs(angle) < 120 else "horizontal",
+            }
+        )
+        x, y = x2, y2
+
+    return lines
+
+
+def _time_call(func: Any, *args: Any, **kwargs: Any) -> tuple[Any, float]:
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run_benchmark(sizes: list[int], scan_limit: int, threshold: float) -> None:
+    """Time junction detection and route tracing for each size and verify parity."""
+    extractor = PNIDEdgeExtractor()
+
+    print(
+        f"{'segments':>10} {'junctions':>10} {'routes':>8} "
+        f"{'junc grid':>10} {'junc scan':>10} {'route grid':>11} {'route scan':>11}  parity"
+    )
+    for size in sizes:
+        lines = make_synthetic_lines(size)
+        junctions, junc_grid = _time_call(
+            extractor.detect_junctions, lines, threshold, method="grid"
+        )
+        routes, route_grid = _time_call(
+            extractor.trace_pipe_routes, lines, threshold, method="grid"
+        )
+
+        junc_scan = route_scan = "-"
+        parity = "skipped"
+        if size <= scan_limit:
+            scan_junctions, scan_time = _time_call(
+                extractor.detect_junctions, lines, threshold, method="scan"
+            )
+            junc_scan = f"{scan_time:.3f}"
+            scan_routes, scan_time = _time_call(
+                extractor.trace_pipe_routes, lines, threshold, method="scan"
+            )
+            route_scan = f"{scan_time:.3f}"
+            same = list(junctions.items()) == list(scan_junctions.items()) and routes == scan_routes
+            parity = "ok" if same else "MISMATCH"
+
+        print(
+            f"{size:>10} {len(junctions):>10} {len(routes):>8} "
+            f"{junc_grid:>10.3f} {junc_scan:>10} {route_grid:>11.3f} {route_scan:>11}  {parity}"
+        )
+        if parity == "MISMATCH":
+            raise SystemExit(f"❌ Grid and scan results differ for {size} segments")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark edge-extraction geometry post-processing on synthetic segments."
+    )
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 2000, 5000, 10000, 20000, 50000, 100000],
+        help="Segment counts to benchmark.",
+    )
+    parser.add_argument(
+        "--scan-limit",
+        type=int,
+        default=2000,
+        help="Largest size to also run the quadratic reference methods on.",
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=25.0, help="Endpoint connection threshold (px)."
+    )
+    args = parser.parse_args()
+
+    run_benchmark(args.sizes, args.scan_limit, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -27,15 +27,20 @@ import json
 from pathlib import Path
 from typing import Any
 
-import easyocr  # Assumes EasyOCR is installed and available
+import numpy as np
+from ocr_readers import get_reader
 
 
-def run_easyocr(image_path: Path, languages: list[str] | None = None) -> list[dict[str, Any]]:
+def run_easyocr(
+    image_path: Path | bytes | np.ndarray, languages: list[str] | None = None
+) -> list[dict[str, Any]]:
     """
     Run EasyOCR on the given image and return flattened OCR items.
 
     Args:
-        image_path: Path to the input image.
+        image_path: Path to the input image, its encoded bytes, or a decoded BGR array.
+            EasyOCR decodes bytes exactly like a file (RGB for detection, grayscale for
+            recognition) but treats 3-channel arrays as BGR.
         languages: List of language codes for EasyOCR reader (e.g., ["en"]).
 
     Returns:
@@ -45,10 +50,12 @@ def run_easyocr(image_path: Path, languages: list[str] | None = None) -> list[di
         - bbox: list of 4 [x,y] points (quadrilateral in pixel coordinates)
     """
     langs = languages or ["en"]
-    reader = easyocr.Reader(langs)
+    # Model weights are loaded once per process and reused across calls
+    reader = get_reader("easyocr", langs)
 
     # EasyOCR returns a list of entries: [bbox, text, confidence]
-    result = reader.readtext(str(image_path))
+    image = str(image_path) if isinstance(image_path, (str, Path)) else image_path
+    result = reader.readtext(image)
 
     items: list[dict[str, Any]] = []
     for entry in result:
@@ -16,7 +16,7 @@ Usage (from repo root):
 
 Behavior:
 - Loads a PNID JSON (LLM or merged output).
-- Builds an adjacency graph from pipes (source/target).
+- Loads components/pipes into the shared PnidGraph (CSR adjacency from source/target).
 - Performs BFS from seed node ids up to `hops` distance to collect neighborhood.
 - Writes focused PNID JSON containing only the selected components and pipes.
 - Optionally calls the project visualization function to render the focused HTML.
@@ -33,9 +33,18 @@ from __future__ import annotations
 
 import argparse
 import json
-from collections import deque
+import sys
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Set, Tuple
+from typing import Any, Dict, Iterable, List, Set
+
+import numpy as np
+
+try:
+    from pnid_graph import PnidGraph
+except ImportError:
+    # Run directly as a script: the shared modules live one level up in src/
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from pnid_graph import PnidGraph
 
 # Try to import the existing visualization function. If unavailable,
 # we still produce the focused JSON (rendering is optional).
@@ -57,86 +66,39 @@ def save_json(data: Dict[str, Any], path: Path) -> None:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
 
-def component_key(comp: Dict[str, Any]) -> str:
-    """Return unique key used to identify a component (prefer 'id', fallback to 'label')."""
-    return str(comp.get("id") or comp.get("label"))
-
-
-def build_adjacency(pipes: List[Dict[str, Any]]) -> Dict[str, Set[str]]:
-    """
-    Build adjacency map from pipes (undirected).
-    Each pipe is expected to have 'source' and 'target' fields (original ids).
-    """
-    adj: Dict[str, Set[str]] = {}
-    for p in pipes:
-        s = p.get("source")
-        t = p.get("target")
-        if not s or not t:
-            continue
-        s = str(s)
-        t = str(t)
-        adj.setdefault(s, set()).add(t)
-        adj.setdefault(t, set()).add(s)
-    return adj
-
-
-def bfs_neighborhood(seeds: Iterable[str], adj: Dict[str, Set[str]], hops: int) -> Set[str]:
+def bfs_neighborhood(seeds: Iterable[str], graph: PnidGraph, hops: int) -> Set[str]:
     """
-    BFS from seeds over adjacency map for up to 'hops' steps.
+    BFS from seeds over the graph's CSR adjacency (undirected) for up to 'hops' steps.
     Returns set of reachable node ids including seeds.
     """
-    visited: Set[str] = set()
-    queue: deque[Tuple[str, int]] = deque()
+    seed_ids = [str(s) for s in seeds]
+    rows = [graph.index[s] for s in seed_ids if s in graph.index]
+    reached = {graph.ids[i] for i in graph.neighborhood(rows, hops)}
+    return reached | set(seed_ids)
 
-    for s in seeds:
-        queue.append((s, 0))
-        visited.add(s)
 
-    while queue:
-        node, depth = queue.popleft()
-        if depth >= hops:
-            continue
-        for nb in adj.get(node, ()):
-            if nb not in visited:
-                visited.add(nb)
-                queue.append((nb, depth + 1))
-    return visited
-
-
-def filter_pnid_by_components(pnid: Dict[str, Any], component_ids: Set[str]) -> Dict[str, Any]:
+def filter_pnid_by_components(
+    pnid: Dict[str, Any],
+    component_ids: Set[str],
+    graph: PnidGraph | None = None,
+) -> Dict[str, Any]:
     """
     Return a filtered PNID dict that includes only components whose id (or label)
     is in component_ids and only pipes that have both endpoints in the
     resulting component set OR where at least one endpoint is in the set (keeps inlets).
+    Pass 'graph' to reuse an already loaded PnidGraph of the same PNID.
     """
-    comps = pnid.get("components", [])
-    pipes = pnid.get("pipes", [])
-
-    # Build mapping from component key to full component
-    comp_map: Dict[str, Dict[str, Any]] = {}
-    for c in comps:
-        key = str(c.get("id") or c.get("label"))
-        if key in component_ids:
-            comp_map[key] = c
+    if graph is None:
+        graph = PnidGraph.from_pnid(pnid)
 
     # Determine pipes to include:
-    # - If both endpoints are known components and in comp_map -> include
-    # - Else if at least one endpoint is in comp_map -> include (keeps inlets/outlets connected)
-    included_pipes: List[Dict[str, Any]] = []
-    for p in pipes:
-        s = str(p.get("source")) if p.get("source") is not None else None
-        t = str(p.get("target")) if p.get("target") is not None else None
-        include = False
-        if s and t:
-            if s in comp_map and t in comp_map:
-                include = True
-            elif s in comp_map or t in comp_map:
-                # include as partial connection (keeps inlets/outlets)
-                include = True
-        if include:
-            included_pipes.append(p)
-
-    return {"components": list(comp_map.values()), "pipes": included_pipes}
+    # - If both endpoints are known components and selected -> include
+    # - Else if at least one endpoint is selected -> include (keeps inlets/outlets connected)
+    selected = graph.component_mask(component_ids)
+    components = [graph.nodes[i] for i in np.flatnonzero(selected)]
+    pipes = [graph.edges[e] for e in graph.edges_touching(selected)]
+
+    return {"components": components, "pipes": pipes}
 
 
 def compute_focus(
@@ -150,31 +112,18 @@ def compute_focus(
     """
     pnid = load_json(pnid_path)
 
-    # extract components and pipes depending on format
-    if "output" in pnid:
-        # earlier agents stored under output
-        components = pnid["output"].get("components", [])
-        pipes = pnid["output"].get("pipes", [])
-    else:
-        components = pnid.get("components", [])
-        pipes = pnid.get("pipes", [])
-
-    # map component ids (id or label)
-    comp_ids = [component_key(c) for c in components]
-    # adjacency from pipes (by original 'source' and 'target')
-    adj = build_adjacency(pipes)
+    # components/pipes are read from the top level or from the 'output' wrapper
+    # written by earlier agents; endpoints that are not components become terminals
+    graph = PnidGraph.from_pnid(pnid)
 
     # ensure seeds are valid keys; if user provided labels, accept them as-is
     normalized_seeds = [str(s) for s in seeds]
 
     # BFS to get focused component ids
-    neighborhood = bfs_neighborhood(normalized_seeds, adj, hops)
-
-    # Also include any seed that might not be in adjacency but is in components
-    neighborhood |= set([s for s in normalized_seeds if s in comp_ids])
+    neighborhood = bfs_neighborhood(normalized_seeds, graph, hops)
 
     # Build focused PNID
-    focused = filter_pnid_by_components({"components": components, "pipes": pipes}, neighborhood)
+    focused = filter_pnid_by_components(pnid, neighborhood, graph)
     return focused
 
 
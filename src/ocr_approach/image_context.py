@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+In-memory image shared across pipeline steps.
+
+Purpose:
+- Read an input diagram from disk once and decode it at most once.
+- Hand every step the representation it needs (encoded bytes for LLM upload and EasyOCR,
+  BGR for OpenCV drawing, grayscale for edge detection), each produced lazily on first
+  access and cached.
+
+Usage:
+    ctx = ImageContext.from_path(Path("data/input/brewery.jpg"))
+    items = run_easyocr(ctx.data)
+    features = extractor.extract_features_from_image(ctx.bgr)
+    content = BinaryContent(data=ctx.data, media_type=ctx.media_type)
+"""
+
+from __future__ import annotations
+
+from functools import cached_property
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Media types by file extension (for LLM uploads)
+MEDIA_TYPE_MAP = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+
+class ImageContext:
+    """An image decoded once, with cached BGR/grayscale views and encoded bytes."""
+
+    def __init__(
+        self,
+        path: Path | None = None,
+        data: bytes | None = None,
+        media_type: str | None = None,
+        bgr: np.ndarray | None = None,
+    ):
+        """
+        Initialize from a file path, encoded bytes, or an already decoded BGR array.
+
+        Prefer the ``from_path`` / ``from_bytes`` / ``from_array`` constructors.
+
+        Args:
+            path: Source file (read lazily if ``data`` is not given).
+            data: Encoded image bytes.
+            media_type: MIME type of ``data`` (derived from ``path`` if omitted).
+            bgr: Decoded BGR (or grayscale) pixel array.
+        """
+        if path is None and data is None and bgr is None:
+            raise ValueError("ImageContext needs a path, encoded bytes, or a pixel array")
+        self.path = Path(path) if path is not None else None
+        self._data = data
+        self._media_type = media_type
+        if bgr is not None:
+            # Seed the cached_property so the array is not decoded again
+            self.__dict__["bgr"] = bgr
+
+    @classmethod
+    def from_path(cls, path: Path | str) -> ImageContext:
+        """Create a context for an image file (nothing is read until first use)."""
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(f"Image not found: {path}")
+        return cls(path=path)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, media_type: str = "image/png") -> ImageContext:
+        """Create a context from encoded image bytes."""
+        return cls(data=data, media_type=media_type)
+
+    @classmethod
+    def from_array(cls, bgr: np.ndarray) -> ImageContext:
+        """Create a context from a decoded BGR (or grayscale) array; bytes are PNG-encoded on demand."""
+        return cls(bgr=bgr, media_type="image/png")
+
+    @classmethod
+    def coerce(cls, image: ImageContext | Path | str) -> ImageContext:
+        """Return ``image`` as an ImageContext, wrapping a path if needed."""
+        if isinstance(image, ImageContext):
+            return image
+        return cls.from_path(image)
+
+    @property
+    def name(self) -> str:
+        """Display name for log messages."""
+        return str(self.path) if self.path is not None else "<in-memory image>"
+
+    @property
+    def media_type(self) -> str:
+        """MIME type of ``data``."""
+        if self._media_type is None:
+            suffix = self.path.suffix.lower() if self.path is not None else ""
+            self._media_type = MEDIA_TYPE_MAP.get(suffix, "image/jpeg")
+        return self._media_type
+
+    @property
+    def data(self) -> bytes:
+        """Encoded image bytes (file contents, or PNG encoding of an in-memory array)."""
+        if self._data is None:
+            if self.path is not None:
+                self._data = self.path.read_bytes()
+            else:
+                ok, encoded = cv2.imencode(".png", self.bgr)
+                if not ok:
+                    raise ValueError("Could not encode image as PNG")
+                self._data = encoded.tobytes()
+        return self._data
+
+    @cached_property
+    def bgr(self) -> np.ndarray:
+        """Decoded BGR pixel array (as ``cv2.imread`` would return it)."""
+        image = cv2.imdecode(np.frombuffer(self.data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise FileNotFoundError(f"Could not load image: {self.name}")
+        return image
+
+    @cached_property
+    def gray(self) -> np.ndarray:
+        """Grayscale pixel array."""
+        if self.bgr.ndim == 2:
+            return self.bgr
+        return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY)
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """Image dimensions as (width, height)."""
+        height, width = self.bgr.shape[:2]
+        return width, height
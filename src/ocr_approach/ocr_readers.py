@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Process-wide cache of loaded OCR models (EasyOCR / PaddleOCR).
+
+Purpose:
+- Load each OCR backend's detection + recognition weights once per process, keyed by
+  backend, languages and constructor options, instead of once per image.
+- Warm a reader up ahead of time (first inference also pays CUDA/MKL initialisation).
+- Run batches of images through worker processes that each hold one loaded model, so a
+  batch pays the model load once per worker.
+
+Usage:
+    reader = get_reader("easyocr", ["en"])          # cached after the first call
+    warm_up("paddle", ["en"])                       # load + one dummy inference
+    results = run_ocr_batch(paths, backend="easyocr", workers=2)
+
+    python src/ocr_approach/ocr_readers.py data/input/*.jpg --backend easyocr --workers 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Literal
+
+import numpy as np
+
+Backend = Literal["easyocr", "paddle"]
+
+# Constructor options every caller of a backend uses. get_reader applies them by default, so
+# the worker initializer, warm_up and the per-image extract functions share one cached model.
+READER_OPTIONS: dict[str, dict[str, Any]] = {
+    "easyocr": {},
+    "paddle": {"use_textline_orientation": True},
+}
+
+_readers: dict[tuple[Any, ...], Any] = {}
+_readers_lock = threading.Lock()
+
+
+def _reader_key(backend: Backend, languages: list[str], options: dict[str, Any]) -> tuple[Any, ...]:
+    return (backend, tuple(languages), tuple(sorted(options.items())))
+
+
+def _load_reader(backend: Backend, languages: list[str], options: dict[str, Any]) -> Any:
+    """Construct a reader; backends are imported lazily so only the one used must be installed."""
+    if backend == "easyocr":
+        import easyocr
+
+        return easyocr.Reader(languages, **options)
+    if backend == "paddle":
+        from paddleocr import PaddleOCR  # type: ignore[import]
+
+        if len(languages) != 1:
+            raise ValueError(f"PaddleOCR takes exactly one language, got {languages}")
+        return PaddleOCR(lang=languages[0], **options)
+    raise ValueError(f"Unknown OCR backend: {backend}")
+
+
+def get_reader(backend: Backend, languages: list[str] | None = None, **options: Any) -> Any:
+    """
+    Return the cached reader for ``backend``/``languages``/``options``, loading it on first use.
+
+    Args:
+        backend: "easyocr" or "paddle".
+        languages: Language codes (default ["en"]; PaddleOCR takes exactly one).
+        **options: Extra keyword arguments for the reader constructor, on top of the
+            backend's READER_OPTIONS (part of the key).
+
+    Returns:
+        ``easyocr.Reader`` or ``PaddleOCR`` instance shared by all callers in this process.
+    """
+    langs = list(languages or ["en"])
+    options = {**READER_OPTIONS.get(backend, {}), **options}
+    key = _reader_key(backend, langs, options)
+    reader = _readers.get(key)
+    if reader is None:
+        # Loading takes seconds; hold the lock so concurrent callers don't load twice
+        with _readers_lock:
+            reader = _readers.get(key)
+            if reader is None:
+                reader = _load_reader(backend, langs, options)
+                _readers[key] = reader
+    return reader
+
+
+def warm_up(backend: Backend, languages: list[str] | None = None, **options: Any) -> Any:
+    """
+    Load a reader and run one inference on a blank image so later calls start hot.
+
+    Args:
+        backend: "easyocr" or "paddle".
+        languages: Language codes.
+        **options: Extra reader constructor options (on top of READER_OPTIONS).
+
+    Returns:
+        The warmed-up reader.
+    """
+    reader = get_reader(backend, languages, **options)
+    blank = np.full((64, 256, 3), 255, dtype=np.uint8)
+    if backend == "easyocr":
+        reader.readtext(blank)
+    else:
+        reader.predict(blank)
+    return reader
+
+
+def clear_readers() -> None:
+    """Drop all cached readers (frees model memory)."""
+    with _readers_lock:
+        _readers.clear()
+
+
+def _init_worker(backend: Backend, languages: list[str], warm: bool) -> None:
+    """Process-pool initializer: load (and optionally warm) this worker's reader once."""
+    if warm:
+        warm_up(backend, languages)
+    else:
+        get_reader(backend, languages)
+
+
+def _ocr_one(backend: Backend, languages: list[str], image_path: str) -> list[dict[str, Any]]:
+    """Worker task: OCR one image with the worker's cached reader."""
+    if backend == "easyocr":
+        from easyocr_extract import run_easyocr
+
+        return run_easyocr(Path(image_path), languages=languages)
+
+    from paddle_ocr_extract import run_paddle_ocr
+
+    return run_paddle_ocr(Path(image_path), lang=languages[0])
+
+
+def run_ocr_batch(
+    image_paths: list[Path],
+    backend: Backend = "easyocr",
+    languages: list[str] | None = None,
+    workers: int = 0,
+    warm: bool = True,
+) -> dict[str, list[dict[str, Any]]]:
+    """
+    OCR many images, loading the model once per process.
+
+    Args:
+        image_paths: Images to process.
+        backend: "easyocr" or "paddle".
+        languages: Language codes (default ["en"]).
+        workers: Worker processes, each holding one loaded model (0 = run in this
+            process with the shared cached reader).
+        warm: Run a dummy inference in each worker before the first image.
+
+    Returns:
+        Dictionary mapping image path to its OCR items, in input order.
+    """
+    langs = list(languages or ["en"])
+    paths = [str(path) for path in image_paths]
+
+    if workers <= 0:
+        if warm:
+            warm_up(backend, langs)
+        return {path: _ocr_one(backend, langs, path) for path in paths}
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(backend, langs, warm),
+    ) as pool:
+        results = pool.map(_ocr_one, [backend] * len(paths), [langs] * len(paths), paths)
+        return dict(zip(paths, results))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="OCR a batch of images with one loaded model per worker process."
+    )
+    parser.add_argument("images", type=Path, nargs="+", help="Input images.")
+    parser.add_argument("--backend", choices=["easyocr", "paddle"], default="easyocr")
+    parser.add_argument("--lang", nargs="+", default=["en"], help="Language code(s).")
+    parser.add_argument(
+        "--workers", type=int, default=0, help="Worker processes (0 = run in-process)."
+    )
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path(__file__).resolve().parent.parent / "data" / "output" / "ocr_batch",
+        help="Directory for <image>_<backend>.json results.",
+    )
+    args = parser.parse_args()
+
+    print(f"📸 Running {args.backend} on {len(args.images)} image(s)...")
+    results = run_ocr_batch(args.images, args.backend, args.lang, args.workers)
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    for path, items in results.items():
+        output_path = args.output_dir / f"{Path(path).stem}_{args.backend}.json"
+        output_path.write_text(json.dumps(items, indent=2, ensure_ascii=False))
+        print(f"✅ Saved {len(items)} OCR items to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,13 +21,168 @@ Methods:
 from __future__ import annotations
 
 import json
+import math
+import os
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, Literal
 
 import cv2
 import numpy as np
 from PIL import Image
 
+# Orientation labels, indexed by LineTable.orientation_code
+ORIENTATIONS: tuple[str, ...] = ("horizontal", "vertical", "diagonal")
+
+
+class LineTable:
+    """
+    Columnar store of detected line segments.
+
+    Each property is one NumPy array with a row per segment, so bulk consumers (route
+    tracing, statistics, label association) can work on whole columns at once. The table
+    also behaves as a read-only sequence of the classic line dictionaries (``len``,
+    indexing, iteration), which are only materialized when accessed or serialized.
+    """
+
+    __slots__ = ("start", "end", "length", "angle", "orientation_code")
+
+    def __init__(
+        self,
+        start: np.ndarray,
+        end: np.ndarray,
+        length: np.ndarray,
+        angle: np.ndarray,
+        orientation_code: np.ndarray,
+    ):
+        """
+        Args:
+            start: (N, 2) int32 array of segment start points.
+            end: (N, 2) int32 array of segment end points.
+            length: (N,) float64 array of segment lengths (pixels).
+            angle: (N,) float64 array of segment angles (degrees, -180..180].
+            orientation_code: (N,) uint8 array of indices into ORIENTATIONS.
+        """
+        self.start = start
+        self.end = end
+        self.length = length
+        self.angle = angle
+        self.orientation_code = orientation_code
+
+    @classmethod
+    def from_endpoints(cls, start: np.ndarray, end: np.ndarray) -> LineTable:
+        """Build a table from (N, 2) endpoint arrays, computing length/angle/orientation."""
+        start = np.asarray(start, dtype=np.int32).reshape(-1, 2)
+        end = np.asarray(end, dtype=np.int32).reshape(-1, 2)
+        dx = end[:, 0] - start[:, 0]
+        dy = end[:, 1] - start[:, 1]
+
+        length = np.sqrt(dx**2 + dy**2)
+        angle = np.arctan2(dy, dx) * 180 / np.pi
+
+        # Classify orientation (same bands as the per-line classification)
+        abs_angle = np.abs(angle)
+        vertical = (abs_angle > 60) & (abs_angle < 120)
+        diagonal = ((abs_angle > 30) & (abs_angle < 60)) | ((abs_angle > 120) & (abs_angle < 150))
+        orientation_code = np.where(vertical, 1, np.where(diagonal, 2, 0)).astype(np.uint8)
+
+        return cls(start, end, length, angle, orientation_code)
+
+    @classmethod
+    def from_hough(cls, hough_lines: np.ndarray | None) -> LineTable:
+        """Build a table from raw ``cv2.HoughLinesP`` output of shape (N, 1, 4)."""
+        if hough_lines is None:
+            return cls.from_endpoints(np.empty((0, 2)), np.empty((0, 2)))
+        raw = np.asarray(hough_lines).reshape(-1, 4)
+        return cls.from_endpoints(raw[:, 0:2], raw[:, 2:4])
+
+    @classmethod
+    def from_dicts(cls, lines: list[dict[str, Any]]) -> LineTable:
+        """Build a table from line dictionaries, keeping their stored length/angle/orientation."""
+        table = cls.from_endpoints(
+            np.array([line["start"] for line in lines], dtype=np.int32),
+            np.array([line["end"] for line in lines], dtype=np.int32),
+        )
+        if lines and all("angle" in line and "length" in line for line in lines):
+            table.length = np.array([line["length"] for line in lines], dtype=np.float64)
+            table.angle = np.array([line["angle"] for line in lines], dtype=np.float64)
+        if lines and all("orientation" in line for line in lines):
+            table.orientation_code = np.array(
+                [ORIENTATIONS.index(line["orientation"]) for line in lines], dtype=np.uint8
+            )
+        return table
+
+    @classmethod
+    def coerce(cls, lines: LineTable | list[dict[str, Any]]) -> LineTable:
+        """Return ``lines`` as a LineTable, converting from line dictionaries if needed."""
+        if isinstance(lines, LineTable):
+            return lines
+        return cls.from_dicts(list(lines))
+
+    @property
+    def center(self) -> np.ndarray:
+        """(N, 2) int array of segment midpoints (truncated like the dictionary form)."""
+        return np.trunc((self.start + self.end) / 2).astype(np.int64)
+
+    @property
+    def orientation(self) -> np.ndarray:
+        """(N,) array of orientation labels."""
+        return np.asarray(ORIENTATIONS)[self.orientation_code]
+
+    def mask(self, orientation: str) -> np.ndarray:
+        """Boolean row mask for segments with the given orientation label."""
+        return self.orientation_code == ORIENTATIONS.index(orientation)
+
+    def take(self, indices: Any) -> LineTable:
+        """Return a new table with the selected rows (index array, list, slice or mask)."""
+        return LineTable(
+            self.start[indices],
+            self.end[indices],
+            self.length[indices],
+            self.angle[indices],
+            self.orientation_code[indices],
+        )
+
+    def to_dicts(self) -> list[dict[str, Any]]:
+        """Materialize the classic list of line dictionaries."""
+        return [
+            {
+                "start": [x1, y1],
+                "end": [x2, y2],
+                "center": [int((x1 + x2) / 2), int((y1 + y2) / 2)],
+                "length": length,
+                "angle": angle,
+                "orientation": ORIENTATIONS[code],
+            }
+            for (x1, y1), (x2, y2), length, angle, code in zip(
+                self.start.tolist(),
+                self.end.tolist(),
+                self.length.tolist(),
+                self.angle.tolist(),
+                self.orientation_code.tolist(),
+            )
+        ]
+
+    def __len__(self) -> int:
+        return len(self.length)
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, (int, np.integer)):
+            return self.take(slice(index, index + 1 or None)).to_dicts()[0]
+        return self.take(index)
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        return iter(self.to_dicts())
+
+
+def to_json_default(obj: Any) -> Any:
+    """``json.dumps`` default hook that serializes LineTables as lists of line dicts."""
+    if isinstance(obj, LineTable):
+        return obj.to_dicts()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
 
 class PNIDEdgeExtractor:
     """Extract edges, lines, and contours from P&ID diagrams using OpenCV."""
@@ -94,15 +249,21 @@ class PNIDEdgeExtractor:
         edges = cv2.Canny(gray, self.canny_low, self.canny_high)
         return edges
 
-    def detect_lines_hough(self, edges: np.ndarray) -> list[dict[str, Any]]:
+    def detect_lines_hough(
+        self, edges: np.ndarray, columnar: bool = False
+    ) -> list[dict[str, Any]] | LineTable:
         """
         Detect straight lines using Hough Line Transform.
 
+        Line properties (length, angle, orientation) are computed for all lines at once.
+
         Args:
             edges: Binary edge map from Canny.
+            columnar: Return a LineTable instead of materializing line dictionaries.
 
         Returns:
-            List of line dictionaries with start/end points and properties.
+            List of line dictionaries with start/end points and properties, or the
+            equivalent LineTable when ``columnar`` is set.
         """
         lines = cv2.HoughLinesP(
             edges,
@@ -113,52 +274,22 @@ class PNIDEdgeExtractor:
             maxLineGap=self.hough_max_line_gap,
         )
 
-        if lines is None:
-            return []
-
-        line_list: list[dict[str, Any]] = []
-        for line in lines:
-            x1, y1, x2, y2 = line[0]
-
-            # Calculate line properties
-            length = np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
-            angle = np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi
-
-            # Classify orientation
-            orientation = "horizontal"
-            if abs(angle) > 60 and abs(angle) < 120:
-                orientation = "vertical"
-            elif abs(angle) > 30 and abs(angle) < 60:
-                orientation = "diagonal"
-            elif abs(angle) > 120 and abs(angle) < 150:
-                orientation = "diagonal"
-
-            line_list.append(
-                {
-                    "start": [int(x1), int(y1)],
-                    "end": [int(x2), int(y2)],
-                    "center": [int((x1 + x2) / 2), int((y1 + y2) / 2)],
-                    "length": float(length),
-                    "angle": float(angle),
-                    "orientation": orientation,
-                }
-            )
-
-        return line_list
+        table = LineTable.from_hough(lines)
+        return table if columnar else table.to_dicts()
 
-    def detect_contours(self, edges: np.ndarray) -> list[dict[str, Any]]:
+    def detect_contours(self, edges: np.ndarray, close_gaps: bool = True) -> list[dict[str, Any]]:
         """
         Detect contours (closed shapes) for vessels and equipment.
 
         Args:
             edges: Binary edge map.
+            close_gaps: Apply morphological closing first. Disable when ``edges`` has
+                already been closed (e.g. a mask stitched from tiles).
 
         Returns:
             List of contour dictionaries with bounding boxes and properties.
         """
-        # Apply morphological closing to close gaps in contours
-        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
-        closed = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel, iterations=2)
+        closed = close_edge_gaps(edges) if close_gaps else edges
 
         contours, _ = cv2.findContours(closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
@@ -213,61 +344,59 @@ class PNIDEdgeExtractor:
         return contour_list
 
     def detect_junctions(
-        self, lines: list[dict[str, Any]], connection_threshold: float = 10.0
+        self,
+        lines: list[dict[str, Any]] | LineTable,
+        connection_threshold: float = 10.0,
+        method: Literal["grid", "scan"] = "grid",
     ) -> dict[tuple[int, int], list[int]]:
         """
         Detect junction points where 3+ line segments meet.
 
+        Endpoints are clustered greedily in line order: each endpoint joins the first
+        junction (in creation order) within ``connection_threshold``, otherwise it starts
+        a new one. The "grid" method buckets junction points into square cells of side
+        ``connection_threshold`` so only the 3×3 neighbouring cells are searched, giving
+        near-linear time. The "scan" method compares against every junction found so far
+        and is kept as the reference implementation; both return identical results.
+
         Args:
-            lines: List of line segments.
+            lines: Line segments (dictionaries or LineTable).
             connection_threshold: Maximum distance to consider points as same junction.
+            method: Endpoint clustering strategy ("grid" or "scan").
 
         Returns:
             Dictionary mapping junction points to list of connected line indices.
         """
-        # Collect all endpoints
-        endpoints: dict[tuple[int, int], list[int]] = {}
-
-        for idx, line in enumerate(lines):
-            for point in [line["start"], line["end"]]:
-                key = (int(point[0]), int(point[1]))
-
-                # Check if this point is near an existing junction
-                found_junction = None
-                for junction_point in endpoints.keys():
-                    dist = np.sqrt(
-                        (key[0] - junction_point[0]) ** 2 + (key[1] - junction_point[1]) ** 2
-                    )
-                    if dist <= connection_threshold:
-                        found_junction = junction_point
-                        break
-
-                if found_junction:
-                    if idx not in endpoints[found_junction]:
-                        endpoints[found_junction].append(idx)
-                else:
-                    if key not in endpoints:
-                        endpoints[key] = []
-                    if idx not in endpoints[key]:
-                        endpoints[key].append(idx)
+        if method == "grid":
+            endpoints = _cluster_endpoints_grid(lines, connection_threshold)
+        elif method == "scan":
+            endpoints = _cluster_endpoints_scan(lines, connection_threshold)
+        else:
+            raise ValueError(f"Unknown junction detection method: {method}")
 
         # Filter to only junctions (3+ connections)
         junctions = {pt: lines for pt, lines in endpoints.items() if len(lines) >= 3}
         return junctions
 
     def trace_pipe_routes(
-        self, lines: list[dict[str, Any]], connection_threshold: float = 10.0
+        self,
+        lines: list[dict[str, Any]] | LineTable,
+        connection_threshold: float = 10.0,
+        method: Literal["grid", "scan"] = "grid",
     ) -> list[dict[str, Any]]:
         """
         Connect line segments into continuous pipe routes, respecting junctions.
 
         Args:
-            lines: List of line segments from detect_lines_hough.
+            lines: Line segments from detect_lines_hough (dictionaries or LineTable).
             connection_threshold: Maximum distance to consider segments connected (pixels).
+            method: Segment adjacency strategy. "grid" only compares endpoints that share
+                a neighbouring grid cell; "scan" compares all segment pairs. Both (and the
+                matching junction detection) produce identical routes.
 
         Returns:
             List of pipe routes, each containing:
-            - segments: List of connected line segments
+            - segments: Connected line segments (a LineTable if ``lines`` is one)
             - total_length: Total length of the route
             - endpoints: [start_point, end_point] of the complete route
             - orientation: Dominant orientation
@@ -276,53 +405,16 @@ class PNIDEdgeExtractor:
             return []
 
         # Detect junctions first
-        junctions = self.detect_junctions(lines, connection_threshold)
-        junction_line_indices = set()
-        for line_list in junctions.values():
-            junction_line_indices.update(line_list)
+        junctions = self.detect_junctions(lines, connection_threshold, method=method)
 
         # Build adjacency graph, treating junctions specially
         n = len(lines)
-        graph: dict[int, list[int]] = {i: [] for i in range(n)}
-
-        for i in range(n):
-            for j in range(i + 1, n):
-                line_i = lines[i]
-                line_j = lines[j]
-
-                # Get endpoints
-                i_start = np.array(line_i["start"])
-                i_end = np.array(line_i["end"])
-                j_start = np.array(line_j["start"])
-                j_end = np.array(line_j["end"])
-
-                # Check all endpoint combinations
-                connections = [
-                    (i_start, j_start),
-                    (i_start, j_end),
-                    (i_end, j_start),
-                    (i_end, j_end),
-                ]
-
-                for p1, p2 in connections:
-                    dist = np.linalg.norm(p1 - p2)
-                    if dist <= connection_threshold:
-                        # Check if this connection is at a junction
-                        at_junction = False
-                        for junction_pt, junction_lines in junctions.items():
-                            if i in junction_lines and j in junction_lines:
-                                # Both lines meet at this junction - only connect if same direction
-                                angle_diff = abs(line_i["angle"] - line_j["angle"])
-                                if angle_diff < 30 or angle_diff > 150:  # Similar direction
-                                    at_junction = False  # Allow connection
-                                else:
-                                    at_junction = True  # Different directions, don't connect
-                                break
-
-                        if not at_junction:
-                            graph[i].append(j)
-                            graph[j].append(i)
-                        break
+        if method == "grid":
+            graph = _segment_adjacency_grid(lines, junctions, connection_threshold)
+        elif method == "scan":
+            graph = _segment_adjacency_scan(lines, junctions, connection_threshold)
+        else:
+            raise ValueError(f"Unknown route tracing method: {method}")
 
         # Trace routes using DFS
         visited = set()
@@ -356,25 +448,30 @@ class PNIDEdgeExtractor:
 
                 if route_indices:
                     # Build route information
-                    route_segments = [lines[idx] for idx in route_indices]
-                    total_length = sum(seg["length"] for seg in route_segments)
-
-                    # Collect all unique points
-                    points = []
-                    for seg in route_segments:
-                        points.append(seg["start"])
-                        points.append(seg["end"])
+                    if isinstance(lines, LineTable):
+                        route_segments = lines.take(route_indices)
+                        lengths = route_segments.length.tolist()
+                        starts = route_segments.start.tolist()
+                        ends = route_segments.end.tolist()
+                        orientations = route_segments.orientation.tolist()
+                    else:
+                        route_segments = [lines[idx] for idx in route_indices]
+                        lengths = [seg["length"] for seg in route_segments]
+                        starts = [seg["start"] for seg in route_segments]
+                        ends = [seg["end"] for seg in route_segments]
+                        orientations = [seg["orientation"] for seg in route_segments]
+                    total_length = sum(lengths)
 
                     # Find endpoints (points that appear only once)
                     point_counts: dict[tuple[int, int], int] = {}
-                    for pt in points:
-                        key = tuple(pt)
-                        point_counts[key] = point_counts.get(key, 0) + 1
+                    for start, end in zip(starts, ends):
+                        for pt in (start, end):
+                            key = tuple(pt)
+                            point_counts[key] = point_counts.get(key, 0) + 1
 
                     endpoints = [list(pt) for pt, count in point_counts.items() if count == 1]
 
                     # Determine dominant orientation
-                    orientations = [seg["orientation"] for seg in route_segments]
                     dominant = max(set(orientations), key=orientations.count)
 
                     routes.append(
@@ -392,60 +489,116 @@ class PNIDEdgeExtractor:
 
         return routes
 
-    def extract_features(self, image_path: Path) -> dict[str, Any]:
+    def extract_features(
+        self,
+        image_path: Path,
+        columnar: bool = False,
+        tile_size: int | None = None,
+        tile_overlap: int = 64,
+        max_workers: int | None = None,
+    ) -> dict[str, Any]:
         """
         Extract all edge features from a P&ID diagram.
 
         Args:
             image_path: Path to input image.
+            columnar: Keep lines (and route segments) as LineTables. Serialize the result
+                with ``json.dumps(..., default=to_json_default)``.
+            tile_size: Process the image in square tiles of this size (pixels) in a
+                process pool instead of as one image. Intended for large-format scans.
+            tile_overlap: Pixels of context added around each tile in tiled mode.
+            max_workers: Worker processes for tiled mode (default: CPU count; 1 runs
+                the tiles in-process).
 
         Returns:
             Dictionary containing:
-            - lines: List of detected straight lines (pipes)
+            - lines: Detected straight lines (pipes), as dictionaries or a LineTable
             - contours: List of detected shapes (vessels, equipment)
             - image_size: Original image dimensions [width, height]
             - statistics: Summary statistics
         """
-        # Load image
-        image = cv2.imread(str(image_path))
+        # Load image (grayscale decode in tiled mode avoids a 3-channel copy of large scans)
+        image = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE if tile_size else cv2.IMREAD_COLOR)
         if image is None:
             raise FileNotFoundError(f"Could not load image: {image_path}")
 
+        return self.extract_features_from_image(
+            image,
+            columnar=columnar,
+            tile_size=tile_size,
+            tile_overlap=tile_overlap,
+            max_workers=max_workers,
+        )
+
+    def extract_features_from_image(
+        self,
+        image: np.ndarray,
+        columnar: bool = False,
+        tile_size: int | None = None,
+        tile_overlap: int = 64,
+        max_workers: int | None = None,
+    ) -> dict[str, Any]:
+        """
+        Extract all edge features from an already decoded image.
+
+        Same as ``extract_features`` but takes a BGR or grayscale array, so callers that
+        already hold the decoded image (e.g. via ImageContext) do not decode it again.
+
+        Args:
+            image: Input image (BGR or grayscale).
+            columnar: See ``extract_features``.
+            tile_size: See ``extract_features``.
+            tile_overlap: See ``extract_features``.
+            max_workers: See ``extract_features``.
+
+        Returns:
+            Features dictionary, as returned by ``extract_features``.
+        """
         height, width = image.shape[:2]
 
-        # Preprocess
-        gray = self.preprocess_image(image)
+        if tile_size:
+            gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            lines, closed = self._detect_tiled(gray, tile_size, tile_overlap, max_workers)
+            del gray
+            contours = self.detect_contours(closed, close_gaps=False)
+            del closed
+        else:
+            # Preprocess
+            gray = self.preprocess_image(image)
 
-        # Detect edges
-        edges = self.detect_edges_canny(gray)
+            # Detect edges
+            edges = self.detect_edges_canny(gray)
 
-        # Detect lines (pipes)
-        lines = self.detect_lines_hough(edges)
+            # Detect lines (pipes)
+            lines = self.detect_lines_hough(edges, columnar=True)
 
-        # Detect contours (vessels, equipment)
-        contours = self.detect_contours(edges)
+            # Detect contours (vessels, equipment)
+            contours = self.detect_contours(edges)
 
         # Trace pipe routes (connect line segments)
         # Increased threshold to catch branching junctions (e.g., hot water tank to MAK/MAT)
         pipe_routes = self.trace_pipe_routes(lines, connection_threshold=25.0)
 
         # Calculate statistics
-        total_line_length = sum(line["length"] for line in lines)
-        horizontal_lines = [l for l in lines if l["orientation"] == "horizontal"]
-        vertical_lines = [l for l in lines if l["orientation"] == "vertical"]
-        diagonal_lines = [l for l in lines if l["orientation"] == "diagonal"]
+        # Sequential sum keeps totals bit-identical to summing the line dictionaries
+        total_line_length = float(sum(lines.length.tolist()))
 
         statistics = {
             "total_lines": len(lines),
-            "horizontal_lines": len(horizontal_lines),
-            "vertical_lines": len(vertical_lines),
-            "diagonal_lines": len(diagonal_lines),
-            "total_line_length": float(total_line_length),
-            "average_line_length": float(total_line_length / len(lines)) if lines else 0.0,
+            "horizontal_lines": int(lines.mask("horizontal").sum()),
+            "vertical_lines": int(lines.mask("vertical").sum()),
+            "diagonal_lines": int(lines.mask("diagonal").sum()),
+            "total_line_length": total_line_length,
+            "average_line_length": total_line_length / len(lines) if len(lines) else 0.0,
             "total_contours": len(contours),
             "total_contour_area": sum(c["area"] for c in contours),
         }
 
+        if not columnar:
+            lines = lines.to_dicts()
+            for route in pipe_routes:
+                route["segments"] = route["segments"].to_dicts()
+
         return {
             "image_size": [width, height],
             "lines": lines,
@@ -454,6 +607,81 @@ class PNIDEdgeExtractor:
             "statistics": statistics,
         }
 
+    def _detect_tiled(
+        self,
+        gray: np.ndarray,
+        tile_size: int,
+        tile_overlap: int,
+        max_workers: int | None,
+    ) -> tuple[LineTable, np.ndarray]:
+        """
+        Run preprocessing, Canny, Hough and gap closing per tile and stitch the results.
+
+        Each tile is processed with ``tile_overlap`` pixels of surrounding context. A
+        line is kept by the tile whose core (non-overlapping) region holds its midpoint,
+        which de-duplicates lines seen by several tiles; collinear pieces of lines cut
+        by tile borders are then merged back together. The closed edge maps of the tile
+        cores are assembled into one full-size mask so contours are found on the stitched
+        image rather than per tile.
+
+        Note that CLAHE equalizes contrast per tile, so results are equivalent to, not
+        bit-identical with, the single-image path.
+
+        Args:
+            gray: Grayscale input image.
+            tile_size: Tile edge length (pixels).
+            tile_overlap: Context margin around each tile (pixels).
+            max_workers: Worker processes (1 runs in-process).
+
+        Returns:
+            Tuple of (stitched lines, closed edge mask of the full image).
+        """
+        height, width = gray.shape[:2]
+        tiles = list(_tile_grid(width, height, tile_size, tile_overlap))
+        closed = np.zeros((height, width), dtype=np.uint8)
+        kept: list[np.ndarray] = []
+
+        def tile_tasks() -> Iterator[tuple[PNIDEdgeExtractor, np.ndarray, tuple[int, ...]]]:
+            for (ex0, ey0, ex1, ey1), (cx0, cy0, cx1, cy1) in tiles:
+                core = (cx0 - ex0, cy0 - ey0, cx1 - ex0, cy1 - ey0)
+                yield self, gray[ey0:ey1, ex0:ex1], core
+
+        if max_workers == 1 or len(tiles) == 1:
+            results: Iterator[tuple[np.ndarray, np.ndarray]] = (
+                _detect_tile(*task) for task in tile_tasks()
+            )
+            pool = None
+        else:
+            workers = max_workers or os.cpu_count() or 1
+            pool = ProcessPoolExecutor(max_workers=workers)
+            # Submit through a bounded window so queued tile copies don't scale with tile count
+            results = _map_bounded(pool, _detect_tile, tile_tasks(), 2 * workers)
+
+        try:
+            for ((ex0, ey0, _, _), (cx0, cy0, cx1, cy1)), (segments, core_mask) in zip(
+                tiles, results, strict=True
+            ):
+                closed[cy0:cy1, cx0:cx1] = core_mask
+
+                # Tile-local -> image coordinates, keep lines whose midpoint is in the core
+                segments = segments + np.array([ex0, ey0, ex0, ey0], dtype=segments.dtype)
+                mid_x = (segments[:, 0] + segments[:, 2]) / 2
+                mid_y = (segments[:, 1] + segments[:, 3]) / 2
+                owned = (mid_x >= cx0) & (mid_x < cx1) & (mid_y >= cy0) & (mid_y < cy1)
+                kept.append(segments[owned])
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        segments = np.concatenate(kept) if kept else np.empty((0, 4), dtype=np.int32)
+
+        # Only lines reaching into a seam band can have been cut by a tile border
+        near_seam = _near_tile_seams(segments, width, height, tile_size, tile_overlap)
+        merged = _merge_collinear_segments(segments[near_seam], self.hough_max_line_gap)
+        segments = np.concatenate([segments[~near_seam], merged])
+
+        return LineTable.from_endpoints(segments[:, 0:2], segments[:, 2:4]), closed
+
     def create_visualization(
         self,
         image_path: Path,
@@ -502,15 +730,15 @@ class PNIDEdgeExtractor:
 
         # Draw lines on top (foreground)
         if show_lines:
-            for line in features["lines"]:
-                x1, y1 = line["start"]
-                x2, y2 = line["end"]
-
+            lines = LineTable.coerce(features["lines"])
+            for (x1, y1), (x2, y2), orientation in zip(
+                lines.start.tolist(), lines.end.tolist(), lines.orientation.tolist()
+            ):
                 # Color code by orientation
                 color = (0, 255, 0)  # Green for horizontal
-                if line["orientation"] == "vertical":
+                if orientation == "vertical":
                     color = (0, 0, 255)  # Red for vertical
-                elif line["orientation"] == "diagonal":
+                elif orientation == "diagonal":
                     color = (255, 255, 0)  # Cyan for diagonal
 
                 cv2.line(annotated, (x1, y1), (x2, y2), color, 2)
@@ -549,23 +777,500 @@ class PNIDEdgeExtractor:
         print(f"✅ Saved annotated visualization to: {output_path}")
 
 
+def close_edge_gaps(edges: np.ndarray) -> np.ndarray:
+    """Apply morphological closing to close small gaps in contours."""
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+    return cv2.morphologyEx(edges, cv2.MORPH_CLOSE, kernel, iterations=2)
+
+
+def _tile_grid(
+    width: int, height: int, tile_size: int, overlap: int
+) -> Iterator[tuple[tuple[int, int, int, int], tuple[int, int, int, int]]]:
+    """Yield (extended box, core box) pairs as (x0, y0, x1, y1) covering the image."""
+    for y0 in range(0, height, tile_size):
+        for x0 in range(0, width, tile_size):
+            x1 = min(x0 + tile_size, width)
+            y1 = min(y0 + tile_size, height)
+            extended = (
+                max(x0 - overlap, 0),
+                max(y0 - overlap, 0),
+                min(x1 + overlap, width),
+                min(y1 + overlap, height),
+            )
+            yield extended, (x0, y0, x1, y1)
+
+
+def _detect_tile(
+    extractor: PNIDEdgeExtractor, tile: np.ndarray, core: tuple[int, ...]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Process one tile (runs in a worker process).
+
+    Returns:
+        Tuple of (tile-local segments as an (N, 4) x1,y1,x2,y2 array, closed edge mask
+        cropped to the tile core).
+    """
+    gray = extractor.preprocess_image(tile)
+    edges = extractor.detect_edges_canny(gray)
+    lines = extractor.detect_lines_hough(edges, columnar=True)
+    cx0, cy0, cx1, cy1 = core
+    closed = close_edge_gaps(edges)[cy0:cy1, cx0:cx1]
+    return np.hstack([lines.start, lines.end]), np.ascontiguousarray(closed)
+
+
+def _map_bounded(
+    pool: ProcessPoolExecutor, func: Callable[..., Any], tasks: Iterable[tuple], window: int
+) -> Iterator[Any]:
+    """
+    Like ``pool.map(func, *zip(*tasks))``, but with at most ``window`` tasks submitted at once.
+
+    Results are yielded in task order; the next task is only pulled from ``tasks`` (and
+    its arguments pickled) once the oldest one has been consumed.
+    """
+    pending: deque[Future] = deque()
+    for args in tasks:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(pool.submit(func, *args))
+    while pending:
+        yield pending.popleft().result()
+
+
+def _near_tile_seams(
+    segments: np.ndarray, width: int, height: int, tile_size: int, overlap: int
+) -> np.ndarray:
+    """Boolean mask of segments whose bounding box comes within ``overlap`` of a tile seam."""
+    mask = np.zeros(len(segments), dtype=bool)
+    for lo, hi, extent in (
+        (
+            np.minimum(segments[:, 0], segments[:, 2]),
+            np.maximum(segments[:, 0], segments[:, 2]),
+            width,
+        ),
+        (
+            np.minimum(segments[:, 1], segments[:, 3]),
+            np.maximum(segments[:, 1], segments[:, 3]),
+            height,
+        ),
+    ):
+        last_seam = (extent - 1) // tile_size
+        first = np.maximum(np.ceil((lo - overlap) / tile_size), 1)
+        last = np.minimum(np.floor((hi + overlap) / tile_size), last_seam)
+        mask |= first <= last
+    return mask
+
+
+def _merge_collinear_segments(
+    segments: np.ndarray,
+    max_gap: float,
+    angle_tolerance: float = 2.0,
+    offset_tolerance: float = 1.0,
+) -> np.ndarray:
+    """
+    Merge collinear, overlapping or nearly touching segments into single segments.
+
+    Segments are bucketed by direction (mod 180°) and perpendicular offset so only
+    near-collinear candidates are compared; connected groups are replaced by the
+    segment between their two extreme endpoints along the group's direction.
+
+    Args:
+        segments: (N, 4) array of x1, y1, x2, y2.
+        max_gap: Largest gap along the line that is still bridged (pixels).
+        angle_tolerance: Maximum direction difference (degrees).
+        offset_tolerance: Maximum perpendicular distance between the lines (pixels).
+
+    Returns:
+        (M, 4) array of merged segments, M <= N.
+    """
+    n = len(segments)
+    if n < 2:
+        return segments
+
+    pts = segments.astype(np.float64)
+    dx = pts[:, 2] - pts[:, 0]
+    dy = pts[:, 3] - pts[:, 1]
+    theta = np.degrees(np.arctan2(dy, dx)) % 180.0
+    rad = np.radians(theta)
+    ux, uy = np.cos(rad), np.sin(rad)
+    # Signed perpendicular offset of each segment's supporting line from the origin
+    rho = pts[:, 1] * ux - pts[:, 0] * uy
+    theta_bins = max(int(round(180.0 / angle_tolerance)), 1)
+
+    buckets: dict[tuple[int, int], list[int]] = {}
+    theta_key = (theta // angle_tolerance).astype(int) % theta_bins
+    rho_key = (rho // offset_tolerance).astype(int)
+    for idx, key in enumerate(zip(theta_key.tolist(), rho_key.tolist())):
+        buckets.setdefault(key, []).append(idx)
+
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def collinear(i: int, j: int) -> bool:
+        angle_diff = abs(theta[i] - theta[j])
+        if min(angle_diff, 180.0 - angle_diff) > angle_tolerance:
+            return False
+        # Perpendicular distance of j's endpoints from i's supporting line
+        for x, y in ((pts[j, 0], pts[j, 1]), (pts[j, 2], pts[j, 3])):
+            if abs(y * ux[i] - x * uy[i] - rho[i]) > offset_tolerance:
+                return False
+        # Gap between the two segments measured along i's direction
+        proj_i = sorted(
+            (pts[i, 0] * ux[i] + pts[i, 1] * uy[i], pts[i, 2] * ux[i] + pts[i, 3] * uy[i])
+        )
+        proj_j = sorted(
+            (pts[j, 0] * ux[i] + pts[j, 1] * uy[i], pts[j, 2] * ux[i] + pts[j, 3] * uy[i])
+        )
+        return max(proj_i[0], proj_j[0]) - min(proj_i[1], proj_j[1]) <= max_gap
+
+    for (tk, rk), members in buckets.items():
+        # Lines near 0°/180° have rho of opposite sign in the wrapped bucket
+        neighbour_keys = [
+            ((tk + dt) % theta_bins, rk + dr) for dt in (-1, 0, 1) for dr in (-1, 0, 1)
+        ]
+        neighbour_keys += [
+            ((tk + dt) % theta_bins, -rk - 1 + dr) for dt in (-1, 1) for dr in (-1, 0, 1)
+        ]
+        for key in neighbour_keys:
+            for j in buckets.get(key, ()):
+                for i in members:
+                    if i < j and find(i) != find(j) and collinear(i, j):
+                        parent[find(i)] = find(j)
+
+    groups: dict[int, list[int]] = {}
+    for idx in range(n):
+        groups.setdefault(find(idx), []).append(idx)
+
+    merged: list[np.ndarray] = []
+    for members in groups.values():
+        if len(members) == 1:
+            merged.append(segments[members[0]])
+            continue
+        # Project all endpoints onto the direction of the longest member
+        longest = max(members, key=lambda k: dx[k] ** 2 + dy[k] ** 2)
+        ends = segments[members].reshape(-1, 2)
+        proj = ends[:, 0] * ux[longest] + ends[:, 1] * uy[longest]
+        merged.append(np.concatenate([ends[np.argmin(proj)], ends[np.argmax(proj)]]))
+
+    return np.array(merged, dtype=segments.dtype).reshape(-1, 4)
+
+
+def _endpoint_lists(
+    lines: list[dict[str, Any]] | LineTable,
+) -> tuple[list[list[int]], list[list[int]]]:
+    """Return the start and end points of all segments as plain Python lists."""
+    if isinstance(lines, LineTable):
+        return lines.start.tolist(), lines.end.tolist()
+    return [line["start"] for line in lines], [line["end"] for line in lines]
+
+
+def _cluster_endpoints_scan(
+    lines: list[dict[str, Any]] | LineTable, connection_threshold: float
+) -> dict[tuple[int, int], list[int]]:
+    """Cluster line endpoints by comparing each one against every cluster found so far."""
+    endpoints: dict[tuple[int, int], list[int]] = {}
+
+    for idx, line in enumerate(lines):
+        for point in [line["start"], line["end"]]:
+            key = (int(point[0]), int(point[1]))
+
+            # Check if this point is near an existing junction
+            found_junction = None
+            for junction_point in endpoints.keys():
+                dist = np.sqrt(
+                    (key[0] - junction_point[0]) ** 2 + (key[1] - junction_point[1]) ** 2
+                )
+                if dist <= connection_threshold:
+                    found_junction = junction_point
+                    break
+
+            if found_junction:
+                if idx not in endpoints[found_junction]:
+                    endpoints[found_junction].append(idx)
+            else:
+                if key not in endpoints:
+                    endpoints[key] = []
+                if idx not in endpoints[key]:
+                    endpoints[key].append(idx)
+
+    return endpoints
+
+
+def _cluster_endpoints_grid(
+    lines: list[dict[str, Any]] | LineTable, connection_threshold: float
+) -> dict[tuple[int, int], list[int]]:
+    """
+    Cluster line endpoints using a uniform grid over the cluster points.
+
+    Produces the same clusters as ``_cluster_endpoints_scan``: among all cluster points
+    within the threshold, the one created first wins, which is the one the linear scan
+    would have hit first.
+    """
+    endpoints: dict[tuple[int, int], list[int]] = {}
+    # Creation order of each cluster point, used to break ties like the linear scan does
+    order: dict[tuple[int, int], int] = {}
+    cell_size = max(float(connection_threshold), 1.0)
+    grid: dict[tuple[int, int], list[tuple[int, int]]] = {}
+
+    starts, ends = _endpoint_lists(lines)
+    for idx, (start, end) in enumerate(zip(starts, ends)):
+        for point in (start, end):
+            key = (int(point[0]), int(point[1]))
+            cx = int(key[0] // cell_size)
+            cy = int(key[1] // cell_size)
+
+            found_junction = None
+            found_order = len(order)
+            for gx in (cx - 1, cx, cx + 1):
+                for gy in (cy - 1, cy, cy + 1):
+                    for junction_point in grid.get((gx, gy), ()):
+                        if order[junction_point] >= found_order:
+                            continue
+                        dx = key[0] - junction_point[0]
+                        dy = key[1] - junction_point[1]
+                        if math.sqrt(dx * dx + dy * dy) <= connection_threshold:
+                            found_junction = junction_point
+                            found_order = order[junction_point]
+
+            if found_junction is None:
+                found_junction = key
+                if key not in endpoints:
+                    endpoints[key] = []
+                    order[key] = len(order)
+                    grid.setdefault((cx, cy), []).append(key)
+
+            members = endpoints[found_junction]
+            # A line contributes at most two endpoints, so only the tail can hold idx
+            if idx not in members[-2:]:
+                members.append(idx)
+
+    return endpoints
+
+
+def _same_direction(angle_i: float, angle_j: float) -> bool:
+    """Whether two segments run in a similar direction (may continue through a junction)."""
+    angle_diff = abs(angle_i - angle_j)
+    return angle_diff < 30 or angle_diff > 150
+
+
+def _segment_adjacency_scan(
+    lines: list[dict[str, Any]] | LineTable,
+    junctions: dict[tuple[int, int], list[int]],
+    connection_threshold: float,
+) -> dict[int, list[int]]:
+    """Build the segment adjacency graph by comparing every pair of segments."""
+    n = len(lines)
+    graph: dict[int, list[int]] = {i: [] for i in range(n)}
+
+    for i in range(n):
+        for j in range(i + 1, n):
+            line_i = lines[i]
+            line_j = lines[j]
+
+            # Get endpoints
+            i_start = np.array(line_i["start"])
+            i_end = np.array(line_i["end"])
+            j_start = np.array(line_j["start"])
+            j_end = np.array(line_j["end"])
+
+            # Check all endpoint combinations
+            connections = [
+                (i_start, j_start),
+                (i_start, j_end),
+                (i_end, j_start),
+                (i_end, j_end),
+            ]
+
+            for p1, p2 in connections:
+                dist = np.linalg.norm(p1 - p2)
+                if dist <= connection_threshold:
+                    # Check if this connection is at a junction
+                    at_junction = False
+                    for junction_pt, junction_lines in junctions.items():
+                        if i in junction_lines and j in junction_lines:
+                            # Both lines meet at this junction - only connect if same direction
+                            at_junction = not _same_direction(line_i["angle"], line_j["angle"])
+                            break
+
+                    if not at_junction:
+                        graph[i].append(j)
+                        graph[j].append(i)
+                    break
+
+    return graph
+
+
+def _segment_adjacency_grid(
+    lines: list[dict[str, Any]] | LineTable,
+    junctions: dict[tuple[int, int], list[int]],
+    connection_threshold: float,
+) -> dict[int, list[int]]:
+    """
+    Build the segment adjacency graph from an endpoint grid index.
+
+    Endpoints are bucketed into square cells of side ``connection_threshold``, so only
+    endpoints in the 3×3 neighbouring cells are compared. A reverse map from line index
+    to the junctions it belongs to replaces the per-pair scan over all junctions.
+    Neighbour lists are sorted ascending, matching the pairwise scan's insertion order.
+    """
+    n = len(lines)
+    cell_size = max(float(connection_threshold), 1.0)
+
+    # Reverse map: line index -> ids of the junctions it takes part in
+    line_junctions: dict[int, set[int]] = {}
+    for junction_id, junction_lines in enumerate(junctions.values()):
+        for idx in junction_lines:
+            line_junctions.setdefault(idx, set()).add(junction_id)
+
+    starts, ends = _endpoint_lists(lines)
+    if isinstance(lines, LineTable):
+        angles = lines.angle.tolist()
+    else:
+        angles = [line["angle"] for line in lines]
+
+    grid: dict[tuple[int, int], list[tuple[int, float, float]]] = {}
+    for idx, (start, end) in enumerate(zip(starts, ends)):
+        for point in (start, end):
+            px, py = float(point[0]), float(point[1])
+            grid.setdefault((int(px // cell_size), int(py // cell_size)), []).append((idx, px, py))
+
+    neighbours: list[set[int]] = [set() for _ in range(n)]
+    for (cx, cy), members in grid.items():
+        for gx in (cx - 1, cx, cx + 1):
+            for gy in (cy - 1, cy, cy + 1):
+                others = grid.get((gx, gy))
+                if not others:
+                    continue
+                for i, xi, yi in members:
+                    for j, xj, yj in others:
+                        # Each unordered pair is handled from its lower index
+                        if j <= i or j in neighbours[i]:
+                            continue
+                        if math.sqrt((xi - xj) ** 2 + (yi - yj) ** 2) <= connection_threshold:
+                            neighbours[i].add(j)
+
+    graph: dict[int, list[int]] = {i: [] for i in range(n)}
+    for i in range(n):
+        for j in neighbours[i]:
+            shared = line_junctions.get(i)
+            if shared and not shared.isdisjoint(line_junctions.get(j, ())):
+                # Both lines meet at a junction - only connect if same direction
+                if not _same_direction(angles[i], angles[j]):
+                    continue
+            graph[i].append(j)
+            graph[j].append(i)
+
+    for adjacent in graph.values():
+        adjacent.sort()
+    return graph
+
+
+def scale_features(features: dict[str, Any], scale_x: float, scale_y: float) -> dict[str, Any]:
+    """
+    Map extracted edge features into the pixel space of a resized image.
+
+    Used when the image sent to an LLM is downscaled, so the coordinates in the prompt
+    match the image the model sees. Points and boxes are scaled per axis and rounded;
+    line and route lengths are recomputed from the scaled endpoints.
+
+    Args:
+        features: Extracted features dictionary (lines as dictionaries or a LineTable).
+        scale_x: New pixels per original pixel along x.
+        scale_y: New pixels per original pixel along y.
+
+    Returns:
+        Scaled copy of the features, with lines and route segments as LineTables.
+    """
+    factor = np.array([scale_x, scale_y])
+
+    def scale_lines(lines: LineTable | list[dict[str, Any]]) -> LineTable:
+        lines = LineTable.coerce(lines)
+        return LineTable.from_endpoints(np.rint(lines.start * factor), np.rint(lines.end * factor))
+
+    def scale_point(point: list[int]) -> list[int]:
+        return [round(point[0] * scale_x), round(point[1] * scale_y)]
+
+    lines = scale_lines(features["lines"])
+    pipe_routes = []
+    for route in features.get("pipe_routes", []):
+        segments = scale_lines(route["segments"])
+        pipe_routes.append(
+            {
+                **route,
+                "segments": segments,
+                "total_length": float(sum(segments.length.tolist())),
+                "endpoints": [scale_point(point) for point in route["endpoints"]],
+            }
+        )
+    contours = [
+        {
+            **contour,
+            "bbox": [
+                round(contour["bbox"][0] * scale_x),
+                round(contour["bbox"][1] * scale_y),
+                round(contour["bbox"][2] * scale_x),
+                round(contour["bbox"][3] * scale_y),
+            ],
+            "center": scale_point(contour["center"]),
+            "area": contour["area"] * scale_x * scale_y,
+            "perimeter": contour["perimeter"] * (scale_x + scale_y) / 2,
+        }
+        for contour in features["contours"]
+    ]
+
+    total_line_length = float(sum(lines.length.tolist()))
+    statistics = {
+        **features["statistics"],
+        "horizontal_lines": int(lines.mask("horizontal").sum()),
+        "vertical_lines": int(lines.mask("vertical").sum()),
+        "diagonal_lines": int(lines.mask("diagonal").sum()),
+        "total_line_length": total_line_length,
+        "average_line_length": total_line_length / len(lines) if len(lines) else 0.0,
+        "total_contour_area": sum(c["area"] for c in contours),
+    }
+    width, height = features["image_size"]
+
+    return {
+        **features,
+        "image_size": [round(width * scale_x), round(height * scale_y)],
+        "lines": lines,
+        "pipe_routes": pipe_routes,
+        "contours": contours,
+        "statistics": statistics,
+    }
+
+
+def _format_line_samples(lines: LineTable) -> list[str]:
+    """Format sample line segments as prompt bullet points."""
+    return [
+        f"  • [{x1},{y1}] → [{x2},{y2}] (length: {length:.0f}px)"
+        for (x1, y1), (x2, y2), length in zip(
+            lines.start.tolist(), lines.end.tolist(), lines.length.tolist()
+        )
+    ]
+
+
 def format_features_for_llm(features: dict[str, Any]) -> str:
     """
     Format extracted edge features as text prompt for LLM.
 
     Args:
-        features: Extracted features dictionary.
+        features: Extracted features dictionary (lines as dictionaries or a LineTable).
 
     Returns:
         Formatted text description of structural features.
     """
-    lines = features["lines"]
+    lines = LineTable.coerce(features["lines"])
     contours = features["contours"]
     stats = features["statistics"]
 
     # Group lines by orientation
-    horizontal = [l for l in lines if l["orientation"] == "horizontal"]
-    vertical = [l for l in lines if l["orientation"] == "vertical"]
+    horizontal = lines.take(lines.mask("horizontal"))
+    vertical = lines.take(lines.mask("vertical"))
 
     # Group contours by shape type
     shapes_by_type: dict[str, list[dict[str, Any]]] = {}
@@ -642,11 +1347,7 @@ def format_features_for_llm(features: dict[str, Any]) -> str:
     # Sample horizontal lines
     if horizontal:
         text_parts.append("Sample Horizontal Lines:")
-        for line in horizontal[:5]:
-            text_parts.append(
-                f"  • [{line['start'][0]},{line['start'][1]}] → [{line['end'][0]},{line['end'][1]}] "
-                f"(length: {line['length']:.0f}px)"
-            )
+        text_parts.extend(_format_line_samples(horizontal[:5]))
         if len(horizontal) > 5:
             text_parts.append(f"  ... and {len(horizontal) - 5} more")
         text_parts.append("")
@@ -654,11 +1355,7 @@ def format_features_for_llm(features: dict[str, Any]) -> str:
     # Sample vertical lines
     if vertical:
         text_parts.append("Sample Vertical Lines:")
-        for line in vertical[:5]:
-            text_parts.append(
-                f"  • [{line['start'][0]},{line['start'][1]}] → [{line['end'][0]},{line['end'][1]}] "
-                f"(length: {line['length']:.0f}px)"
-            )
+        text_parts.extend(_format_line_samples(vertical[:5]))
         if len(vertical) > 5:
             text_parts.append(f"  ... and {len(vertical) - 5} more")
         text_parts.append("")
@@ -717,11 +1414,13 @@ def main() -> None:
     )
 
     # Extract features
-    features = extractor.extract_features(image_path)
+    features = extractor.extract_features(image_path, columnar=True)
 
     # Save JSON output
     output_json.parent.mkdir(parents=True, exist_ok=True)
-    output_json.write_text(json.dumps(features, indent=2, ensure_ascii=False))
+    output_json.write_text(
+        json.dumps(features, indent=2, ensure_ascii=False, default=to_json_default)
+    )
     print(f"✅ Saved edge data to: {output_json}")
     print(f"   Lines: {features['statistics']['total_lines']}")
     print(f"   Contours: {features['statistics']['total_contours']}")
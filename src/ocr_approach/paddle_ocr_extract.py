@@ -28,7 +28,7 @@ import json
 from pathlib import Path
 from typing import Any
 
-from paddleocr import PaddleOCR  # type: ignore[import]
+from ocr_readers import get_reader
 
 
 def run_paddle_ocr(
@@ -50,7 +50,9 @@ def run_paddle_ocr(
         - confidence: recognition confidence
         - bbox: list of 4 [x,y] points (quadrilateral in pixel coordinates)
     """
-    ocr = PaddleOCR(use_textline_orientation=True, lang=lang)
+    # Model weights are loaded once per process and reused across calls (constructor
+    # options come from ocr_readers.READER_OPTIONS, shared with the batch workers)
+    ocr = get_reader("paddle", [lang])
     result = ocr.predict(str(image_path))
 
     items: list[dict[str, Any]] = []
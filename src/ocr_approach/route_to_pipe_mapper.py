@@ -22,6 +22,8 @@ from pathlib import Path
 from typing import Any
 
 import numpy as np
+from opencv_edge_extraction import LineTable
+from spatial_index import PointIndex, SegmentIndex, point_segment_distance
 
 
 class RouteMapper:
@@ -35,6 +37,8 @@ class RouteMapper:
             proximity_threshold: Maximum distance (pixels) to associate text with route.
         """
         self.proximity_threshold = proximity_threshold
+        # Spatial index of the last component list queried, reused while it is the same list
+        self._component_index: tuple[list[dict[str, Any]], int, PointIndex] | None = None
 
     def distance_point_to_route(self, point: tuple[float, float], route: dict[str, Any]) -> float:
         """
@@ -42,37 +46,12 @@ class RouteMapper:
 
         Args:
             point: (x, y) coordinates.
-            route: Route dictionary with segments.
+            route: Route dictionary with segments (line dictionaries or a LineTable).
 
         Returns:
             Minimum distance to route in pixels.
         """
-        min_dist = float("inf")
-        px, py = point
-
-        for segment in route["segments"]:
-            x1, y1 = segment["start"]
-            x2, y2 = segment["end"]
-
-            # Distance to line segment
-            # Vector from start to end
-            dx = x2 - x1
-            dy = y2 - y1
-            length_sq = dx * dx + dy * dy
-
-            if length_sq == 0:
-                # Degenerate segment (point)
-                dist = np.sqrt((px - x1) ** 2 + (py - y1) ** 2)
-            else:
-                # Projection of point onto line
-                t = max(0, min(1, ((px - x1) * dx + (py - y1) * dy) / length_sq))
-                proj_x = x1 + t * dx
-                proj_y = y1 + t * dy
-                dist = np.sqrt((px - proj_x) ** 2 + (py - proj_y) ** 2)
-
-            min_dist = min(min_dist, dist)
-
-        return min_dist
+        return _distance_to_segments(point, LineTable.coerce(route["segments"]))
 
     def find_nearest_ocr_labels(
         self, route: dict[str, Any], ocr_items: list[dict[str, Any]], max_labels: int = 3
@@ -88,25 +67,62 @@ class RouteMapper:
         Returns:
             List of nearest OCR items sorted by distance.
         """
-        labels_with_distance = []
+        return self.find_ocr_labels_for_routes([route], ocr_items, max_labels)[0]
 
-        for item in ocr_items:
-            # Calculate OCR text center
-            bbox = item["bbox"]
-            center_x = sum(p[0] for p in bbox) / 4
-            center_y = sum(p[1] for p in bbox) / 4
+    def find_ocr_labels_for_routes(
+        self, routes: list[dict[str, Any]], ocr_items: list[dict[str, Any]], max_labels: int = 3
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Find OCR labels near each of several routes in one spatial query.
 
-            # Distance to route
-            dist = self.distance_point_to_route((center_x, center_y), route)
+        All route segments go into one SegmentIndex; OCR text centers within
+        proximity_threshold of a segment are matched to that segment's route, keeping the
+        closest segment per (route, label) pair.
 
-            if dist <= self.proximity_threshold:
-                labels_with_distance.append(
-                    {"item": item, "distance": dist, "center": (center_x, center_y)}
-                )
+        Args:
+            routes: List of route dictionaries.
+            ocr_items: List of OCR items with text and bbox.
+            max_labels: Maximum number of labels to return per route.
 
-        # Sort by distance and return top N
-        labels_with_distance.sort(key=lambda x: x["distance"])
-        return labels_with_distance[:max_labels]
+        Returns:
+            Per route, the nearest OCR items sorted by distance (ties in OCR item order),
+            as dicts with "item", "distance" and "center".
+        """
+        results: list[list[dict[str, Any]]] = [[] for _ in routes]
+        if not routes or not ocr_items:
+            return results
+
+        # OCR text centers
+        centers = [
+            (sum(p[0] for p in item["bbox"]) / 4, sum(p[1] for p in item["bbox"]) / 4)
+            for item in ocr_items
+        ]
+
+        tables = [LineTable.coerce(route["segments"]) for route in routes]
+        route_of_segment = np.repeat(np.arange(len(routes)), [len(t) for t in tables])
+        index = SegmentIndex(
+            np.concatenate([t.start for t in tables]),
+            np.concatenate([t.end for t in tables]),
+            radius=self.proximity_threshold,
+        )
+        item_idx, segment_idx, dist = index.pairs_within(centers, self.proximity_threshold)
+
+        # Closest segment per (route, item), then labels per route by (distance, item)
+        n_items = len(ocr_items)
+        pair = route_of_segment[segment_idx] * n_items + item_idx
+        order = np.lexsort((dist, pair))
+        pair, dist = pair[order], dist[order]
+        first = np.ones(len(pair), dtype=bool)
+        first[1:] = pair[1:] != pair[:-1]
+        pair, dist = pair[first], dist[first]
+        route_idx, item_idx = pair // n_items, pair % n_items
+        order = np.lexsort((item_idx, dist, route_idx))
+        route_idx, item_idx, dist = route_idx[order], item_idx[order], dist[order]
+
+        for r, i, d in zip(route_idx.tolist(), item_idx.tolist(), dist.tolist(), strict=True):
+            if len(results[r]) < max_labels:
+                results[r].append({"item": ocr_items[i], "distance": d, "center": centers[i]})
+        return results
 
     def find_nearest_component(
         self, point: tuple[float, float], components: list[dict[str, Any]]
@@ -121,21 +137,43 @@ class RouteMapper:
         Returns:
             Tuple of (component_id, distance) or (None, inf) if none found.
         """
-        min_dist = float("inf")
-        nearest_id = None
+        return self.find_nearest_components([point], components)[0]
+
+    def find_nearest_components(
+        self, points: list[tuple[float, float]], components: list[dict[str, Any]]
+    ) -> list[tuple[str | None, float]]:
+        """
+        Find the nearest component to each of several points in one batch query.
 
-        px, py = point
+        Args:
+            points: (x, y) coordinates.
+            components: List of component dictionaries with x, y coordinates.
 
-        for comp in components:
-            cx = comp.get("x", 0)
-            cy = comp.get("y", 0)
-            dist = np.sqrt((px - cx) ** 2 + (py - cy) ** 2)
+        Returns:
+            One (component_id, distance) tuple per point, (None, inf) if none found.
+        """
+        distances, indices = self.component_index(components).nearest(points)
+        return [
+            (
+                (components[k].get("id", components[k].get("label", "unknown")), dist)
+                if k >= 0
+                else (None, float("inf"))
+            )
+            for dist, k in zip(distances.tolist(), indices.tolist(), strict=True)
+        ]
 
-            if dist < min_dist:
-                min_dist = dist
-                nearest_id = comp.get("id", comp.get("label", "unknown"))
+    def component_index(self, components: list[dict[str, Any]]) -> PointIndex:
+        """
+        Spatial index over component positions, rebuilt only when a different list is passed.
 
-        return nearest_id, min_dist
+        Components are assumed not to move while the same list is being queried.
+        """
+        cached = self._component_index
+        if cached is None or cached[0] is not components or cached[1] != len(components):
+            positions = [(comp.get("x", 0), comp.get("y", 0)) for comp in components]
+            cached = (components, len(components), PointIndex(positions))
+            self._component_index = cached
+        return cached[2]
 
     def create_pipe_from_route(
         self,
@@ -143,6 +181,7 @@ class RouteMapper:
         route: dict[str, Any],
         ocr_items: list[dict[str, Any]],
         components: list[dict[str, Any]],
+        nearby_labels: list[dict[str, Any]] | None = None,
     ) -> dict[str, Any]:
         """
         Create a PNID pipe from a detected route.
@@ -152,12 +191,14 @@ class RouteMapper:
             route: Route dictionary.
             ocr_items: OCR text items for labeling.
             components: List of components for endpoint connections.
+            nearby_labels: Precomputed find_nearest_ocr_labels result for this route.
 
         Returns:
             Pipe dictionary with label, source, target, description, x, y.
         """
         # Find nearest OCR labels
-        nearby_labels = self.find_nearest_ocr_labels(route, ocr_items)
+        if nearby_labels is None:
+            nearby_labels = self.find_nearest_ocr_labels(route, ocr_items)
 
         # Build label and description from nearby text
         label_parts = []
@@ -199,8 +240,9 @@ class RouteMapper:
             end_point = tuple(endpoints[1])
 
             # Find nearest components to endpoints
-            source_id, source_dist = self.find_nearest_component(start_point, components)
-            target_id, target_dist = self.find_nearest_component(end_point, components)
+            (source_id, source_dist), (target_id, target_dist) = self.find_nearest_components(
+                [start_point, end_point], components
+            )
 
             # Use component if within reasonable distance (100px)
             if source_dist < 100 and source_id:
@@ -209,16 +251,10 @@ class RouteMapper:
                 target = target_id
 
         # Calculate midpoint for x,y position
-        if route["segments"]:
-            # Use midpoint of route (center of bounding box of all points)
-            all_x = []
-            all_y = []
-            for seg in route["segments"]:
-                all_x.extend([seg["start"][0], seg["end"][0]])
-                all_y.extend([seg["start"][1], seg["end"][1]])
-
-            x = sum(all_x) / len(all_x)
-            y = sum(all_y) / len(all_y)
+        segments = LineTable.coerce(route["segments"])
+        if len(segments):
+            # Use midpoint of route (mean of all segment endpoints)
+            x, y = np.concatenate([segments.start, segments.end]).mean(axis=0)
         else:
             x, y = 0.0, 0.0
 
@@ -252,14 +288,23 @@ class RouteMapper:
             List of pipe dictionaries.
         """
         pipes = []
+        labels_per_route = self.find_ocr_labels_for_routes(routes, ocr_items)
 
-        for idx, route in enumerate(routes):
-            pipe = self.create_pipe_from_route(idx, route, ocr_items, components)
+        for idx, (route, nearby_labels) in enumerate(zip(routes, labels_per_route, strict=True)):
+            pipe = self.create_pipe_from_route(idx, route, ocr_items, components, nearby_labels)
             pipes.append(pipe)
 
         return pipes
 
 
+def _distance_to_segments(point: tuple[float, float], segments: LineTable) -> float:
+    """Minimum distance from a point to a set of line segments (vectorized)."""
+    if not len(segments):
+        return float("inf")
+    p = np.broadcast_to(np.asarray(point, dtype=np.float64), segments.start.shape)
+    return float(point_segment_distance(p, segments.start, segments.end).min())
+
+
 def main() -> None:
     """
     CLI entry point: Generate pipes from routes.
@@ -23,22 +23,26 @@ Notes:
 
 from __future__ import annotations
 
+import argparse
 import json
 import math
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Tuple
 
 import cv2
 import networkx as nx
 import numpy as np
 from skimage.morphology import skeletonize
 from skimage.util import invert
+from spatial_index import PointIndex
 
 # Type aliases
 Point = Tuple[int, int]
 Component = Dict[str, Any]
 OCRItem = Dict[str, Any]
+PathFormat = Literal["points", "polyline", "none"]
 
 
 def load_image_gray(image_path: Path) -> np.ndarray:
@@ -79,10 +83,329 @@ def get_neighbor_coords(pt: Point) -> Iterable[Point]:
             yield (x + dx, y + dy)
 
 
-def build_skeleton_graph(skel: np.ndarray) -> Tuple[nx.Graph, Dict[Point, int]]:
+# 8-neighbour offsets (dx, dy) in the order get_neighbor_coords yields them
+NEIGHBOR_OFFSETS = [(dx, dy) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dx or dy]
+DIAGONAL_STEP = math.hypot(1, 1)
+
+
+def build_skeleton_graph(
+    skel: np.ndarray,
+    method: Literal["vectorized", "walk"] = "vectorized",
+    compact: bool = True,
+) -> Tuple[nx.Graph, Dict[Point, int]]:
     """
     Convert skeleton image to graph.
 
+    Nodes are skeleton pixels with degree != 2 (endpoints or junctions). Edges are paths
+    connecting nodes via sequences of degree==2 pixels. Each graph node has attribute 'pos' = (x,y).
+    Returns (graph, mapping_point_to_node_id).
+
+    Args:
+        skel: Skeleton image (non-zero = skeleton pixel).
+        method: "vectorized" (default) computes degrees with a 3x3 convolution, labels
+            degree-2 runs with connected components and orders them with NumPy; "walk" is
+            the reference pixel-by-pixel walk. Both return identical graphs (same node ids,
+            edge insertion order, lengths and pixel paths).
+        compact: Store all edge pixel paths in one shared (P, 2) int32 buffer
+            (``G.graph["pixel_buffer"]``); each edge's 'pixels' is then an (N, 2) view into it
+            and 'pixel_span' its (start, stop) row range. False keeps 'pixels' as a list of
+            (x, y) tuples.
+    """
+    if method == "walk":
+        G, point_to_node = _build_skeleton_graph_walk(skel)
+        if compact:
+            compact_edge_pixels(G)
+        return G, point_to_node
+
+    h, w = skel.shape
+    fg = (skel != 0).astype(np.uint8)
+    kernel = np.ones((3, 3), dtype=np.float32)
+    kernel[1, 1] = 0
+    degree_img = cv2.filter2D(fg, -1, kernel, borderType=cv2.BORDER_CONSTANT)
+    _, run_img = cv2.connectedComponents(
+        ((degree_img == 2) & (fg > 0)).astype(np.uint8), connectivity=8, ltype=cv2.CV_32S
+    )
+
+    # Skeleton pixels, indexed by their (row-major) position in a 1-px padded raster
+    wp = w + 2
+    ys, xs = np.nonzero(fg)
+    lin = (ys.astype(np.int64) + 1) * wp + xs + 1
+    n = len(lin)
+    degree = degree_img[ys, xs].astype(np.int8)
+    run_of = run_img[ys, xs]
+    del degree_img, run_img
+
+    G = nx.Graph()
+    point_to_node: Dict[Point, int] = {}
+    if n == 0:
+        if compact:
+            compact_edge_pixels(G)
+        return G, point_to_node
+
+    # neighbours[k, j] = skeleton index of the j-th 8-neighbour of pixel k (or -1)
+    neighbours = np.full((n, 8), -1, dtype=np.int64)
+    for j, (dx, dy) in enumerate(NEIGHBOR_OFFSETS):
+        target = lin + (dy * wp + dx)
+        pos = np.minimum(np.searchsorted(lin, target), n - 1)
+        neighbours[:, j] = np.where(lin[pos] == target, pos, -1)
+
+    # Nodes: degree != 2, numbered in sorted (x, y) order
+    is_node = degree != 2
+    node_k = np.flatnonzero(is_node)
+    node_k = node_k[np.lexsort((ys[node_k], xs[node_k]))]
+    node_id = np.full(n, -1, dtype=np.int64)
+    node_id[node_k] = np.arange(len(node_k))
+    for idx, (x, y) in enumerate(zip(xs[node_k].tolist(), ys[node_k].tolist())):
+        G.add_node(idx, pos=(x, y))
+        point_to_node[(x, y)] = idx
+
+    runs = _order_skeleton_runs(neighbours, is_node, run_of)
+
+    # Candidate walks in the reference order: nodes by id, neighbours in offset order
+    starts = np.repeat(node_k, 8)
+    firsts = neighbours[node_k].ravel()
+    valid = firsts >= 0
+    starts, firsts = starts[valid], firsts[valid]
+    exits = _walk_exits(starts, firsts, neighbours, is_node, run_of, runs)
+
+    # Per-edge work only from here on (dedupe exactly as the reference walk does)
+    max_steps = skel.size
+    edge_nodes: List[Tuple[int, int]] = []
+    edge_orders: List[np.ndarray] = []
+    for start, first, exit_k in zip(starts.tolist(), firsts.tolist(), exits.tolist()):
+        u = int(node_id[start])
+        if exit_k == start:
+            # Run that loops back into its own start node: follow the reference walk
+            other, path_k = _walk_through_start(
+                start, first, neighbours, is_node, node_id, max_steps
+            )
+            if other == -1 or other == u or G.has_edge(u, other):
+                continue
+        else:
+            other = int(node_id[exit_k])
+            if other == u or G.has_edge(u, other):
+                continue
+            path_k = [start]
+            if not is_node[first]:
+                path_k.append(_run_pixels(first, run_of, runs))
+            path_k.append(exit_k)
+        G.add_edge(u, other)
+        edge_nodes.append((u, other))
+        edge_orders.append(np.hstack(path_k))
+
+    # Gather every edge path into one coordinate buffer
+    if edge_orders:
+        order = np.concatenate(edge_orders)
+        buffer = np.stack([xs[order], ys[order]], axis=1).astype(np.int32)
+    else:
+        buffer = np.empty((0, 2), dtype=np.int32)
+    counts = [len(o) for o in edge_orders]
+    stops = np.cumsum(counts).tolist()
+    for (u, v), start, stop in zip(edge_nodes, [0] + stops[:-1], stops):
+        pts = buffer[start:stop]
+        data = G.edges[u, v]
+        data["length"] = _path_length(pts)
+        if compact:
+            data["pixels"] = pts
+            data["pixel_span"] = (start, stop)
+        else:
+            data["pixels"] = list(map(tuple, pts.tolist()))
+    if compact:
+        G.graph["pixel_buffer"] = buffer
+    return G, point_to_node
+
+
+def compact_edge_pixels(G: nx.Graph) -> np.ndarray:
+    """
+    Move the 'pixels' of every edge into one shared (P, 2) int32 buffer, in place.
+
+    Afterwards each edge's 'pixels' is an (N, 2) view into ``G.graph["pixel_buffer"]`` and
+    'pixel_span' is its (start, stop) row range. Edges without pixels get an empty span.
+    Returns the buffer.
+    """
+    edges = list(G.edges(data=True))
+    paths = [
+        np.asarray(data.get("pixels", ()), dtype=np.int32).reshape(-1, 2) for _, _, data in edges
+    ]
+    buffer = np.concatenate(paths) if paths else np.empty((0, 2), dtype=np.int32)
+    start = 0
+    for (_, _, data), path in zip(edges, paths):
+        stop = start + len(path)
+        data["pixels"] = buffer[start:stop]
+        data["pixel_span"] = (start, stop)
+        start = stop
+    G.graph["pixel_buffer"] = buffer
+    return buffer
+
+
+def _order_skeleton_runs(
+    neighbours: np.ndarray, is_node: np.ndarray, run_of: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Order the pixels of every degree-2 run from one end to the other.
+
+    Each run pixel has at most two run neighbours, so every run is a simple path (or a
+    cycle, which no walk can enter). Walking directions are modelled as half-edges
+    (pixel -> run neighbour); pointer jumping gives each half-edge the end pixel it leads to
+    and the number of steps, i.e. each pixel's rank from the run's head end.
+
+    Returns dict with "order" (skeleton indices sorted by run then rank), "offset"/"length"
+    per run label, "head"/"tail" end pixel per run label (-1 for cycles).
+    """
+    n = len(is_node)
+    chain = np.flatnonzero(~is_node)
+    m = len(chain)
+    if m == 0:
+        none = np.full(1, -1, dtype=np.int64)
+        return {"order": chain, "offset": none + 1, "length": none + 1, "head": none, "tail": none}
+    local = np.full(n, -1, dtype=np.int64)
+    local[chain] = np.arange(m)
+
+    # First two run neighbours of each chain pixel (as local indices), in offset order
+    nb = neighbours[chain]
+    nb_local = np.where(nb >= 0, local[np.maximum(nb, 0)], -1)
+    has = nb_local >= 0
+    count = has.sum(axis=1)
+    first_col = np.argmax(has, axis=1)
+    c0 = np.where(count >= 1, nb_local[np.arange(m), first_col], -1)
+    rest = has.copy()
+    rest[np.arange(m), first_col] = False
+    c1 = np.where(count >= 2, nb_local[np.arange(m), np.argmax(rest, axis=1)], -1)
+
+    run = run_of[chain]
+    n_runs = int(run.max()) + 1
+    length = np.bincount(run, minlength=n_runs)
+
+    # Run ends: pixels with fewer than two run neighbours; head = lowest-index end
+    is_end = count < 2
+    head = np.full(n_runs, m, dtype=np.int64)
+    np.minimum.at(head, run[is_end], np.flatnonzero(is_end))
+    tail = np.full(n_runs, -1, dtype=np.int64)
+    np.maximum.at(tail, run[is_end], np.flatnonzero(is_end))
+    open_run = head < m
+
+    # Half-edges h = 2*i + slot: pixel i -> its slot-th run neighbour
+    target = np.stack([c0, c1], axis=1).ravel()
+    source = np.repeat(np.arange(m), 2)
+    valid = (target >= 0) & open_run[run[source]]
+    t = np.maximum(target, 0)
+    back_is_c0 = c0[t] == source
+    other = np.where(back_is_c0, c1[t], c0[t])
+    succ = np.where(valid & (other >= 0), 2 * t + back_is_c0.astype(np.int64), -1)
+    steps = valid.astype(np.int64)
+    end = np.where(valid, target, -1)
+
+    # Pointer jumping: steps and end pixel for every half-edge
+    active = succ >= 0
+    while active.any():
+        nxt = succ[active]
+        steps_new = steps.copy()
+        end_new = end.copy()
+        succ_new = succ.copy()
+        steps_new[active] = steps[active] + steps[nxt]
+        end_new[active] = end[nxt]
+        succ_new[active] = succ[nxt]
+        steps, end, succ = steps_new, end_new, succ_new
+        active = succ >= 0
+
+    # Rank = distance from the head end (0 for the head itself)
+    run_head = head[run]
+    toward_head = np.where(end[0::2] == run_head, steps[0::2], steps[1::2])
+    rank = np.where(np.arange(m) == run_head, 0, toward_head)
+
+    order_local = np.lexsort((rank, run))
+    offset = np.zeros(n_runs, dtype=np.int64)
+    offset[1:] = np.cumsum(length)[:-1]
+    to_global = chain
+    return {
+        "order": to_global[order_local],
+        "offset": offset,
+        "length": length,
+        "head": np.where(open_run, to_global[np.minimum(head, m - 1)], -1),
+        "tail": np.where(open_run, to_global[np.maximum(tail, 0)], -1),
+    }
+
+
+def _walk_exits(
+    starts: np.ndarray,
+    firsts: np.ndarray,
+    neighbours: np.ndarray,
+    is_node: np.ndarray,
+    run_of: np.ndarray,
+    runs: Dict[str, np.ndarray],
+) -> np.ndarray:
+    """Node pixel reached by walking from each start node through its first neighbour."""
+    exits = firsts.copy()
+    through_run = ~is_node[firsts]
+    entry = firsts[through_run]
+    run = run_of[entry]
+    far = np.where(runs["head"][run] == entry, runs["tail"][run], runs["head"][run])
+
+    # Leave the far end through its first neighbour that is not the previous pixel: the
+    # previous run pixel, or the start node for single-pixel runs
+    prev = np.where(runs["length"][run] == 1, starts[through_run], -2)
+    far_nb = neighbours[far]
+    run_pixel = (far_nb >= 0) & ~is_node[np.maximum(far_nb, 0)]
+    candidate = (far_nb >= 0) & ~run_pixel & (far_nb != prev[:, None])
+    exits[through_run] = far_nb[np.arange(len(far)), np.argmax(candidate, axis=1)]
+    return exits
+
+
+def _run_pixels(entry: int, run_of: np.ndarray, runs: Dict[str, np.ndarray]) -> np.ndarray:
+    """Pixels of the run containing ``entry``, ordered starting from ``entry``."""
+    run = run_of[entry]
+    offset = runs["offset"][run]
+    pixels = runs["order"][offset : offset + runs["length"][run]]
+    return pixels if runs["head"][run] == entry else pixels[::-1]
+
+
+def _walk_through_start(
+    start: int,
+    first: int,
+    neighbours: np.ndarray,
+    is_node: np.ndarray,
+    node_id: np.ndarray,
+    max_steps: int,
+) -> Tuple[int, List[int]]:
+    """
+    Pixel-by-pixel walk (same rules as the reference) for runs that loop back to their start.
+
+    Returns (node id reached, path as skeleton indices) or (-1, []) if the walk never
+    reaches another node.
+    """
+    path = [start, first]
+    prev, curr = start, first
+    seen_at_start = set()
+    steps = 0
+    while steps < max_steps:
+        steps += 1
+        if is_node[curr] and curr != start:
+            return int(node_id[curr]), path
+        if curr == start:
+            # Same state as before: the walk cycles forever
+            if prev in seen_at_start:
+                return -1, []
+            seen_at_start.add(prev)
+        next_k = next((k for k in neighbours[curr].tolist() if k >= 0 and k != prev), None)
+        if next_k is None:
+            return -1, []
+        prev, curr = curr, next_k
+        path.append(curr)
+    return -1, []
+
+
+def _path_length(pts: np.ndarray) -> float:
+    """Sum of step lengths along an (N, 2) pixel path, accumulated in path order."""
+    if len(pts) < 2:
+        return 0.0
+    diagonal = np.all(pts[1:] != pts[:-1], axis=1)
+    return float(np.add.accumulate(np.where(diagonal, DIAGONAL_STEP, 1.0))[-1])
+
+
+def _build_skeleton_graph_walk(skel: np.ndarray) -> Tuple[nx.Graph, Dict[Point, int]]:
+    """
+    Reference implementation of build_skeleton_graph (pixel-by-pixel walk over a point set).
+
     Nodes are skeleton pixels with degree != 2 (endpoints or junctions). Edges are paths
     connecting nodes via sequences of degree==2 pixels. Each graph node has attribute 'pos' = (x,y).
     Returns (graph, mapping_point_to_node_id).
@@ -170,6 +493,96 @@ def build_skeleton_graph(skel: np.ndarray) -> Tuple[nx.Graph, Dict[Point, int]]:
     return G, point_to_node
 
 
+class PixelPath:
+    """
+    Pixel chain of a pipe, stored as row spans into a skeleton graph's shared pixel buffer.
+
+    Pipes that share skeleton edges reference the same buffer rows instead of each holding
+    a copy of the chain. Behaves as a read-only sequence of (x, y) tuples; use
+    ``to_array`` for bulk access and ``pipes_to_json`` to serialize.
+    """
+
+    __slots__ = ("buffer", "spans")
+
+    def __init__(self, buffer: np.ndarray, spans: np.ndarray):
+        """
+        Args:
+            buffer: (P, 2) int32 array of (x, y) pixels (``G.graph["pixel_buffer"]``).
+            spans: (K, 2) int64 array of (start, stop) row ranges, in path order.
+        """
+        self.buffer = buffer
+        self.spans = spans
+
+    def to_array(self) -> np.ndarray:
+        """The path as a new (N, 2) int32 array of (x, y) pixels."""
+        if not len(self.spans):
+            return np.empty((0, 2), dtype=np.int32)
+        return np.concatenate([self.buffer[start:stop] for start, stop in self.spans.tolist()])
+
+    def encode(self) -> str:
+        """The path as an encoded polyline string (see encode_polyline)."""
+        return encode_polyline(self.to_array())
+
+    def __len__(self) -> int:
+        return int((self.spans[:, 1] - self.spans[:, 0]).sum())
+
+    def __getitem__(self, index: int) -> Point:
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("PixelPath index out of range")
+        for start, stop in self.spans.tolist():
+            if index < stop - start:
+                x, y = self.buffer[start + index].tolist()
+                return (x, y)
+            index -= stop - start
+        raise IndexError("PixelPath index out of range")
+
+    def __iter__(self) -> Iterator[Point]:
+        return iter(map(tuple, self.to_array().tolist()))
+
+
+def encode_polyline(points: np.ndarray) -> str:
+    """
+    Encode an (N, 2) integer (x, y) path with the encoded-polyline algorithm (precision 1).
+
+    Coordinates are delta-encoded from (0, 0), zigzag-mapped and written as 5-bit groups of
+    printable ASCII, x before y for every point. A one-pixel skeleton step costs two
+    characters, compared with roughly a dozen for a JSON ``[x, y]`` pair.
+    """
+    pts = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+    if not len(pts):
+        return ""
+    deltas = np.diff(pts, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+    values = np.where(deltas < 0, ~(deltas << 1), deltas << 1)
+
+    # Up to seven 5-bit groups per value, least significant first; every group but the
+    # last of a value carries the 0x20 continuation bit
+    shifts = np.arange(0, 35, 5)
+    groups = (values[:, None] >> shifts) & 0x1F
+    n_groups = 1 + np.count_nonzero((values[:, None] >> shifts[1:]) > 0, axis=1)
+    group_idx = np.arange(len(shifts))
+    more = group_idx < (n_groups - 1)[:, None]
+    codes = (groups | np.where(more, 0x20, 0)) + 63
+    return codes[group_idx < n_groups[:, None]].astype(np.uint8).tobytes().decode("ascii")
+
+
+def decode_polyline(text: str) -> np.ndarray:
+    """Decode an encode_polyline string back to an (N, 2) int32 array of (x, y) pixels."""
+    codes = np.frombuffer(text.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    if not len(codes):
+        return np.empty((0, 2), dtype=np.int32)
+    last = (codes & 0x20) == 0
+    value_of = np.concatenate([[0], np.cumsum(last)[:-1]])
+    first = np.flatnonzero(np.concatenate([[True], last[:-1]]))
+    shift = 5 * (np.arange(len(codes)) - first[value_of])
+    values = np.zeros(int(last.sum()), dtype=np.int64)
+    np.add.at(values, value_of, (codes & 0x1F) << shift)
+    deltas = np.where(values & 1, ~(values >> 1), values >> 1)
+    return np.cumsum(deltas.reshape(-1, 2), axis=0).astype(np.int32)
+
+
 def snap_components_to_nodes(
     components: List[Component], G: nx.Graph, max_snap: float = 80.0
 ) -> Dict[str, int]:
@@ -178,105 +591,220 @@ def snap_components_to_nodes(
     Returns mapping: component_id -> node_id. If no node within max_snap, mapping is omitted.
     """
     mapping: Dict[str, int] = {}
-    node_positions = {n: tuple(G.nodes[n]["pos"]) for n in G.nodes}
-    node_items = list(node_positions.items())
-    for comp in components:
-        comp_id = comp.get("id") or comp.get("label")
-        if comp_id is None:
-            continue
-        cx = float(comp.get("x", 0.0))
-        cy = float(comp.get("y", 0.0))
-        best = None
-        best_dist = float("inf")
-        for nid, pos in node_items:
-            nxp, nyp = pos
-            d = math.hypot(nxp - cx, nyp - cy)
-            if d < best_dist:
-                best_dist = d
-                best = nid
-        if best is not None and best_dist <= max_snap:
-            mapping[comp_id] = best
+    snapped = [comp for comp in components if (comp.get("id") or comp.get("label")) is not None]
+    if not snapped:
+        return mapping
+    node_ids, index = node_index(G)
+    queries = [(float(comp.get("x", 0.0)), float(comp.get("y", 0.0))) for comp in snapped]
+    _, nearest = index.nearest(queries, max_distance=max_snap)
+    for comp, k in zip(snapped, nearest.tolist()):
+        if k >= 0:
+            mapping[comp.get("id") or comp.get("label")] = node_ids[k]
         # else: leave unmapped; the component may be off-skeleton (text label away from shape)
     return mapping
 
 
+def node_index(G: nx.Graph) -> Tuple[List[int], PointIndex]:
+    """
+    Spatial index over the graph's node positions, built once and kept in ``G.graph``.
+
+    Returns (node ids, index); index point k is node ``node_ids[k]``.
+    """
+    cached = G.graph.get("node_index")
+    if cached is None or len(cached[0]) != G.number_of_nodes():
+        node_ids = list(G.nodes)
+        positions = [G.nodes[n]["pos"] for n in node_ids]
+        cached = (node_ids, PointIndex(positions))
+        G.graph["node_index"] = cached
+    return cached
+
+
 def find_all_component_paths(
     G: nx.Graph,
     comp_map: Dict[str, int],
     max_path_length: float = 5000.0,
+    method: Literal["single_source", "pairwise"] = "single_source",
+    workers: int | None = None,
 ) -> List[Dict[str, Any]]:
     """
     For each unique pair of mapped components, compute shortest path on skeleton graph if exists
     and path length <= max_path_length. Create list of pipe dicts with geometry metadata.
+
+    Each pipe's 'path_pixels' is a PixelPath referencing the graph's shared pixel buffer
+    (the graph is compacted first if it was built with compact=False).
+
+    Args:
+        G: Skeleton graph from build_skeleton_graph.
+        comp_map: Component id -> graph node (from snap_components_to_nodes).
+        max_path_length: Longest path kept as a pipe (pixels).
+        method: "single_source" (default) runs one Dijkstra per distinct component node,
+            cut off at max_path_length, and reads every pair path from its predecessor
+            map; "pairwise" is the original per-pair nx.shortest_path search. Both keep
+            the same pipes; between equally short alternative routes they may pick a
+            different one.
+        workers: Number of processes for the single-source searches (None or 1 = serial).
     """
+    buffer = G.graph.get("pixel_buffer")
+    if buffer is None:
+        buffer = compact_edge_pixels(G)
     pipes: List[Dict[str, Any]] = []
     comp_items = list(comp_map.items())
-    # Avoid duplicates: only i<j
+
+    if method == "pairwise":
+        # Avoid duplicates: only i<j
+        for i in range(len(comp_items)):
+            id_i, node_i = comp_items[i]
+            for j in range(i + 1, len(comp_items)):
+                id_j, node_j = comp_items[j]
+                try:
+                    path_nodes = nx.shortest_path(G, source=node_i, target=node_j, weight="length")
+                except (nx.NetworkXNoPath, nx.NodeNotFound):
+                    continue
+                pipe = _pipe_from_path(G, buffer, id_i, id_j, path_nodes, max_path_length)
+                if pipe is not None:
+                    pipes.append(pipe)
+        return pipes
+
+    # One search per distinct source node, towards every later component's node
+    targets: Dict[int, set] = {}
+    for i, (_, node_i) in enumerate(comp_items):
+        if node_i in G:
+            targets.setdefault(node_i, set()).update(node for _, node in comp_items[i + 1 :])
+    sources = list(targets)
+    cutoffs = [max_path_length] * len(sources)
+    target_lists = [sorted(targets[node]) for node in sources]
+    if workers and workers > 1 and len(sources) > 1:
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_path_worker, initargs=(G,)
+        ) as pool:
+            chunksize = max(1, len(sources) // (workers * 4))
+            results = list(
+                pool.map(_paths_from_source, sources, target_lists, cutoffs, chunksize=chunksize)
+            )
+    else:
+        results = [
+            _paths_from_source(node, node_targets, cutoff, G)
+            for node, node_targets, cutoff in zip(sources, target_lists, cutoffs)
+        ]
+    paths_by_source = dict(zip(sources, results))
+
     for i in range(len(comp_items)):
         id_i, node_i = comp_items[i]
+        paths = paths_by_source.get(node_i)
+        if paths is None:
+            continue
         for j in range(i + 1, len(comp_items)):
             id_j, node_j = comp_items[j]
-            try:
-                path_nodes = nx.shortest_path(G, source=node_i, target=node_j, weight="length")
-                # compute total length
-                total_length = 0.0
-                path_pixels: List[Point] = []
-                for k in range(len(path_nodes) - 1):
-                    u = path_nodes[k]
-                    v = path_nodes[k + 1]
-                    edge_data = G.get_edge_data(u, v)
-                    total_length += float(edge_data.get("length", 0.0))
-                    # append pixel chain (exclude duplicated node pixels between segments)
-                    seg_pixels = edge_data.get("pixels", [])
-                    if seg_pixels:
-                        if path_pixels and path_pixels[-1] == seg_pixels[0]:
-                            path_pixels.extend(seg_pixels[1:])
-                        else:
-                            path_pixels.extend(seg_pixels)
-                if total_length <= max_path_length and total_length > 5.0:
-                    # midpoint for label placement
-                    mid_idx = len(path_pixels) // 2 if path_pixels else 0
-                    mx, my = path_pixels[mid_idx] if path_pixels else (0, 0)
-                    pipes.append(
-                        {
-                            "label": "",  # to be filled from OCR proximity or LLM
-                            "source": id_i,
-                            "target": id_j,
-                            "description": f"Geometric path via skeleton, length {total_length:.1f}px",
-                            "x": float(mx),
-                            "y": float(my),
-                            "path_length": float(total_length),
-                            "path_pixels": path_pixels,
-                        }
-                    )
-            except (nx.NetworkXNoPath, nx.NodeNotFound):
+            path_nodes = paths.get(node_j)
+            if path_nodes is None:
                 continue
+            pipe = _pipe_from_path(G, buffer, id_i, id_j, path_nodes, max_path_length)
+            if pipe is not None:
+                pipes.append(pipe)
     return pipes
 
 
+# Graph searched by process-pool workers (set once per worker by _init_path_worker)
+_worker_graph: nx.Graph | None = None
+
+
+def _init_path_worker(G: nx.Graph) -> None:
+    """Process-pool initializer: keep the skeleton graph for this worker's searches."""
+    global _worker_graph
+    _worker_graph = G
+
+
+def _paths_from_source(
+    source: int, targets: List[int], cutoff: float, G: nx.Graph | None = None
+) -> Dict[int, List[int]]:
+    """
+    Shortest paths from ``source`` to each reachable target within ``cutoff``.
+
+    Paths follow the first recorded predecessor of each node, i.e. the same paths
+    nx.single_source_dijkstra_path returns.
+    """
+    G = G if G is not None else _worker_graph
+    pred, dist = nx.dijkstra_predecessor_and_distance(G, source, cutoff=cutoff, weight="length")
+    paths: Dict[int, List[int]] = {}
+    for target in targets:
+        if target not in dist:
+            continue
+        path = [target]
+        while path[-1] != source:
+            path.append(pred[path[-1]][0])
+        path.reverse()
+        paths[target] = path
+    return paths
+
+
+def _pipe_from_path(
+    G: nx.Graph,
+    buffer: np.ndarray,
+    source_id: str,
+    target_id: str,
+    path_nodes: List[int],
+    max_path_length: float,
+) -> Dict[str, Any] | None:
+    """Pipe dict for a node path, or None if its length is outside (5, max_path_length]."""
+    # compute total length
+    total_length = 0.0
+    spans: List[Tuple[int, int]] = []
+    last_pixel = None
+    for k in range(len(path_nodes) - 1):
+        u = path_nodes[k]
+        v = path_nodes[k + 1]
+        edge_data = G.get_edge_data(u, v)
+        total_length += float(edge_data.get("length", 0.0))
+        # append pixel chain (exclude duplicated node pixels between segments)
+        start, stop = edge_data["pixel_span"]
+        if stop > start:
+            if last_pixel is not None and buffer[start].tolist() == last_pixel:
+                start += 1
+            if spans and spans[-1][1] == start:
+                spans[-1] = (spans[-1][0], stop)
+            elif stop > start:
+                spans.append((start, stop))
+            last_pixel = buffer[stop - 1].tolist()
+    if not (total_length <= max_path_length and total_length > 5.0):
+        return None
+    # midpoint for label placement
+    path_pixels = PixelPath(buffer, np.array(spans, dtype=np.int64).reshape(-1, 2))
+    mx, my = path_pixels[len(path_pixels) // 2] if path_pixels else (0, 0)
+    return {
+        "label": "",  # to be filled from OCR proximity or LLM
+        "source": source_id,
+        "target": target_id,
+        "description": f"Geometric path via skeleton, length {total_length:.1f}px",
+        "x": float(mx),
+        "y": float(my),
+        "path_length": float(total_length),
+        "path_pixels": path_pixels,
+    }
+
+
 def associate_labels_to_pipes(
     pipes: List[Dict[str, Any]], ocr_items: List[OCRItem], proximity: float = 40.0
 ) -> None:
     """
     For each pipe, look for OCR items near the pipe midpoint and attach probable label/description.
     Mutates pipes in place.
+
+    OCR bbox centers are computed once and indexed; all pipe midpoints are matched in one
+    radius query.
     """
-    for pipe in pipes:
-        px = pipe.get("x", 0.0)
-        py = pipe.get("y", 0.0)
-        candidates: List[Tuple[float, OCRItem]] = []
-        for item in ocr_items:
-            bbox = item.get("bbox")
-            if not bbox:
-                continue
-            cx = sum(p[0] for p in bbox) / 4.0
-            cy = sum(p[1] for p in bbox) / 4.0
-            d = math.hypot(cx - px, cy - py)
-            if d <= proximity:
-                candidates.append((d, item))
-        if candidates:
-            candidates.sort(key=lambda x: x[0])
-            top_texts = [c[1]["text"] for c in candidates[:2]]
+    labelled = [item for item in ocr_items if item.get("bbox")]
+    if not pipes or not labelled:
+        return
+    centers = [
+        (sum(p[0] for p in item["bbox"]) / 4.0, sum(p[1] for p in item["bbox"]) / 4.0)
+        for item in labelled
+    ]
+    midpoints = [(pipe.get("x", 0.0), pipe.get("y", 0.0)) for pipe in pipes]
+    # Matches per pipe, sorted by distance (ties in OCR order)
+    matches = PointIndex(centers).within(midpoints, proximity)
+    for pipe, nearby in zip(pipes, matches):
+        if len(nearby):
+            top_texts = [labelled[k]["text"] for k in nearby[:2].tolist()]
             pipe["label"] = " / ".join(top_texts)
             pipe["description"] = (
                 pipe.get("description", "") + " | OCR labels: " + ", ".join(top_texts)
@@ -291,10 +819,12 @@ def generate_pnid_from_skeleton(
     canny_high: int = 150,
     snap_threshold: float = 80.0,
     max_path_length: float = 6000.0,
+    workers: int | None = None,
 ) -> Dict[str, Any]:
     """
     High-level function that runs the full skeleton mapping pipeline.
     Returns PNID dict with components and deterministically discovered pipes.
+    ``workers`` > 1 runs the shortest-path searches in a process pool.
     """
     gray = load_image_gray(image_path)
     edge_bool = compute_edge_map(gray, canny_low=canny_low, canny_high=canny_high)
@@ -303,7 +833,7 @@ def generate_pnid_from_skeleton(
     G, point_to_node = build_skeleton_graph(skel)
     comp_map = snap_components_to_nodes(components, G, max_snap=snap_threshold)
 
-    pipes = find_all_component_paths(G, comp_map, max_path_length=max_path_length)
+    pipes = find_all_component_paths(G, comp_map, max_path_length=max_path_length, workers=workers)
     # associate OCR labels
     associate_labels_to_pipes(pipes, ocr_items, proximity=40.0)
 
@@ -315,6 +845,35 @@ def generate_pnid_from_skeleton(
     return pnid_out
 
 
+def pipes_to_json(
+    pipes: List[Dict[str, Any]], path_format: PathFormat = "points"
+) -> List[Dict[str, Any]]:
+    """
+    Copy pipes into JSON-serializable dicts, writing each PixelPath in the chosen format.
+
+    Args:
+        pipes: Pipes from find_all_component_paths.
+        path_format: "points" writes 'path_pixels' as [[x, y], ...]; "polyline" writes
+            'path_polyline', an encode_polyline string (decode with decode_polyline);
+            "none" omits the pixel path.
+    """
+    out: List[Dict[str, Any]] = []
+    for pipe in pipes:
+        pipe = dict(pipe)
+        path = pipe.pop("path_pixels", None)
+        if path is not None and path_format != "none":
+            if path_format == "polyline":
+                pipe["path_polyline"] = (
+                    path.encode() if isinstance(path, PixelPath) else encode_polyline(path)
+                )
+            else:
+                pipe["path_pixels"] = (
+                    path.to_array().tolist() if isinstance(path, PixelPath) else list(path)
+                )
+        out.append(pipe)
+    return out
+
+
 def format_prompt_for_llm(pnid: Dict[str, Any], top_n_routes: int = 10) -> str:
     """
     Create a concise prompt for an LLM that lists components and deterministic routes,
@@ -368,7 +927,24 @@ def main() -> None:
     Outputs:
       - data/output/pnid_skeleton_mapped.json
       - data/output/pnid_skeleton_prompt.txt
+
+    Use --path-format polyline to store pipe pixel paths as compact encoded polylines.
     """
+    parser = argparse.ArgumentParser(description="Skeleton-based P&ID pipe mapping")
+    parser.add_argument(
+        "--path-format",
+        choices=["points", "polyline", "none"],
+        default="points",
+        help="How pipe pixel paths are written to the JSON output (default: points)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes for the shortest-path searches (default: serial)",
+    )
+    args = parser.parse_args()
+
     base = Path(__file__).resolve().parent.parent
     image_path = base / "data" / "input" / "brewery.jpg"
     comps_path = base / "data" / "output" / "pnid_three_step.json"
@@ -397,11 +973,17 @@ def main() -> None:
         canny_high=150,
         snap_threshold=80.0,
         max_path_length=8000.0,
+        workers=args.workers,
     )
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
+    pnid_json = {
+        **pnid_out,
+        "pipes": pipes_to_json(pnid_out["pipes"], args.path_format),
+        "metadata": {**pnid_out["metadata"], "path_format": args.path_format},
+    }
     with out_path.open("w") as f:
-        json.dump(pnid_out, f, indent=2, ensure_ascii=False)
+        json.dump(pnid_json, f, indent=2, ensure_ascii=False)
 
     prompt_text = format_prompt_for_llm(pnid_out, top_n_routes=20)
     with prompt_path.open("w") as f:
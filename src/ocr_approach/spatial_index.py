@@ -0,0 +1,345 @@
+"""
+Spatial indexes for nearest-point, radius and point-to-segment queries.
+
+Purpose:
+- Replace per-query linear scans (snapping components to skeleton nodes, matching route
+  endpoints to components, finding OCR labels near route segments) with an index built
+  once per point or segment set.
+- Answer queries in batch: one call for all query points.
+
+PointIndex uses a SciPy KD-tree when SciPy is installed, otherwise a uniform grid of
+buckets. Both backends return the same results. Distances are Euclidean, and ties resolve
+to the lowest point index, i.e. the point a linear scan with a strict ``<`` would keep.
+SegmentIndex is a grid over segment bounding boxes.
+
+Usage:
+    index = PointIndex(node_xy)                       # (N, 2) array-like
+    dist, idx = index.nearest(query_xy, max_distance=80.0)  # idx == -1 where none in range
+    hits = index.within(query_xy, radius=40.0)        # list of index arrays, one per query
+
+    segments = SegmentIndex(start_xy, end_xy)
+    point_idx, segment_idx, dist = segments.pairs_within(query_xy, radius=50.0)
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Literal
+
+import numpy as np
+
+try:
+    from scipy.spatial import cKDTree
+except ImportError:  # grid fallback
+    cKDTree = None
+
+Backend = Literal["auto", "kdtree", "grid"]
+
+# Segments whose bounding box covers more grid cells than this are not gridded
+MAX_SEGMENT_CELLS = 64
+
+
+class PointIndex:
+    """Nearest-neighbour and radius queries over a fixed set of 2D points."""
+
+    def __init__(self, points: np.ndarray, backend: Backend = "auto", cell_size: float = 0.0):
+        """
+        Args:
+            points: (N, 2) array-like of (x, y) coordinates.
+            backend: "kdtree" (requires SciPy), "grid", or "auto" (KD-tree if available).
+            cell_size: Grid bucket size in pixels (0 = derived from point density).
+        """
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if backend == "auto":
+            backend = "kdtree" if cKDTree is not None else "grid"
+        if backend == "kdtree" and cKDTree is None:
+            raise ImportError("backend='kdtree' requires scipy")
+        self.backend = backend
+        self._tree = None
+        self._grid: _Grid | None = None
+        if len(self.points):
+            if backend == "kdtree":
+                self._tree = cKDTree(self.points)
+            else:
+                self._grid = _Grid(self.points, cell_size)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def nearest(
+        self, queries: np.ndarray, max_distance: float = math.inf
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Nearest point to each query.
+
+        Args:
+            queries: (Q, 2) array-like of (x, y) query points.
+            max_distance: Points farther than this are not matched.
+
+        Returns:
+            (distances, indices): float64 and int64 arrays of length Q; unmatched queries
+            have distance inf and index -1.
+        """
+        q = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        dist = np.full(len(q), math.inf)
+        idx = np.full(len(q), -1, dtype=np.int64)
+        if not len(self.points) or not len(q):
+            return dist, idx
+
+        if self._tree is not None:
+            approx, _ = self._tree.query(q)
+            # Re-check every point at (about) the nearest distance so ties and rounding
+            # resolve exactly as a linear scan would
+            candidates = self._tree.query_ball_point(q, approx * (1 + 1e-9) + 1e-9)
+        else:
+            candidates = [self._grid.nearest_candidates(point) for point in q]
+
+        for i, cand in enumerate(candidates):
+            if len(cand) == 0:
+                continue
+            cand = np.sort(np.asarray(cand, dtype=np.int64))
+            d = np.hypot(*(self.points[cand] - q[i]).T)
+            best = int(np.argmin(d))
+            dist[i], idx[i] = d[best], cand[best]
+
+        too_far = dist > max_distance
+        dist[too_far] = math.inf
+        idx[too_far] = -1
+        return dist, idx
+
+    def within(self, queries: np.ndarray, radius: float) -> list[np.ndarray]:
+        """
+        Points within ``radius`` (inclusive) of each query.
+
+        Args:
+            queries: (Q, 2) array-like of (x, y) query points.
+            radius: Search radius in pixels.
+
+        Returns:
+            One int64 array of point indices per query, sorted by (distance, index).
+        """
+        q = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        if not len(self.points):
+            return [np.empty(0, dtype=np.int64) for _ in range(len(q))]
+        if self._tree is not None:
+            # Slightly wider search, then filter with the exact distance below
+            candidates = self._tree.query_ball_point(q, radius * (1 + 1e-9) + 1e-9)
+        else:
+            candidates = [self._grid.box(point - radius, point + radius) for point in q]
+
+        results = []
+        for i, cand in enumerate(candidates):
+            cand = np.asarray(cand, dtype=np.int64)
+            d = np.hypot(*(self.points[cand] - q[i]).T) if len(cand) else np.empty(0)
+            keep = d <= radius
+            cand, d = cand[keep], d[keep]
+            results.append(cand[np.lexsort((cand, d))])
+        return results
+
+
+class _Grid:
+    """Uniform grid of point buckets (fallback when SciPy is not installed)."""
+
+    def __init__(self, points: np.ndarray, cell_size: float = 0.0):
+        self.points = points
+        self.origin = points.min(axis=0)
+        extent = points.max(axis=0) - self.origin
+        if cell_size <= 0:
+            # About one point per cell for uniformly spread points
+            cell_size = max(float(extent.max()) / max(math.sqrt(len(points)), 1.0), 1.0)
+        self.cell_size = cell_size
+        cells = self._cell(points)
+        self.shape = cells.max(axis=0) + 1
+
+        keys = cells[:, 1] * self.shape[0] + cells[:, 0]
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        unique, starts = np.unique(sorted_keys, return_index=True)
+        stops = np.append(starts[1:], len(order))
+        self.buckets = {
+            int(key): order[start:stop]
+            for key, start, stop in zip(
+                unique.tolist(), starts.tolist(), stops.tolist(), strict=True
+            )
+        }
+
+    def _cell(self, xy: np.ndarray) -> np.ndarray:
+        return np.floor((xy - self.origin) / self.cell_size).astype(np.int64)
+
+    def _cells(self, x0: int, y0: int, x1: int, y1: int) -> list[np.ndarray]:
+        """Buckets of the cells in [x0, x1] × [y0, y1], clipped to the grid."""
+        x0, y0 = max(x0, 0), max(y0, 0)
+        x1, y1 = min(x1, self.shape[0] - 1), min(y1, self.shape[1] - 1)
+        found = []
+        for cy in range(y0, y1 + 1):
+            for cx in range(x0, x1 + 1):
+                bucket = self.buckets.get(cy * int(self.shape[0]) + cx)
+                if bucket is not None:
+                    found.append(bucket)
+        return found
+
+    def box(self, low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        """Indices of points in the cells overlapping the box [low, high]."""
+        (x0, y0), (x1, y1) = self._cell(low), self._cell(high)
+        found = self._cells(int(x0), int(y0), int(x1), int(y1))
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def nearest_candidates(self, point: np.ndarray) -> np.ndarray:
+        """Indices of points that include every nearest point of ``point``."""
+        cx, cy = (int(v) for v in self._cell(point))
+        # Farthest ring that still touches the grid
+        max_ring = max(cx, cy, self.shape[0] - 1 - cx, self.shape[1] - 1 - cy, 0)
+        found: list[np.ndarray] = []
+        best = math.inf
+        for ring in range(int(max_ring) + 1):
+            if ring == 0:
+                ring_found = self._cells(cx, cy, cx, cy)
+            else:
+                ring_found = self._cells(cx - ring, cy - ring, cx + ring, cy - ring)
+                ring_found += self._cells(cx - ring, cy + ring, cx + ring, cy + ring)
+                ring_found += self._cells(cx - ring, cy - ring + 1, cx - ring, cy + ring - 1)
+                ring_found += self._cells(cx + ring, cy - ring + 1, cx + ring, cy + ring - 1)
+            for bucket in ring_found:
+                found.append(bucket)
+                best = min(best, float(np.hypot(*(self.points[bucket] - point).T).min()))
+            # Points outside rings 0..ring are at least ring * cell_size away
+            if best < ring * self.cell_size:
+                break
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+
+def point_segment_distance(points: np.ndarray, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """
+    Distance from each point to the segment in the same row (vectorized).
+
+    Args:
+        points: (P, 2) query points.
+        start: (P, 2) segment start points.
+        end: (P, 2) segment end points.
+
+    Returns:
+        (P,) float64 distances; degenerate segments (start == end) act as points.
+    """
+    p = np.asarray(points, dtype=np.float64)
+    start = np.asarray(start, dtype=np.float64)
+    delta = np.asarray(end) - start
+    length_sq = (delta**2).sum(axis=1)
+
+    # Projection of each point onto its segment, clamped to the segment
+    safe_length_sq = np.where(length_sq == 0, 1.0, length_sq)
+    t = np.clip(((p - start) * delta).sum(axis=1) / safe_length_sq, 0.0, 1.0)
+    proj = start + t[:, None] * delta
+    return np.hypot(*(p - proj).T)
+
+
+class SegmentIndex:
+    """
+    Uniform grid over line-segment bounding boxes for "segments near a point" queries.
+
+    Each segment is registered in every cell its bounding box overlaps; a query gathers the
+    segments in the cells overlapping the query box and keeps those whose exact distance
+    (point_segment_distance) is within the radius. All steps are array operations.
+
+    Segments covering more than MAX_SEGMENT_CELLS cells (e.g. a long diagonal among short
+    pipe pieces) would add one entry per cell of their bounding box, so they are kept in a
+    separate list and checked against every query point instead.
+    """
+
+    def __init__(
+        self, start: np.ndarray, end: np.ndarray, cell_size: float = 0.0, radius: float = 0.0
+    ):
+        """
+        Args:
+            start: (S, 2) array-like of segment start points.
+            end: (S, 2) array-like of segment end points.
+            cell_size: Grid cell size in pixels (0 = median segment bounding-box extent,
+                but at least ``radius``).
+            radius: Expected query radius, so a query box overlaps at most 3 × 3 cells.
+        """
+        self.start = np.asarray(start, dtype=np.float64).reshape(-1, 2)
+        self.end = np.asarray(end, dtype=np.float64).reshape(-1, 2)
+        low = np.minimum(self.start, self.end)
+        high = np.maximum(self.start, self.end)
+        if cell_size <= 0:
+            extent = (high - low).max(axis=1) if len(low) else np.ones(1)
+            cell_size = max(float(np.median(extent)), radius, 1.0)
+        self.cell_size = cell_size
+
+        c0 = np.floor(low / cell_size).astype(np.int64)
+        c1 = np.floor(high / cell_size).astype(np.int64)
+        span = c1 - c0 + 1
+        counts = span[:, 0] * span[:, 1]
+        long = counts > MAX_SEGMENT_CELLS
+        self._long = np.flatnonzero(long)
+        gridded = np.flatnonzero(~long)
+        c0, span, counts = c0[gridded], span[gridded], counts[gridded]
+
+        # (cell key, segment) entries for every cell of every bounding box, sorted by key
+        row = np.repeat(np.arange(len(counts)), counts)
+        segment = gridded[row]
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = c0[row, 0] + local % span[row, 0]
+        cy = c0[row, 1] + local // span[row, 0]
+        keys = _cell_keys(cx, cy)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._segments = segment[order]
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def pairs_within(
+        self, points: np.ndarray, radius: float
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        All (point, segment) pairs closer than ``radius`` (inclusive).
+
+        Args:
+            points: (P, 2) array-like of query points.
+            radius: Search radius in pixels.
+
+        Returns:
+            (point_indices, segment_indices, distances), sorted by point then segment.
+        """
+        p = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        empty = np.empty(0, dtype=np.int64)
+        if not len(p) or not len(self.start):
+            return empty, empty, np.empty(0)
+
+        # Cells overlapped by each query box [p - radius, p + radius]
+        c0 = np.floor((p - radius) / self.cell_size).astype(np.int64)
+        c1 = np.floor((p + radius) / self.cell_size).astype(np.int64)
+        span = c1 - c0 + 1
+        counts = span[:, 0] * span[:, 1]
+        query = np.repeat(np.arange(len(p)), counts)
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        keys = _cell_keys(
+            c0[query, 0] + local % span[query, 0], c0[query, 1] + local // span[query, 0]
+        )
+
+        # Join query cells with segment cells on the cell key
+        lo = np.searchsorted(self._keys, keys, side="left")
+        hi = np.searchsorted(self._keys, keys, side="right")
+        hits = hi - lo
+        pair_point = np.repeat(query, hits)
+        pos = np.repeat(lo - np.cumsum(hits) + hits, hits) + np.arange(hits.sum())
+        pair_segment = self._segments[pos]
+
+        # Ungridded long segments are candidates for every query
+        if len(self._long):
+            pair_point = np.concatenate([pair_point, np.repeat(np.arange(len(p)), len(self._long))])
+            pair_segment = np.concatenate([pair_segment, np.tile(self._long, len(p))])
+
+        # A pair can meet in several cells; keep each once
+        pair_key = np.unique(pair_point * len(self.start) + pair_segment)
+        pair_point, pair_segment = pair_key // len(self.start), pair_key % len(self.start)
+        dist = point_segment_distance(
+            p[pair_point], self.start[pair_segment], self.end[pair_segment]
+        )
+        keep = dist <= radius
+        return pair_point[keep], pair_segment[keep], dist[keep]
+
+
+def _cell_keys(cx: np.ndarray, cy: np.ndarray) -> np.ndarray:
+    """Single int64 key per (cx, cy) grid cell (cells may be negative)."""
+    return (cy + (1 << 30)) * (1 << 31) + (cx + (1 << 30))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Minimal DAG scheduler for pipeline stages.
+
+Purpose:
+- Let a pipeline declare its stages together with the stages they depend on.
+- Run every stage as soon as its dependencies have finished, independent stages
+  concurrently on a thread pool (OpenCV, EasyOCR/PyTorch and LLM HTTP calls all release
+  the GIL, so threads are enough).
+- Record the wall time of each stage and of the whole run.
+
+Usage:
+    scheduler = StageScheduler()
+    scheduler.add("ocr", lambda: run_easyocr(image))
+    scheduler.add("edges", lambda: extract_edges(image))
+    scheduler.add("llm", lambda ocr, edges: call_llm(ocr, edges), depends_on=["ocr", "edges"])
+    results = scheduler.run()
+    print(scheduler.format_timings())
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+
+@dataclass
+class Stage:
+    """A named unit of work and the stages whose results it consumes."""
+
+    name: str
+    func: Callable[..., Any]
+    depends_on: list[str] = field(default_factory=list)
+
+
+class StageScheduler:
+    """Run stages in dependency order, overlapping stages that do not depend on each other."""
+
+    def __init__(self, max_workers: int | None = None):
+        """
+        Initialize scheduler.
+
+        Args:
+            max_workers: Thread pool size (None = one thread per stage; 1 = run sequentially).
+        """
+        self.max_workers = max_workers
+        self.stages: dict[str, Stage] = {}
+        self.timings: dict[str, float] = {}
+        self.total_time = 0.0
+
+    def add(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        depends_on: list[str] | None = None,
+    ) -> None:
+        """
+        Register a stage.
+
+        ``func`` is called with the results of its dependencies as keyword arguments
+        named after those stages.
+
+        Args:
+            name: Unique stage name.
+            func: Callable producing the stage result.
+            depends_on: Names of stages that must finish first.
+        """
+        if name in self.stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        self.stages[name] = Stage(name=name, func=func, depends_on=list(depends_on or []))
+
+    def _check_graph(self) -> None:
+        """Reject unknown dependencies and cycles before anything runs."""
+        for stage in self.stages.values():
+            for dep in stage.depends_on:
+                if dep not in self.stages:
+                    raise ValueError(f"Stage '{stage.name}' depends on unknown stage '{dep}'")
+
+        state: dict[str, int] = {}  # 1 = visiting, 2 = done
+
+        def visit(name: str) -> None:
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Dependency cycle through stage '{name}'")
+            state[name] = 1
+            for dep in self.stages[name].depends_on:
+                visit(dep)
+            state[name] = 2
+
+        for name in self.stages:
+            visit(name)
+
+    def _timed(self, stage: Stage, kwargs: dict[str, Any]) -> tuple[Any, float]:
+        start = time.perf_counter()
+        result = stage.func(**kwargs)
+        return result, time.perf_counter() - start
+
+    def run(self) -> dict[str, Any]:
+        """
+        Execute all stages.
+
+        Returns:
+            Dictionary mapping stage name to its result. Per-stage wall times are
+            available in ``self.timings`` afterwards.
+
+        Raises:
+            Whatever the first failing stage raised; stages not yet started are skipped.
+        """
+        self._check_graph()
+        results: dict[str, Any] = {}
+        self.timings = {}
+        pending = dict(self.stages)
+        running: dict[Future, str] = {}
+        workers = self.max_workers or max(1, len(self.stages))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            while pending or running:
+                for name in [
+                    name
+                    for name, stage in pending.items()
+                    if all(dep in results for dep in stage.depends_on)
+                ]:
+                    stage = pending.pop(name)
+                    kwargs = {dep: results[dep] for dep in stage.depends_on}
+                    running[pool.submit(self._timed, stage, kwargs)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name], self.timings[name] = future.result()
+                    except BaseException:
+                        for other in running:
+                            other.cancel()
+                        raise
+        self.total_time = time.perf_counter() - start
+        return results
+
+    def format_timings(self) -> str:
+        """Per-stage wall times plus the sequential sum vs. the actual elapsed time."""
+        width = max([len(name) for name in self.timings] + [4])
+        lines = [f"   {name:<{width}}  {seconds:8.2f}s" for name, seconds in self.timings.items()]
+        lines.append(f"   {'sum':<{width}}  {sum(self.timings.values()):8.2f}s")
+        lines.append(f"   {'wall':<{width}}  {self.total_time:8.2f}s")
+        return "\n".join(lines)
@@ -31,8 +31,26 @@ from pydantic import BaseModel
 from pydantic_ai.messages import BinaryContent
 
 from easyocr_extract import run_easyocr
-from opencv_edge_extraction import PNIDEdgeExtractor, format_features_for_llm
-from pnid_agent import PNID, Component, Pipe, Provider, create_agent
+from image_context import ImageContext
+from opencv_edge_extraction import (
+    LineTable,
+    PNIDEdgeExtractor,
+    format_features_for_llm,
+    scale_features,
+    to_json_default,
+)
+from image_prep import ImagePrep
+from llm_cache import get_cache
+from pnid_agent import (
+    PNID,
+    Component,
+    Pipe,
+    Provider,
+    create_agent,
+    extraction_cache_key,
+    rescale_coordinates,
+)
+from stage_scheduler import StageScheduler
 
 
 class ThreeStepPipeline:
@@ -42,6 +60,8 @@ class ThreeStepPipeline:
         self,
         provider: str = "azure-anthropic",
         model: str = "claude-opus-4-5",
+        use_cache: bool = True,
+        image_prep: ImagePrep | None = None,
     ):
         """
         Initialize pipeline.
@@ -49,34 +69,39 @@ class ThreeStepPipeline:
         Args:
             provider: LLM provider ("google", "azure-anthropic", "azure-openai")
             model: Model name
+            use_cache: Reuse cached LLM results for identical image + prompt (see llm_cache)
+            image_prep: Optional downscale / re-encode of the image sent in step 3
         """
         self.provider = provider
         self.model = model
+        self.use_cache = use_cache
+        self.image_prep = image_prep
 
-    def step1_ocr(self, image_path: Path) -> list[dict[str, Any]]:
+    def step1_ocr(self, image: Path | ImageContext) -> list[dict[str, Any]]:
         """
         Step 1: Extract text and bounding boxes using EasyOCR.
 
         Args:
-            image_path: Path to input image.
+            image: Path to input image, or a shared ImageContext.
 
         Returns:
             List of OCR items with text, confidence, and bbox.
         """
         print("\n📝 Step 1: Running EasyOCR...")
-        items = run_easyocr(image_path, languages=["en"])
+        # Encoded bytes give the same result as passing the file path to EasyOCR
+        items = run_easyocr(ImageContext.coerce(image).data, languages=["en"])
         print(f"   Found {len(items)} text items")
         return items
 
-    def step2_edges(self, image_path: Path) -> dict[str, Any]:
+    def step2_edges(self, image: Path | ImageContext) -> dict[str, Any]:
         """
         Step 2: Extract edges, lines, and contours using OpenCV.
 
         Args:
-            image_path: Path to input image.
+            image: Path to input image, or a shared ImageContext.
 
         Returns:
-            Dictionary with lines, contours, and statistics.
+            Dictionary with lines (as a LineTable), contours, and statistics.
         """
         print("\n🔍 Step 2: Running OpenCV edge detection...")
         extractor = PNIDEdgeExtractor(
@@ -86,7 +111,9 @@ class ThreeStepPipeline:
             hough_min_line_length=20,
             hough_max_line_gap=15,
         )
-        features = extractor.extract_features(image_path)
+        features = extractor.extract_features_from_image(
+            ImageContext.coerce(image).bgr, columnar=True
+        )
         print(f"   Found {features['statistics']['total_lines']} lines")
         print(f"   Found {features['statistics']['total_contours']} contours")
         return features
@@ -184,7 +211,7 @@ class ThreeStepPipeline:
 
     def step3_llm(
         self,
-        image_path: Path,
+        image: Path | ImageContext,
         ocr_items: list[dict[str, Any]],
         edge_features: dict[str, Any],
     ) -> PNID:
@@ -192,46 +219,64 @@ class ThreeStepPipeline:
         Step 3: Send combined data to LLM for graph extraction.
 
         Args:
-            image_path: Path to original image.
+            image: Path to original image, or a shared ImageContext.
             ocr_items: OCR results.
             edge_features: Edge detection results.
 
         Returns:
-            Extracted PNID graph.
+            Extracted PNID graph, with coordinates in original image pixels.
         """
         print(f"\n🤖 Step 3: Running LLM extraction ({self.provider})...")
 
-        # Create combined prompt
-        prompt_text = self.format_combined_prompt(ocr_items, edge_features)
-
-        # Create agent
         # Convert string provider to enum
         if isinstance(self.provider, str):
             provider_enum = Provider(self.provider)
         else:
             provider_enum = self.provider
-        agent = create_agent(provider=provider_enum, model_name=self.model)
-
-        # Read image and create BinaryContent
-        with open(image_path, "rb") as f:
-            image_data = f.read()
-
-        # Determine media type from file extension
-        ext = image_path.suffix.lower()
-        media_type_map = {
-            ".png": "image/png",
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".gif": "image/gif",
-            ".webp": "image/webp",
-        }
-        media_type = media_type_map.get(ext, "image/jpeg")
-        binary_content = BinaryContent(data=image_data, media_type=media_type)
 
-        # Run agent with prompt text and image
-        result = agent.run_sync([prompt_text, binary_content])
+        # Reuse the encoded bytes read for the earlier steps
+        ctx = ImageContext.coerce(image)
+        binary_content = BinaryContent(data=ctx.data, media_type=ctx.media_type)
+        prepared = None
+        if self.image_prep is not None:
+            prepared = self.image_prep.apply(ctx.data, ctx.media_type)
+            binary_content = BinaryContent(data=prepared.data, media_type=prepared.media_type)
+            if prepared.resized:
+                # Give the model OCR/edge coordinates in the pixels of the image it sees
+                scale_x, scale_y = prepared.scale_x, prepared.scale_y
+                ocr_items = [
+                    {**item, "bbox": [list(prepared.to_sent(x, y)) for x, y in item["bbox"]]}
+                    for item in ocr_items
+                ]
+                edge_features = scale_features(edge_features, scale_x, scale_y)
+                print(
+                    f"   Sending {prepared.size[0]}x{prepared.size[1]} px image "
+                    f"(scale {scale_x:.3f} x {scale_y:.3f}, {len(prepared.data) // 1024} KiB)"
+                )
+
+        # Create combined prompt
+        prompt_text = self.format_combined_prompt(ocr_items, edge_features)
+
+        cache = get_cache(self.use_cache)
+        key = extraction_cache_key(provider_enum, self.model, [binary_content], [prompt_text])
+        cached = cache.get(key) if cache else None
+        if cached is not None:
+            print("   ♻️  Using cached LLM result")
+            pnid = PNID.model_validate(cached["output"])
+        else:
+            # Create agent and run it with prompt text and image
+            agent = create_agent(provider=provider_enum, model_name=self.model)
+            result = agent.run_sync([prompt_text, binary_content])
+            pnid = result.output
+            if cache:
+                cache.put(key, {"output": pnid.model_dump()})
+
+        if prepared is not None and prepared.resized:
+            # Answer coordinates are in the sent image's pixels; map them to the original's
+            pnid = PNID.model_validate(
+                rescale_coordinates(pnid.model_dump(), prepared.scale_x, prepared.scale_y)
+            )
 
-        pnid = result.output
         print(f"   Extracted {len(pnid.components)} components")
         print(f"   Extracted {len(pnid.pipes)} pipes")
 
@@ -239,7 +284,7 @@ class ThreeStepPipeline:
 
     def create_combined_visualization(
         self,
-        image_path: Path,
+        image: Path | ImageContext,
         ocr_items: list[dict[str, Any]],
         edge_features: dict[str, Any],
         output_path: Path,
@@ -248,24 +293,18 @@ class ThreeStepPipeline:
         Create visualization showing OCR + edges together.
 
         Args:
-            image_path: Path to original image.
+            image: Path to original image, or a shared ImageContext.
             ocr_items: OCR results.
             edge_features: Edge detection results.
             output_path: Path to save visualization.
         """
         print("\n🎨 Creating combined visualization...")
 
-        # Load image
-        image = cv2.imread(str(image_path))
-        if image is None:
-            raise FileNotFoundError(f"Could not load image: {image_path}")
-
-        annotated = image.copy()
+        annotated = ImageContext.coerce(image).bgr.copy()
 
         # Draw edges (lines in green, contours in blue)
-        for line in edge_features["lines"]:
-            x1, y1 = line["start"]
-            x2, y2 = line["end"]
+        lines = LineTable.coerce(edge_features["lines"])
+        for (x1, y1), (x2, y2) in zip(lines.start.tolist(), lines.end.tolist()):
             cv2.line(annotated, (x1, y1), (x2, y2), (0, 255, 0), 1)
 
         for contour in edge_features["contours"]:
@@ -306,43 +345,71 @@ class ThreeStepPipeline:
         cv2.imwrite(str(output_path), annotated)
         print(f"✅ Saved combined visualization to: {output_path}")
 
-    def run(self, image_path: Path, output_dir: Path) -> dict[str, Any]:
+    def run(
+        self, image_path: Path, output_dir: Path, max_workers: int | None = None
+    ) -> dict[str, Any]:
         """
         Run complete three-step pipeline.
 
+        OCR and edge detection are independent and run concurrently; the visualization
+        and the LLM call each wait for both and then overlap with each other.
+
         Args:
             image_path: Path to input P&ID image.
             output_dir: Directory for output files.
+            max_workers: Stage thread pool size (None = run independent stages
+                concurrently, 1 = run stages one after the other).
 
         Returns:
-            Dictionary with all results and output paths.
+            Dictionary with all results, output paths and per-stage wall times.
         """
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        # Step 1: OCR
-        ocr_items = self.step1_ocr(image_path)
-        ocr_output = output_dir / "three_step_ocr.json"
-        ocr_output.write_text(json.dumps(ocr_items, indent=2, ensure_ascii=False))
-        print(f"✅ Saved OCR results to: {ocr_output}")
+        # Read and decode the image once, before the stages share it across threads
+        image = ImageContext.from_path(image_path)
+        _ = image.bgr
 
-        # Step 2: Edge Detection
-        edge_features = self.step2_edges(image_path)
+        ocr_output = output_dir / "three_step_ocr.json"
         edge_output = output_dir / "three_step_edges.json"
-        edge_output.write_text(json.dumps(edge_features, indent=2, ensure_ascii=False))
-        print(f"✅ Saved edge features to: {edge_output}")
-
-        # Create combined visualization
         viz_output = output_dir / "three_step_combined_viz.jpg"
-        self.create_combined_visualization(image_path, ocr_items, edge_features, viz_output)
+        pnid_output = output_dir / "pnid_three_step.json"
 
-        # Step 3: LLM Extraction
-        pnid = self.step3_llm(image_path, ocr_items, edge_features)
+        def ocr_stage() -> list[dict[str, Any]]:
+            ocr_items = self.step1_ocr(image)
+            ocr_output.write_text(json.dumps(ocr_items, indent=2, ensure_ascii=False))
+            print(f"✅ Saved OCR results to: {ocr_output}")
+            return ocr_items
 
-        # Save final PNID
-        pnid_output = output_dir / "pnid_three_step.json"
-        pnid_dict = pnid.model_dump()
-        pnid_output.write_text(json.dumps(pnid_dict, indent=2, ensure_ascii=False))
-        print(f"✅ Saved PNID graph to: {pnid_output}")
+        def edges_stage() -> dict[str, Any]:
+            edge_features = self.step2_edges(image)
+            edge_output.write_text(
+                json.dumps(edge_features, indent=2, ensure_ascii=False, default=to_json_default)
+            )
+            print(f"✅ Saved edge features to: {edge_output}")
+            return edge_features
+
+        def viz_stage(ocr: list[dict[str, Any]], edges: dict[str, Any]) -> None:
+            self.create_combined_visualization(image, ocr, edges, viz_output)
+
+        def llm_stage(ocr: list[dict[str, Any]], edges: dict[str, Any]) -> PNID:
+            pnid = self.step3_llm(image, ocr, edges)
+            pnid_output.write_text(json.dumps(pnid.model_dump(), indent=2, ensure_ascii=False))
+            print(f"✅ Saved PNID graph to: {pnid_output}")
+            return pnid
+
+        scheduler = StageScheduler(max_workers=max_workers)
+        scheduler.add("ocr", ocr_stage)
+        scheduler.add("edges", edges_stage)
+        scheduler.add("visualization", viz_stage, depends_on=["ocr", "edges"])
+        scheduler.add("llm", llm_stage, depends_on=["ocr", "edges"])
+        stage_results = scheduler.run()
+
+        ocr_items = stage_results["ocr"]
+        edge_features = stage_results["edges"]
+        pnid = stage_results["llm"]
+
+        print("\n⏱️  Stage wall times:")
+        print(scheduler.format_timings())
 
         return {
             "ocr_items": len(ocr_items),
@@ -356,6 +423,7 @@ class ThreeStepPipeline:
                 "visualization": str(viz_output),
                 "pnid": str(pnid_output),
             },
+            "timings": {**scheduler.timings, "total": scheduler.total_time},
         }
 
 
@@ -386,7 +454,11 @@ def main() -> None:
     provider = os.getenv("PNID_PROVIDER", "azure-anthropic")
     model = os.getenv("PNID_MODEL", "claude-opus-4-5")
 
-    pipeline = ThreeStepPipeline(provider=provider, model=model)
+    # Optional downscale of the image sent to the LLM (e.g. PNID_IMAGE_MAX_EDGE=1568)
+    max_edge = os.getenv("PNID_IMAGE_MAX_EDGE")
+    image_prep = ImagePrep(max_long_edge=int(max_edge)) if max_edge else None
+
+    pipeline = ThreeStepPipeline(provider=provider, model=model, image_prep=image_prep)
 
     # Run pipeline
     results = pipeline.run(image_path, output_dir)
@@ -10,9 +10,12 @@ import argparse
 import base64
 import json
 from pathlib import Path
+from typing import Any
 
 from pyvis.network import Network
 
+from pnid_graph import PnidGraph
+
 
 def load_image_as_base64(image_path: str) -> str:
     """Load an image and convert to base64 data URI."""
@@ -67,16 +70,10 @@ def create_interactive_graph(
         image_path: Path to the background image
         output_path: Path for the output HTML file
     """
-    # Load data
-    data = load_pnid_data(json_path)
-
-    # Handle both old format (direct) and new format (nested in 'output')
-    if "output" in data:
-        components = {c["id"]: c for c in data["output"]["components"]}
-        pipes = data["output"]["pipes"]
-    else:
-        components = {c["id"]: c for c in data["components"]}
-        pipes = data["pipes"]
+    # Load data (handles both old format (direct) and new format (nested in 'output'))
+    graph = PnidGraph.from_pnid(load_pnid_data(json_path))
+    components = graph.component_map()
+    pipes = graph.edges
 
     # Load image to get dimensions for coordinate transformation
     from PIL import Image
@@ -161,7 +158,11 @@ def create_interactive_graph(
 
     # Build per-pipe unique inlet / outlet node ids based on label and target/source
     # Treat any pipe endpoint that is not a known component id as a distinct inlet/outlet node
+    source_known = (graph.source >= 0) & (graph.source < graph.n_components)
+    target_known = (graph.target >= 0) & (graph.target < graph.n_components)
     augmented_pipes: list[dict[str, Any]] = []
+    # Synthesized inlet/outlet node id -> the one pipe it belongs to
+    terminal_pipes: dict[str, dict[str, Any]] = {}
     for idx, pipe in enumerate(pipes):
         src = pipe["source"]
         tgt = pipe["target"]
@@ -169,11 +170,11 @@ def create_interactive_graph(
         base_label = label.replace(" ", "").replace("°", "deg").replace(",", "")
 
         # Per-pipe unique inlet nodes: source not a known component
-        if src not in components:
+        if not source_known[idx]:
             src = f"inlet_{base_label}_{tgt}_{idx}"
 
         # Per-pipe unique outlet nodes: target not a known component
-        if tgt not in components:
+        if not target_known[idx]:
             tgt = f"outlet_{base_label}_{pipe['source']}_{idx}"
 
         new_pipe: dict[str, Any] = dict(pipe)
@@ -186,13 +187,18 @@ def create_interactive_graph(
         new_pipe["__orig_target"] = pipe["target"]
         augmented_pipes.append(new_pipe)
 
+        if not source_known[idx]:
+            terminal_pipes.setdefault(src, new_pipe)
+        if not target_known[idx]:
+            terminal_pipes.setdefault(tgt, new_pipe)
+
     pipes = augmented_pipes
 
-    # Collect all unique node IDs from pipes (using synthesized ids)
-    all_node_ids = set()
+    # Collect all unique node IDs from pipes (using synthesized ids), in pipe order
+    all_node_ids: dict[str, None] = {}
     for pipe in pipes:
-        all_node_ids.add(pipe["source_node"])
-        all_node_ids.add(pipe["target_node"])
+        all_node_ids[pipe["source_node"]] = None
+        all_node_ids[pipe["target_node"]] = None
 
     # Add component nodes with actual x,y coordinates
     for node_id in all_node_ids:
@@ -229,14 +235,10 @@ def create_interactive_graph(
             )
         else:
             # Source or sink nodes (not in components list)
-            # Try to find position from pipes (using synthesized ids)
-            x = 0
-            y = 0
-            for pipe in pipes:
-                if pipe["source_node"] == node_id or pipe["target_node"] == node_id:
-                    x = pipe.get("x", 0)
-                    y = pipe.get("y", 0)
-                    break
+            # Position comes from the pipe the synthesized id was created for
+            terminal_pipe = terminal_pipes.get(node_id)
+            x = terminal_pipe.get("x", 0) if terminal_pipe else 0
+            y = terminal_pipe.get("y", 0) if terminal_pipe else 0
 
             # Classify synthesized inlet/outlet vs other synthetic nodes
             if node_id.startswith("inlet_"):
@@ -244,16 +246,14 @@ def create_interactive_graph(
                 # Recover a meaningful label from any pipe that uses this node_id
                 stream_label = node_id
                 target_id = ""
-                for pipe in pipes:
-                    if pipe["source_node"] == node_id:
-                        # Prefer description as the human-friendly stream name if available
-                        stream_label = (
-                            pipe.get("__stream_description")
-                            or pipe.get("__stream_label")
-                            or stream_label
-                        )
-                        target_id = pipe.get("__orig_target", "")
-                        break
+                if terminal_pipe and terminal_pipe["source_node"] == node_id:
+                    # Prefer description as the human-friendly stream name if available
+                    stream_label = (
+                        terminal_pipe.get("__stream_description")
+                        or terminal_pipe.get("__stream_label")
+                        or stream_label
+                    )
+                    target_id = terminal_pipe.get("__orig_target", "")
                 nice_stream = stream_label.replace("deg", "°")
                 # Node label: stream only, e.g. "Malt, Corn, Water at 15°C"
                 label = nice_stream
@@ -269,16 +269,14 @@ def create_interactive_graph(
                 # Node id: outlet_<baseLabel>_<sourceId>_<idx>
                 stream_label = node_id
                 source_id = ""
-                for pipe in pipes:
-                    if pipe["target_node"] == node_id:
-                        # Prefer description as the human-friendly stream name if available
-                        stream_label = (
-                            pipe.get("__stream_description")
-                            or pipe.get("__stream_label")
-                            or stream_label
-                        )
-                        source_id = pipe.get("__orig_source", "")
-                        break
+                if terminal_pipe and terminal_pipe["target_node"] == node_id:
+                    # Prefer description as the human-friendly stream name if available
+                    stream_label = (
+                        terminal_pipe.get("__stream_description")
+                        or terminal_pipe.get("__stream_label")
+                        or stream_label
+                    )
+                    source_id = terminal_pipe.get("__orig_source", "")
                 nice_stream = stream_label.replace("deg", "°")
                 # Node label: "<stream> ← <source>"
                 if source_id:
@@ -17,6 +17,7 @@ Usage:
     )
 """
 
+import asyncio
 import json
 import os
 from enum import Enum
@@ -27,6 +28,9 @@ from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 from pydantic_ai import Agent, BinaryContent
 
+from image_prep import ImagePrep, PreparedImage
+from llm_cache import get_cache, make_key
+
 load_dotenv()
 
 
@@ -69,19 +73,25 @@ class Provider(str, Enum):
     OPENAI = "openai"
 
 
-def create_agent(provider: Provider, model_name: str | None = None) -> Agent:
-    """Create a P&ID extraction agent for the specified provider.
+DEFAULT_MODELS = {
+    Provider.GOOGLE_GEMINI: "gemini-3.0-pro-preview",
+    Provider.AZURE_ANTHROPIC: "claude-opus-4-5",
+    # Default to GPT-5.1 on Azure unless overridden
+    Provider.AZURE_DEEPSEEK: "gpt-5.1",
+    Provider.ANTHROPIC: "claude-sonnet-4-5",
+    Provider.OPENAI: "gpt-5",
+}
+
+
+def build_system_prompt(provider: Provider, model_name: str | None = None) -> str:
+    """Return the extraction system prompt for a provider/model.
 
     Args:
         provider: The AI provider to use
-        model_name: Optional model name override (uses defaults if not provided)
+        model_name: Optional model name override
 
     Returns:
-        Configured Agent instance
-
-    Raises:
-        ValueError: If required environment variables are missing
-        ImportError: If required provider packages are not installed
+        System prompt text
     """
     base_system_prompt = (
         "You are an expert in process network identification. "
@@ -93,7 +103,7 @@ def create_agent(provider: Provider, model_name: str | None = None) -> Agent:
 
     # Provider-specific prompt tweaks
     if provider == Provider.AZURE_DEEPSEEK and (model_name or "").startswith("gpt-5.2"):
-        system_prompt = (
+        return (
             base_system_prompt
             + " Represent every flow, inlet, and outlet as a separate Pipe object in the PNID model. "
             + " Do NOT hide inlets or outlets inside component descriptions. "
@@ -101,8 +111,24 @@ def create_agent(provider: Provider, model_name: str | None = None) -> Agent:
             + " target like 'External - <utility or sink name>'. "
             + " Ensure that the total number of Pipe objects matches all visible labeled streams in the image."
         )
-    else:
-        system_prompt = base_system_prompt
+    return base_system_prompt
+
+
+def create_agent(provider: Provider, model_name: str | None = None) -> Agent:
+    """Create a P&ID extraction agent for the specified provider.
+
+    Args:
+        provider: The AI provider to use
+        model_name: Optional model name override (uses defaults if not provided)
+
+    Returns:
+        Configured Agent instance
+
+    Raises:
+        ValueError: If required environment variables are missing
+        ImportError: If required provider packages are not installed
+    """
+    system_prompt = build_system_prompt(provider, model_name)
 
     if provider == Provider.GOOGLE_GEMINI:
         from pydantic_ai.models.google import GoogleModel
@@ -112,7 +138,7 @@ def create_agent(provider: Provider, model_name: str | None = None) -> Agent:
         if not api_key:
             raise ValueError("GOOGLE_API_KEY environment variable is required for Google Gemini")
 
-        model_name = model_name or "gemini-3.0-pro-preview"
+        model_name = model_name or DEFAULT_MODELS[provider]
         google_provider = GoogleProvider(vertexai=False, api_key=api_key)
         model = GoogleModel(model_name, provider=google_provider)
 
@@ -131,7 +157,7 @@ def create_agent(provider: Provider, model_name: str | None = None) -> Agent:
             base_url="https://aif-minside.services.ai.azure.com/anthropic/",
             api_key=api_key,
         )
-        model_name = model_name or "claude-opus-4-5"
+        model_name = model_name or DEFAULT_MODELS[provider]
         model = AnthropicModel(model_name, provider=AnthropicProvider(anthropic_client=client))
 
     elif provider == Provider.AZURE_DEEPSEEK:
@@ -149,8 +175,7 @@ def create_agent(provider: Provider, model_name: str | None = None) -> Agent:
             api_version="2024-07-01-preview",
             api_key=api_key,
         )
-        # Default to GPT-5.1 on Azure unless overridden
-        model_name = model_name or "gpt-5.1"
+        model_name = model_name or DEFAULT_MODELS[provider]
         model = OpenAIChatModel(model_name, provider=OpenAIProvider(openai_client=client))
 
     elif provider == Provider.ANTHROPIC:
@@ -160,7 +185,7 @@ def create_agent(provider: Provider, model_name: str | None = None) -> Agent:
         if not api_key:
             raise ValueError("ANTHROPIC_API_KEY environment variable is required")
 
-        model_name = model_name or "claude-sonnet-4-5"
+        model_name = model_name or DEFAULT_MODELS[provider]
         model = AnthropicModel(model_name, api_key=api_key)
 
     elif provider == Provider.OPENAI:
@@ -170,7 +195,7 @@ def create_agent(provider: Provider, model_name: str | None = None) -> Agent:
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
 
-        model_name = model_name or "gpt-5"
+        model_name = model_name or DEFAULT_MODELS[provider]
         model = OpenAIChatModel(model_name, api_key=api_key)
 
     else:
@@ -183,11 +208,145 @@ def create_agent(provider: Provider, model_name: str | None = None) -> Agent:
     )
 
 
+MEDIA_TYPE_MAP = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+
+
+def load_image_content(image_path: str | Path) -> BinaryContent:
+    """Read an image file into a BinaryContent message part.
+
+    Args:
+        image_path: Path to the P&ID diagram image
+
+    Returns:
+        BinaryContent with the file bytes and a media type derived from the extension
+
+    Raises:
+        FileNotFoundError: If image_path does not exist
+    """
+    image_path = Path(image_path)
+    if not image_path.exists():
+        raise FileNotFoundError(f"Image not found: {image_path}")
+
+    # Determine media type from extension
+    media_type = MEDIA_TYPE_MAP.get(image_path.suffix.lower(), "image/png")
+    return BinaryContent(data=image_path.read_bytes(), media_type=media_type)
+
+
+def prepare_image_content(
+    image_path: str | Path, image_prep: ImagePrep | None = None
+) -> tuple[BinaryContent, PreparedImage | None]:
+    """Load an image and apply the optional resize / re-encode stage.
+
+    Args:
+        image_path: Path to the P&ID diagram image
+        image_prep: Optional pre-send settings (None sends the file bytes unchanged)
+
+    Returns:
+        BinaryContent to send, and the PreparedImage (None when image_prep is None)
+    """
+    binary_content = load_image_content(image_path)
+    if image_prep is None:
+        return binary_content, None
+
+    prepared = image_prep.apply(binary_content.data, binary_content.media_type)
+    return BinaryContent(data=prepared.data, media_type=prepared.media_type), prepared
+
+
+def rescale_coordinates(output: dict[str, Any], scale_x: float, scale_y: float) -> dict[str, Any]:
+    """Map component/pipe x,y from a resized image back to original pixel space.
+
+    Args:
+        output: PNID data as returned by the model (components and pipes)
+        scale_x: Sent pixels per original pixel along x
+        scale_y: Sent pixels per original pixel along y
+
+    Returns:
+        Copy of output with x divided by scale_x and y by scale_y
+    """
+    if scale_x == 1.0 and scale_y == 1.0:
+        return output
+    return {
+        **output,
+        "components": [
+            {**c, "x": c["x"] / scale_x, "y": c["y"] / scale_y} for c in output["components"]
+        ],
+        "pipes": [{**p, "x": p["x"] / scale_x, "y": p["y"] / scale_y} for p in output["pipes"]],
+    }
+
+
+def extraction_cache_key(
+    provider: Provider,
+    model_name: str | None,
+    images: list[BinaryContent],
+    prompt_parts: list[str] | None = None,
+) -> str:
+    """Content-addressed cache key for an extraction request.
+
+    Covers everything that determines the response: image bytes, system and user prompt,
+    provider, resolved model name and the PNID output schema.
+
+    Args:
+        provider: The AI provider to use
+        model_name: Optional model name override (resolved to the provider default)
+        images: Image parts sent with the request
+        prompt_parts: Additional user prompt text sent with the request
+
+    Returns:
+        Cache key (hex digest)
+    """
+    return make_key(
+        provider=provider.value,
+        model=model_name or DEFAULT_MODELS[provider],
+        prompt=[build_system_prompt(provider, model_name), *(prompt_parts or [])],
+        images=[image.data for image in images],
+        schema=PNID,
+    )
+
+
+def _build_output(
+    output: dict[str, Any],
+    model: str,
+    provider: Provider,
+    image_path: Path,
+    output_path: str | Path | None,
+    prepared: PreparedImage | None = None,
+) -> dict[str, Any]:
+    """Wrap an extracted PNID in the output format and optionally save it."""
+    output_data = {
+        "output": output,
+        "provider": provider.value,
+        "model": model,
+        "image_path": str(image_path),
+    }
+    if prepared is not None:
+        # Coordinates come back in the sent image's pixels; report them in the original's
+        output_data["output"] = rescale_coordinates(output, prepared.scale_x, prepared.scale_y)
+        output_data["image_scale"] = [prepared.scale_x, prepared.scale_y]
+        output_data["sent_image_size"] = list(prepared.size)
+
+    # Save to file if requested
+    if output_path:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(output_data, indent=4, ensure_ascii=False))
+        print(f"✅ Saved output to: {output_path}")
+
+    return output_data
+
+
 def extract_pnid(
     image_path: str | Path,
     provider: Provider = Provider.GOOGLE_GEMINI,
     model_name: str | None = None,
     output_path: str | Path | None = None,
+    use_cache: bool = True,
+    image_prep: ImagePrep | None = None,
 ) -> dict[str, Any]:
     """Extract P&ID components and pipes from an image.
 
@@ -196,6 +355,9 @@ def extract_pnid(
         provider: AI provider to use (default: Google Gemini)
         model_name: Optional model name override
         output_path: Optional path to save JSON output
+        use_cache: Reuse a cached result for identical inputs (see llm_cache)
+        image_prep: Optional downscale / re-encode before sending (coordinates are
+            mapped back to original pixels)
 
     Returns:
         Dictionary with extraction results including:
@@ -209,46 +371,158 @@ def extract_pnid(
         ValueError: If provider configuration is invalid
     """
     image_path = Path(image_path)
-    if not image_path.exists():
-        raise FileNotFoundError(f"Image not found: {image_path}")
-
-    # Read image
-    with open(image_path, "rb") as f:
-        image_content = f.read()
-
-    # Determine media type from extension
-    ext = image_path.suffix.lower()
-    media_type_map = {
-        ".png": "image/png",
-        ".jpg": "image/jpeg",
-        ".jpeg": "image/jpeg",
-        ".gif": "image/gif",
-        ".webp": "image/webp",
-    }
-    media_type = media_type_map.get(ext, "image/png")
-
-    binary_content = BinaryContent(data=image_content, media_type=media_type)
+    binary_content, prepared = prepare_image_content(image_path, image_prep)
+
+    cache = get_cache(use_cache)
+    key = extraction_cache_key(provider, model_name, [binary_content])
+    cached = cache.get(key) if cache else None
+    if cached is not None:
+        print(f"♻️  Using cached extraction for: {image_path}")
+        return _build_output(
+            cached["output"], cached["model"], provider, image_path, output_path, prepared
+        )
 
     # Create agent and run extraction
     agent = create_agent(provider, model_name)
     result = agent.run_sync([binary_content])
 
-    # Prepare output
-    output_data = {
-        "output": result.output.model_dump(),
-        "provider": provider.value,
-        "model": result.response.model_name or model_name or "unknown",
-        "image_path": str(image_path),
-    }
+    output = result.output.model_dump()
+    model = result.response.model_name or model_name or "unknown"
+    if cache:
+        cache.put(key, {"output": output, "model": model})
+    return _build_output(output, model, provider, image_path, output_path, prepared)
 
-    # Save to file if requested
-    if output_path:
-        output_path = Path(output_path)
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        output_path.write_text(json.dumps(output_data, indent=4, ensure_ascii=False))
-        print(f"✅ Saved output to: {output_path}")
 
-    return output_data
+def load_cached_extraction(
+    image_path: str | Path,
+    provider: Provider = Provider.GOOGLE_GEMINI,
+    model_name: str | None = None,
+    image_prep: ImagePrep | None = None,
+) -> dict[str, Any] | None:
+    """Return the cached extraction for an image without calling the LLM.
+
+    Uses the same cache key as extract_pnid / extract_pnid_async, so callers that
+    throttle remote requests can serve cache hits before taking a slot.
+
+    Args:
+        image_path: Path to the P&ID diagram image
+        provider: AI provider the result was extracted with
+        model_name: Optional model name override
+        image_prep: Optional downscale / re-encode before sending
+
+    Returns:
+        Same dictionary as extract_pnid, or None when the cache is disabled or misses
+    """
+    cache = get_cache()
+    if cache is None:
+        return None
+    image_path = Path(image_path)
+    binary_content, prepared = prepare_image_content(image_path, image_prep)
+    cached = cache.get(extraction_cache_key(provider, model_name, [binary_content]))
+    if cached is None:
+        return None
+    return _build_output(cached["output"], cached["model"], provider, image_path, None, prepared)
+
+
+async def extract_pnid_async(
+    image_path: str | Path,
+    provider: Provider = Provider.GOOGLE_GEMINI,
+    model_name: str | None = None,
+    output_path: str | Path | None = None,
+    agent: Agent | None = None,
+    use_cache: bool = True,
+    image_prep: ImagePrep | None = None,
+) -> dict[str, Any]:
+    """Async variant of extract_pnid (uses ``agent.run``), for running many extractions concurrently.
+
+    Args:
+        image_path: Path to the P&ID diagram image
+        provider: AI provider to use (default: Google Gemini)
+        model_name: Optional model name override
+        output_path: Optional path to save JSON output
+        agent: Optional pre-built agent to reuse across calls (created if not provided)
+        use_cache: Reuse a cached result for identical inputs (see llm_cache)
+        image_prep: Optional downscale / re-encode before sending (coordinates are
+            mapped back to original pixels)
+
+    Returns:
+        Same dictionary as extract_pnid
+
+    Raises:
+        FileNotFoundError: If image_path does not exist
+        ValueError: If provider configuration is invalid
+    """
+    image_path = Path(image_path)
+    binary_content, prepared = prepare_image_content(image_path, image_prep)
+
+    output, model = await run_extraction_async(
+        provider, model_name, binary_content, agent=agent, use_cache=use_cache
+    )
+    return _build_output(output, model, provider, image_path, output_path, prepared)
+
+
+async def run_extraction_async(
+    provider: Provider,
+    model_name: str | None,
+    binary_content: BinaryContent,
+    prompt_parts: list[str] | None = None,
+    agent: Agent | None = None,
+    use_cache: bool = True,
+) -> tuple[dict[str, Any], str]:
+    """Run one extraction request (or return its cached result).
+
+    Args:
+        provider: AI provider to use
+        model_name: Optional model name override
+        binary_content: Image to send
+        prompt_parts: Optional user prompt text sent before the image
+        agent: Optional pre-built agent to reuse across calls (created if not provided)
+        use_cache: Reuse a cached result for identical inputs (see llm_cache)
+
+    Returns:
+        Tuple of (PNID data as returned by the model, model name)
+    """
+    cache = get_cache(use_cache)
+    key = extraction_cache_key(provider, model_name, [binary_content], prompt_parts)
+    cached = cache.get(key) if cache else None
+    if cached is not None:
+        return cached["output"], cached["model"]
+
+    agent = agent or create_agent(provider, model_name)
+    result = await agent.run([*(prompt_parts or []), binary_content])
+
+    output = result.output.model_dump()
+    model = result.response.model_name or model_name or "unknown"
+    if cache:
+        # Off the event loop: a put that crosses the size limit rescans the cache directory
+        await asyncio.to_thread(cache.put, key, {"output": output, "model": model})
+    return output, model
+
+
+def add_image_prep_arguments(parser: Any) -> None:
+    """Add the pre-send resize / re-encode options to an argparse parser."""
+    group = parser.add_argument_group("image preparation")
+    group.add_argument("--max-edge", type=int, help="Downscale so the longest side is at most N px")
+    group.add_argument("--max-pixels", type=int, help="Downscale to at most N pixels (w×h)")
+    group.add_argument(
+        "--image-format",
+        choices=["original", "jpeg", "webp", "png"],
+        default="original",
+        help="Re-encode the image before sending",
+    )
+    group.add_argument("--quality", type=int, default=85, help="JPEG/WebP quality")
+
+
+def image_prep_from_args(args: Any) -> ImagePrep | None:
+    """Build ImagePrep from parsed arguments (None when no option was given)."""
+    if not args.max_edge and not args.max_pixels and args.image_format == "original":
+        return None
+    return ImagePrep(
+        max_long_edge=args.max_edge,
+        max_pixels=args.max_pixels,
+        image_format=args.image_format,
+        quality=args.quality,
+    )
 
 
 def main():
@@ -273,16 +547,43 @@ def main():
         default="data/output/pnid.json",
         help="Output JSON file path",
     )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Always call the LLM (skip the result cache)"
+    )
+    add_image_prep_arguments(parser)
+    tiling = parser.add_argument_group("tiled extraction (for oversized sheets)")
+    tiling.add_argument(
+        "--tile-size", type=int, help="Split the sheet into tiles of N px and merge the results"
+    )
+    tiling.add_argument("--tile-overlap", type=int, default=256, help="Tile overlap in px")
+    tiling.add_argument("--tile-concurrency", type=int, default=8, help="Tile requests in flight")
 
     args = parser.parse_args()
 
     try:
-        result = extract_pnid(
-            image_path=args.image_path,
-            provider=Provider(args.provider),
-            model_name=args.model,
-            output_path=args.output,
-        )
+        if args.tile_size:
+            from pnid_tiling import extract_pnid_tiled
+
+            result = extract_pnid_tiled(
+                image_path=args.image_path,
+                provider=Provider(args.provider),
+                model_name=args.model,
+                output_path=args.output,
+                tile_size=args.tile_size,
+                tile_overlap=args.tile_overlap,
+                max_concurrency=args.tile_concurrency,
+                use_cache=not args.no_cache,
+                image_prep=image_prep_from_args(args),
+            )
+        else:
+            result = extract_pnid(
+                image_path=args.image_path,
+                provider=Provider(args.provider),
+                model_name=args.model,
+                output_path=args.output,
+                use_cache=not args.no_cache,
+                image_prep=image_prep_from_args(args),
+            )
 
         print(f"\n✅ Extraction complete!")
         print(f"Provider: {result['provider']}")
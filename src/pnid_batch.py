@@ -0,0 +1,449 @@
+"""Batch P&ID extraction over a corpus of drawings.
+
+Runs pnid_agent extractions for many images with bounded concurrency on the agent's
+async API, a per-provider request rate limit, and retry with exponential backoff.
+Writes one result file per drawing (same format as pnid_agent's CLI output) plus a
+summary, and keeps a checkpoint so an interrupted run can be resumed without redoing
+finished drawings.
+
+Inputs can be any mix of:
+- directories (all images directly inside; use --recursive for subdirectories)
+- glob patterns (e.g. "data/input/**/*.png")
+- manifest files: .txt (one path per line, # comments allowed), .json (list of paths
+  or of {"image_path": ...} objects) or .jsonl (one such object per line); relative
+  paths are resolved against the manifest's directory
+
+Usage:
+    python src/pnid_batch.py data/input/drawings -p azure-anthropic -o data/output/batch
+    python src/pnid_batch.py "data/input/**/*.png" -p google openai --concurrency 8
+    python src/pnid_batch.py manifest.txt -o data/output/batch --rpm azure-anthropic=30
+
+Output directory layout:
+    <output>/<drawing>.<provider>.json   one result per drawing and provider
+    <output>/checkpoint.jsonl            one line per finished job (appended as they finish)
+    <output>/summary.json                counts, timings and status of every job
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import time
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+from image_prep import ImagePrep
+from json_io import write_json_atomic
+from pnid_agent import (
+    MEDIA_TYPE_MAP,
+    Provider,
+    add_image_prep_arguments,
+    create_agent,
+    extract_pnid_async,
+    image_prep_from_args,
+    load_cached_extraction,
+)
+
+# Requests per minute per provider (override with --rpm provider=N; 0 = unlimited)
+DEFAULT_RATE_LIMITS = {
+    Provider.GOOGLE_GEMINI: 60,
+    Provider.AZURE_ANTHROPIC: 50,
+    Provider.AZURE_DEEPSEEK: 60,
+    Provider.ANTHROPIC: 50,
+    Provider.OPENAI: 60,
+}
+
+# HTTP status codes worth retrying (timeouts, conflicts, rate limits); 5xx is always retried
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+CHECKPOINT_FILE = "checkpoint.jsonl"
+SUMMARY_FILE = "summary.json"
+
+
+def _read_manifest(manifest_path: Path) -> list[Path]:
+    """Read image paths from a .txt, .json or .jsonl manifest."""
+    base = manifest_path.parent
+    text = manifest_path.read_text(encoding="utf-8")
+
+    if manifest_path.suffix.lower() == ".txt":
+        entries: list[Any] = [
+            line.strip()
+            for line in text.splitlines()
+            if line.strip() and not line.strip().startswith("#")
+        ]
+    elif manifest_path.suffix.lower() == ".jsonl":
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+    else:
+        entries = json.loads(text)
+
+    paths = []
+    for entry in entries:
+        value = entry["image_path"] if isinstance(entry, dict) else entry
+        path = Path(value)
+        paths.append(path if path.is_absolute() else base / path)
+    return paths
+
+
+def collect_images(inputs: Sequence[str], recursive: bool = False) -> list[Path]:
+    """Expand directories, glob patterns and manifests into a de-duplicated list of images.
+
+    Args:
+        inputs: Directories, glob patterns, manifest files or image files
+        recursive: Also include images in subdirectories of directory inputs
+
+    Returns:
+        Image paths in input order, without duplicates
+
+    Raises:
+        FileNotFoundError: If an input matches nothing
+    """
+    images: list[Path] = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            pattern = "**/*" if recursive else "*"
+            found = sorted(p for p in path.glob(pattern) if p.suffix.lower() in MEDIA_TYPE_MAP)
+        elif path.is_file() and path.suffix.lower() in {".txt", ".json", ".jsonl"}:
+            found = _read_manifest(path)
+        elif path.is_file():
+            found = [path]
+        else:
+            found = sorted(
+                Path(p)
+                for p in glob.glob(item, recursive=True)
+                if Path(p).suffix.lower() in MEDIA_TYPE_MAP
+            )
+        if not found:
+            raise FileNotFoundError(f"No images found for input: {item}")
+        images.extend(found)
+
+    seen: set[Path] = set()
+    unique = []
+    for image in images:
+        key = image.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(image)
+    return unique
+
+
+def _output_names(images: list[Path]) -> dict[Path, str]:
+    """Result file stem per image; drawings sharing a file stem are disambiguated by their
+    parent path and file extension (e.g. ``brewery_png`` / ``brewery_jpg``).
+
+    Raises:
+        ValueError: If two drawings still map to the same name
+    """
+    by_stem: dict[str, list[Path]] = {}
+    for image in images:
+        by_stem.setdefault(image.stem, []).append(image)
+
+    names = {}
+    for stem, group in by_stem.items():
+        if len(group) == 1:
+            names[group[0]] = stem
+            continue
+        common = Path(os.path.commonpath([str(p.resolve().parent) for p in group]))
+        for image in group:
+            relative = image.resolve().relative_to(common)
+            extension = relative.suffix.lstrip(".")
+            names[image] = "__".join([*relative.parent.parts, f"{stem}_{extension}"])
+
+    by_name: dict[str, list[Path]] = {}
+    for image, name in names.items():
+        by_name.setdefault(name, []).append(image)
+    clashes = {name: group for name, group in by_name.items() if len(group) > 1}
+    if clashes:
+        details = "; ".join(
+            f"{name}: {', '.join(str(p) for p in group)}" for name, group in clashes.items()
+        )
+        raise ValueError(f"Drawings map to the same output name: {details}")
+    return names
+
+
+class RateLimiter:
+    """Spaces out request starts to at most ``requests_per_minute`` (shared by all tasks of one provider)."""
+
+    def __init__(self, requests_per_minute: float):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute > 0 else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until the next request slot."""
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Transient provider/network failures are retried; missing files and missing packages are not."""
+    if isinstance(error, (FileNotFoundError, ImportError)):
+        return False
+    status_code = getattr(error, "status_code", None)
+    if isinstance(status_code, int):
+        return status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+    return True
+
+
+def load_checkpoint(output_dir: Path) -> dict[str, dict[str, Any]]:
+    """Return finished jobs from the checkpoint, keyed by result file name (last entry wins)."""
+    checkpoint_path = output_dir / CHECKPOINT_FILE
+    if not checkpoint_path.exists():
+        return {}
+
+    done: dict[str, dict[str, Any]] = {}
+    for line in checkpoint_path.read_text(encoding="utf-8").splitlines():
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            # Partially written last line from an interrupted run
+            continue
+        done[entry["output"]] = entry
+    return done
+
+
+async def run_batch(
+    images: list[Path],
+    providers: list[Provider],
+    output_dir: Path,
+    model_name: str | None = None,
+    concurrency: int = 4,
+    rate_limits: dict[Provider, float] | None = None,
+    max_attempts: int = 4,
+    backoff_base: float = 2.0,
+    backoff_max: float = 60.0,
+    resume: bool = True,
+    use_cache: bool = True,
+    image_prep: ImagePrep | None = None,
+) -> dict[str, Any]:
+    """Extract every image with every provider and write results, checkpoint and summary.
+
+    Args:
+        images: Drawings to process
+        providers: Providers to run each drawing through
+        output_dir: Directory for result files, checkpoint and summary
+        model_name: Optional model name override (applied to all providers)
+        concurrency: Maximum number of extractions in flight
+        rate_limits: Requests per minute per provider (defaults to DEFAULT_RATE_LIMITS)
+        max_attempts: Attempts per drawing before it is recorded as failed
+        backoff_base: First retry delay in seconds (doubles per attempt, with jitter)
+        backoff_max: Upper bound for a single retry delay in seconds
+        resume: Skip jobs the checkpoint records as done (and whose result file exists)
+        use_cache: Reuse cached LLM results for unchanged drawings (see llm_cache)
+        image_prep: Optional downscale / re-encode before sending
+
+    Returns:
+        Summary dictionary (also written to summary.json)
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    limits = {**DEFAULT_RATE_LIMITS, **(rate_limits or {})}
+    limiters = {provider: RateLimiter(limits[provider]) for provider in providers}
+    # One agent per provider, shared by all its tasks (fails fast on missing credentials)
+    agents = {provider: create_agent(provider, model_name) for provider in providers}
+
+    names = _output_names(images)
+    done = load_checkpoint(output_dir) if resume else {}
+    semaphore = asyncio.Semaphore(concurrency)
+    checkpoint = (output_dir / CHECKPOINT_FILE).open("a" if resume else "w", encoding="utf-8")
+
+    jobs: list[tuple[Path, Provider, str]] = []
+    skipped: list[dict[str, Any]] = []
+    for image in images:
+        for provider in providers:
+            output_name = f"{names[image]}.{provider.value}.json"
+            previous = done.get(output_name)
+            if previous and previous["status"] == "ok" and (output_dir / output_name).exists():
+                skipped.append({**previous, "status": "skipped"})
+            else:
+                jobs.append((image, provider, output_name))
+
+    total = len(jobs)
+    finished = 0
+
+    async def extract_remote(
+        image: Path, provider: Provider, output_name: str, entry: dict[str, Any]
+    ) -> None:
+        """Run the LLM extraction within the concurrency slot and rate limit, with retries."""
+        async with semaphore:
+            for attempt in range(1, max_attempts + 1):
+                await limiters[provider].acquire()
+                try:
+                    result = await extract_pnid_async(
+                        image,
+                        provider,
+                        model_name,
+                        agent=agents[provider],
+                        use_cache=use_cache,
+                        image_prep=image_prep,
+                    )
+                except Exception as e:
+                    entry.update(
+                        status="failed", attempts=attempt, error=f"{type(e).__name__}: {e}"
+                    )
+                    if attempt == max_attempts or not _is_retryable(e):
+                        break
+                    delay = min(backoff_max, backoff_base * 2 ** (attempt - 1))
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                else:
+                    write_json_atomic(
+                        output_dir / output_name, result, indent=4, ensure_ascii=False
+                    )
+                    entry.update(
+                        status="ok",
+                        attempts=attempt,
+                        model=result["model"],
+                        components=len(result["output"]["components"]),
+                        pipes=len(result["output"]["pipes"]),
+                    )
+                    entry.pop("error", None)
+                    break
+
+    async def process(image: Path, provider: Provider, output_name: str) -> dict[str, Any]:
+        nonlocal finished
+        entry: dict[str, Any] = {
+            "image_path": str(image),
+            "provider": provider.value,
+            "output": output_name,
+        }
+        start = time.perf_counter()
+        # Cache hits never reach the API: serve them before taking a slot or a rate token
+        cached = None
+        if use_cache:
+            try:
+                cached = await asyncio.to_thread(
+                    load_cached_extraction, image, provider, model_name, image_prep
+                )
+            except Exception:
+                # Unreadable drawing: treat as a miss so extract_remote records the failure
+                cached = None
+        if cached is not None:
+            write_json_atomic(output_dir / output_name, cached, indent=4, ensure_ascii=False)
+            entry.update(
+                status="ok",
+                attempts=0,
+                cached=True,
+                model=cached["model"],
+                components=len(cached["output"]["components"]),
+                pipes=len(cached["output"]["pipes"]),
+            )
+        else:
+            await extract_remote(image, provider, output_name, entry)
+
+        entry["elapsed_s"] = round(time.perf_counter() - start, 3)
+        checkpoint.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        checkpoint.flush()
+
+        finished += 1
+        icon = "✅" if entry["status"] == "ok" else "❌"
+        detail = entry.get("error") or f"{entry['components']} components, {entry['pipes']} pipes"
+        print(f"{icon} [{finished}/{total}] {image.name} ({provider.value}): {detail}")
+        return entry
+
+    print(f"🔍 {total} extraction(s) to run, {len(skipped)} already done")
+    start = time.perf_counter()
+    try:
+        entries = await asyncio.gather(*(process(*job) for job in jobs))
+    finally:
+        checkpoint.close()
+
+    all_entries = skipped + list(entries)
+    summary = {
+        "total": len(all_entries),
+        "ok": sum(e["status"] == "ok" for e in all_entries),
+        "failed": sum(e["status"] == "failed" for e in all_entries),
+        "skipped": len(skipped),
+        "cached": sum(bool(e.get("cached")) for e in entries),
+        "providers": [p.value for p in providers],
+        "model": model_name,
+        "elapsed_s": round(time.perf_counter() - start, 3),
+        "jobs": all_entries,
+    }
+    write_json_atomic(output_dir / SUMMARY_FILE, summary, indent=4, ensure_ascii=False)
+    return summary
+
+
+def _parse_rate_limits(values: list[str]) -> dict[Provider, float]:
+    limits = {}
+    for value in values:
+        name, _, rpm = value.partition("=")
+        if not rpm:
+            raise argparse.ArgumentTypeError(f"Expected provider=N, got: {value}")
+        limits[Provider(name)] = float(rpm)
+    return limits
+
+
+def main():
+    """CLI entry point for batch P&ID extraction."""
+    parser = argparse.ArgumentParser(description="Extract P&ID graphs from a corpus of drawings")
+    parser.add_argument(
+        "inputs", nargs="+", help="Image directories, glob patterns, manifests or image files"
+    )
+    parser.add_argument(
+        "-p",
+        "--provider",
+        type=str,
+        nargs="+",
+        choices=[p.value for p in Provider],
+        default=[Provider.GOOGLE_GEMINI.value],
+        help="AI provider(s) to use",
+    )
+    parser.add_argument("-m", "--model", type=str, help="Model name override")
+    parser.add_argument(
+        "-o", "--output", type=str, default="data/output/batch", help="Output directory"
+    )
+    parser.add_argument("-r", "--recursive", action="store_true", help="Recurse into directories")
+    parser.add_argument(
+        "-c", "--concurrency", type=int, default=4, help="Maximum extractions in flight"
+    )
+    parser.add_argument(
+        "--rpm",
+        nargs="+",
+        default=[],
+        metavar="PROVIDER=N",
+        help="Requests per minute per provider (0 = unlimited)",
+    )
+    parser.add_argument("--max-attempts", type=int, default=4, help="Attempts per drawing")
+    parser.add_argument(
+        "--no-resume", action="store_true", help="Ignore the checkpoint and redo every drawing"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Always call the LLM (skip the result cache)"
+    )
+    add_image_prep_arguments(parser)
+
+    args = parser.parse_args()
+
+    images = collect_images(args.inputs, recursive=args.recursive)
+    summary = asyncio.run(
+        run_batch(
+            images,
+            providers=[Provider(p) for p in args.provider],
+            output_dir=Path(args.output),
+            model_name=args.model,
+            concurrency=args.concurrency,
+            rate_limits=_parse_rate_limits(args.rpm),
+            max_attempts=args.max_attempts,
+            resume=not args.no_resume,
+            use_cache=not args.no_cache,
+            image_prep=image_prep_from_args(args),
+        )
+    )
+
+    print(f"\n✅ Batch complete in {summary['elapsed_s']:.1f}s")
+    print(f"OK: {summary['ok']}  Failed: {summary['failed']}  Skipped: {summary['skipped']}")
+    print(f"Summary: {Path(args.output) / SUMMARY_FILE}")
+    if summary["failed"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
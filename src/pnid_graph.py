@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+Columnar in-memory P&ID graph shared by the JSON/JSON-LD tools.
+
+Every P&ID flavour used in this repository boils down to components (nodes) and
+pipes/connections (edges):
+
+- JSON-LD from dexpi_reader.py / dwg_reader.py / generate_pnid_variations.py:
+  ``{"@graph": [{"@id", "@type", ...}, {"@type": "pid:Connection", "connectedTo": [a, b]}]}``
+  (older files use ``pnid:Connection`` / ``pnid:Pipe`` with ``pnid:connectsFrom/To``)
+- PNID JSON from pnid_agent.py: ``{"components": [...], "pipes": [...]}``, optionally
+  wrapped as ``{"output": {...}}``, or the ``PNID`` pydantic model itself
+
+``PnidGraph`` loads any of them into one representation: a node table (ids, types,
+labels and x/y coordinate arrays), an id-to-index map, an edge table of int32
+endpoint indices and a CSR adjacency built on first use. The original dicts are
+kept alongside the columns, so tools can still read or mutate their records.
+
+Usage:
+    python src/pnid_graph.py data/output/pnid_dexpi_final.json
+    python src/pnid_graph.py data/output/pnid.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+# JSON-LD @type values that describe an edge rather than a component
+CONNECTION_TYPES: frozenset[str] = frozenset({"pid:Connection", "pnid:Connection", "pnid:Pipe"})
+
+# Keys tried, in order, for the display label of a JSON-LD node
+JSONLD_LABEL_KEYS: tuple[str, ...] = ("name", "pnid:name", "rdfs:label", "tag")
+
+
+def connection_endpoints(item: dict[str, Any]) -> tuple[str, str]:
+    """
+    Return the (source, target) ids of a JSON-LD connection.
+
+    Handles both ``connectedTo: [a, b]`` and ``pnid:connectsFrom/To: {"@id": ...}``.
+    Missing endpoints are returned as empty strings.
+    """
+    connected = item.get("connectedTo")
+    if connected:
+        source = connected[0] if len(connected) > 0 else ""
+        target = connected[1] if len(connected) > 1 else ""
+        return str(source or ""), str(target or "")
+    source = (item.get("pnid:connectsFrom") or {}).get("@id", "")
+    target = (item.get("pnid:connectsTo") or {}).get("@id", "")
+    return str(source or ""), str(target or "")
+
+
+def _endpoint_id(value: Any) -> str:
+    """Normalize a pipe endpoint to a string id ('' when missing)."""
+    return "" if value is None else str(value)
+
+
+def _coordinate(value: Any) -> float:
+    """Convert a coordinate value to float, NaN when missing or not numeric."""
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _first_present(record: dict[str, Any], keys: Iterable[str]) -> Any:
+    """Return the first value among keys that is not None."""
+    for key in keys:
+        value = record.get(key)
+        if value is not None:
+            return value
+    return None
+
+
+class PnidGraph:
+    """
+    Columnar P&ID graph.
+
+    Nodes ``0 .. n_components - 1`` are the components, in order of first appearance.
+    Pipe endpoints that are not components (inlets, outlets, dangling references) are
+    appended after them as terminal nodes, so every endpoint has an index; they have
+    no record, type or label and NaN coordinates. Edge endpoints that are missing
+    entirely are stored as -1.
+
+    Attributes:
+        ids: Node ids (components first, then terminals)
+        index: Map from node id to row index
+        n_components: Number of component rows
+        types: Component type (JSON-LD @type or PNID category), per component
+        labels: Component display label, per component
+        x: (n_components,) float64 x coordinates (NaN when missing)
+        y: (n_components,) float64 y coordinates (NaN when missing)
+        nodes: Original component records, per component
+        edge_ids: Edge id (JSON-LD @id, PNID label or None), per edge
+        source: (n_edges,) int32 source node index (-1 when missing)
+        target: (n_edges,) int32 target node index (-1 when missing)
+        edges: Original connection/pipe records, per edge
+    """
+
+    __slots__ = (
+        "ids",
+        "index",
+        "n_components",
+        "types",
+        "labels",
+        "x",
+        "y",
+        "nodes",
+        "edge_ids",
+        "source",
+        "target",
+        "edges",
+        "_indptr",
+        "_adjacent",
+        "_incident",
+    )
+
+    def __init__(
+        self,
+        node_rows: Iterable[tuple[str, Any, Any, Any, Any, dict[str, Any]]],
+        edge_rows: Iterable[tuple[Any, str, str, dict[str, Any]]],
+    ):
+        """
+        Args:
+            node_rows: (id, type, label, x, y, record) per component. A repeated id
+                keeps its first position but takes the values of the last row.
+            edge_rows: (edge_id, source_id, target_id, record) per edge; endpoint ids
+                are '' when missing
+        """
+        self.ids: list[str] = []
+        self.index: dict[str, int] = {}
+        self.types: list[Any] = []
+        self.labels: list[Any] = []
+        self.nodes: list[dict[str, Any]] = []
+        xs: list[float] = []
+        ys: list[float] = []
+
+        for node_id, node_type, label, x, y, record in node_rows:
+            row = self.index.get(node_id)
+            if row is None:
+                self.index[node_id] = len(self.ids)
+                self.ids.append(node_id)
+                self.types.append(node_type)
+                self.labels.append(label)
+                xs.append(_coordinate(x))
+                ys.append(_coordinate(y))
+                self.nodes.append(record)
+            else:
+                self.types[row] = node_type
+                self.labels[row] = label
+                xs[row] = _coordinate(x)
+                ys[row] = _coordinate(y)
+                self.nodes[row] = record
+
+        self.n_components = len(self.ids)
+        self.x = np.asarray(xs, dtype=np.float64)
+        self.y = np.asarray(ys, dtype=np.float64)
+
+        self.edge_ids: list[Any] = []
+        self.edges: list[dict[str, Any]] = []
+        sources: list[int] = []
+        targets: list[int] = []
+        for edge_id, source_id, target_id, record in edge_rows:
+            self.edge_ids.append(edge_id)
+            self.edges.append(record)
+            sources.append(self._intern(source_id))
+            targets.append(self._intern(target_id))
+
+        self.source = np.asarray(sources, dtype=np.int32)
+        self.target = np.asarray(targets, dtype=np.int32)
+
+        self._indptr: np.ndarray | None = None
+        self._adjacent: np.ndarray | None = None
+        self._incident: np.ndarray | None = None
+
+    def _intern(self, node_id: str) -> int:
+        """Return the index of an edge endpoint, adding a terminal node if unknown."""
+        if not node_id:
+            return -1
+        row = self.index.get(node_id)
+        if row is None:
+            row = len(self.ids)
+            self.index[node_id] = row
+            self.ids.append(node_id)
+        return row
+
+    # ------------------------------------------------------------------
+    # Loaders
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_jsonld(cls, data: dict[str, Any] | list[dict[str, Any]]) -> PnidGraph:
+        """
+        Build a graph from JSON-LD data (a dict with ``@graph`` or the graph list).
+
+        Items whose @type is in CONNECTION_TYPES become edges; every other item with an
+        @id becomes a component.
+        """
+        items = data.get("@graph", []) if isinstance(data, dict) else data
+        node_rows = []
+        edge_rows = []
+        for item in items:
+            if item.get("@type") in CONNECTION_TYPES:
+                source, target = connection_endpoints(item)
+                edge_rows.append((item.get("@id"), source, target, item))
+                continue
+            node_id = item.get("@id")
+            if not node_id:
+                continue
+            node_rows.append(
+                (
+                    node_id,
+                    item.get("@type"),
+                    _first_present(item, JSONLD_LABEL_KEYS),
+                    _first_present(item, ("x", "pnid:x")),
+                    _first_present(item, ("y", "pnid:y")),
+                    item,
+                )
+            )
+        return cls(node_rows, edge_rows)
+
+    @classmethod
+    def from_pnid(cls, pnid: Any) -> PnidGraph:
+        """
+        Build a graph from PNID data: a ``PNID`` model, a ``components``/``pipes`` dict
+        or the ``{"output": {...}}`` wrapper written by the extraction agents.
+
+        Components are keyed by ``id``, falling back to ``label``.
+        """
+        if hasattr(pnid, "model_dump"):
+            pnid = pnid.model_dump()
+        if "output" in pnid:
+            pnid = pnid["output"]
+
+        node_rows = []
+        for comp in pnid.get("components", []):
+            key = comp.get("id") or comp.get("label")
+            if key is None:
+                continue
+            node_rows.append(
+                (
+                    str(key),
+                    comp.get("category"),
+                    comp.get("label"),
+                    comp.get("x"),
+                    comp.get("y"),
+                    comp,
+                )
+            )
+        edge_rows = [
+            (
+                pipe.get("label"),
+                _endpoint_id(pipe.get("source")),
+                _endpoint_id(pipe.get("target")),
+                pipe,
+            )
+            for pipe in pnid.get("pipes", [])
+        ]
+        return cls(node_rows, edge_rows)
+
+    @classmethod
+    def from_data(cls, data: Any) -> PnidGraph:
+        """Build a graph from JSON-LD or PNID data, detecting the format."""
+        if isinstance(data, list) or (isinstance(data, dict) and "@graph" in data):
+            return cls.from_jsonld(data)
+        return cls.from_pnid(data)
+
+    @classmethod
+    def load(cls, path: Path | str) -> PnidGraph:
+        """Load a JSON-LD or PNID JSON file."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_data(json.load(f))
+
+    # ------------------------------------------------------------------
+    # Table access
+    # ------------------------------------------------------------------
+
+    @property
+    def num_nodes(self) -> int:
+        """Number of nodes, including terminals."""
+        return len(self.ids)
+
+    @property
+    def num_edges(self) -> int:
+        """Number of edges."""
+        return len(self.edges)
+
+    def is_component(self, node_id: str) -> bool:
+        """Return True if node_id is a component (not a terminal or unknown id)."""
+        row = self.index.get(node_id)
+        return row is not None and row < self.n_components
+
+    def component_map(self) -> dict[str, dict[str, Any]]:
+        """Return the component records keyed by id."""
+        return dict(zip(self.ids[: self.n_components], self.nodes, strict=True))
+
+    def component_mask(self, node_ids: Iterable[str]) -> np.ndarray:
+        """Return a (num_nodes,) bool mask of the components among node_ids."""
+        mask = np.zeros(self.num_nodes, dtype=bool)
+        rows = [self.index[n] for n in node_ids if n in self.index]
+        if rows:
+            mask[rows] = True
+        mask[self.n_components :] = False
+        return mask
+
+    def edges_touching(self, mask: np.ndarray) -> np.ndarray:
+        """
+        Return the indices of edges with both endpoints present and at least one
+        endpoint selected by a (num_nodes,) bool mask.
+        """
+        valid = (self.source >= 0) & (self.target >= 0)
+        hit = valid.copy()
+        hit[valid] = mask[self.source[valid]] | mask[self.target[valid]]
+        return np.flatnonzero(hit)
+
+    def edges_with_endpoint(self, mask: np.ndarray) -> np.ndarray:
+        """
+        Return the indices of edges with at least one endpoint selected by a
+        (num_nodes,) bool mask; the other endpoint may be missing.
+        """
+        hit = np.zeros(self.num_edges, dtype=bool)
+        has_source = self.source >= 0
+        has_target = self.target >= 0
+        hit[has_source] = mask[self.source[has_source]]
+        hit[has_target] |= mask[self.target[has_target]]
+        return np.flatnonzero(hit)
+
+    # ------------------------------------------------------------------
+    # CSR adjacency
+    # ------------------------------------------------------------------
+
+    def _ensure_csr(self) -> None:
+        """Build the undirected CSR adjacency (indptr / neighbours / edge index)."""
+        if self._indptr is not None:
+            return
+        valid = np.flatnonzero((self.source >= 0) & (self.target >= 0))
+        src = self.source[valid].astype(np.int64)
+        tgt = self.target[valid].astype(np.int64)
+
+        heads = np.concatenate([src, tgt])
+        order = np.argsort(heads, kind="stable")
+        counts = np.bincount(heads, minlength=self.num_nodes)
+
+        self._indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(counts, out=self._indptr[1:])
+        self._adjacent = np.concatenate([tgt, src])[order].astype(np.int32)
+        self._incident = np.concatenate([valid, valid])[order].astype(np.int32)
+
+    def neighbors(self, row: int) -> np.ndarray:
+        """Return the neighbour node indices of a node (one entry per incident edge)."""
+        self._ensure_csr()
+        return self._adjacent[self._indptr[row] : self._indptr[row + 1]]
+
+    def incident_edges(self, row: int) -> np.ndarray:
+        """Return the indices of the edges incident to a node, in edge order per side."""
+        self._ensure_csr()
+        return self._incident[self._indptr[row] : self._indptr[row + 1]]
+
+    def degree(self) -> np.ndarray:
+        """Return the (num_nodes,) undirected degree of every node."""
+        self._ensure_csr()
+        return np.diff(self._indptr)
+
+    def neighborhood(self, seeds: Iterable[int], hops: int) -> np.ndarray:
+        """
+        Breadth-first search over the undirected adjacency.
+
+        Args:
+            seeds: Node indices to start from
+            hops: Maximum graph distance
+
+        Returns:
+            Sorted node indices within 'hops' of any seed (seeds included)
+        """
+        self._ensure_csr()
+        visited = np.zeros(self.num_nodes, dtype=bool)
+        frontier = np.unique(np.asarray(list(seeds), dtype=np.int64))
+        visited[frontier] = True
+
+        for _ in range(hops):
+            if frontier.size == 0:
+                break
+            starts = self._indptr[frontier]
+            lengths = self._indptr[frontier + 1] - starts
+            total = int(lengths.sum())
+            if total == 0:
+                break
+            # Gather all CSR slices of the frontier at once
+            offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+            reached = self._adjacent[offsets + np.arange(total)]
+            reached = np.unique(reached[~visited[reached]])
+            visited[reached] = True
+            frontier = reached.astype(np.int64)
+
+        return np.flatnonzero(visited)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Load a P&ID JSON/JSON-LD file into the shared graph model and print stats."
+    )
+    parser.add_argument("input", type=Path, help="Path to JSON-LD or PNID JSON file")
+    args = parser.parse_args()
+
+    if not args.input.exists():
+        print(f"❌ Error: File not found: {args.input}")
+        sys.exit(1)
+
+    graph = PnidGraph.load(args.input)
+    degree = graph.degree()
+    terminals = graph.num_nodes - graph.n_components
+
+    print(f"📊 {args.input}")
+    print(f"   Components: {graph.n_components}")
+    print(f"   Terminals:  {terminals}")
+    print(f"   Edges:      {graph.num_edges}")
+    if graph.n_components:
+        isolated = int(np.count_nonzero(degree[: graph.n_components] == 0))
+        print(f"   Isolated components: {isolated}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,359 @@
+"""Tile-and-merge P&ID extraction for oversized diagrams.
+
+A single request for a whole dense sheet makes the model miss components, and latency grows
+with image size. This mode splits the sheet into overlapping tiles, extracts every tile
+concurrently (wall time ≈ the slowest tile) and merges the per-tile PNID results:
+
+- Coordinates are shifted from tile pixels to sheet pixels.
+- Components are de-duplicated spatially: detections with the same label (and category)
+  closer than ``merge_radius`` are one component; the copy seen furthest from its tile's
+  border (least likely to be cut off) wins.
+- Pipe endpoints are remapped to the merged component ids. Pipes that leave a tile are
+  reported with an OFF_TILE endpoint; stubs with the same label whose known ends lie in
+  different tiles are joined into one pipe, and duplicate pipes from overlapping tiles
+  are dropped.
+
+Usage:
+    from pnid_tiling import extract_pnid_tiled
+
+    result = extract_pnid_tiled(
+        "data/input/large_sheet.png", provider=Provider.AZURE_ANTHROPIC, tile_size=2048
+    )
+
+    python src/pnid_agent.py large_sheet.png -p google --tile-size 2048 --tile-overlap 256
+"""
+
+import asyncio
+import io
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from PIL import Image
+from pydantic_ai import BinaryContent
+
+from image_prep import ImagePrep
+from pnid_agent import Provider, create_agent, load_image_content, run_extraction_async
+
+# Endpoint name the model is asked to use for pipes that continue outside the tile
+OFF_TILE = "OFF-TILE"
+
+
+@dataclass
+class Tile:
+    """A rectangular crop of the sheet."""
+
+    row: int
+    col: int
+    x0: int
+    y0: int
+    x1: int
+    y1: int
+
+    def border_distance(self, x: float, y: float, width: int, height: int) -> float:
+        """Distance from a sheet point to the nearest tile edge that is not a sheet edge."""
+        distances = [math.inf]
+        if self.x0 > 0:
+            distances.append(x - self.x0)
+        if self.y0 > 0:
+            distances.append(y - self.y0)
+        if self.x1 < width:
+            distances.append(self.x1 - x)
+        if self.y1 < height:
+            distances.append(self.y1 - y)
+        return min(distances)
+
+
+def tile_grid(width: int, height: int, tile_size: int, overlap: int) -> list[Tile]:
+    """Cover a width × height sheet with tiles of at most tile_size px overlapping by overlap px."""
+    if overlap >= tile_size:
+        raise ValueError("tile overlap must be smaller than the tile size")
+
+    def starts(length: int) -> list[int]:
+        if length <= tile_size:
+            return [0]
+        count = math.ceil((length - overlap) / (tile_size - overlap))
+        step = (length - tile_size) / (count - 1)
+        return [round(i * step) for i in range(count)]
+
+    return [
+        Tile(row, col, x0, y0, min(x0 + tile_size, width), min(y0 + tile_size, height))
+        for row, y0 in enumerate(starts(height))
+        for col, x0 in enumerate(starts(width))
+    ]
+
+
+def _tile_prompt(tile: Tile, tiles: list[Tile], width: int, height: int) -> str:
+    rows = max(t.row for t in tiles) + 1
+    cols = max(t.col for t in tiles) + 1
+    return (
+        f"This image is tile row {tile.row + 1}/{rows}, column {tile.col + 1}/{cols} of a larger "
+        f"P&ID sheet ({width}x{height} px); it covers x={tile.x0}..{tile.x1}, "
+        f"y={tile.y0}..{tile.y1} of the sheet. Report coordinates in this tile's own pixels. "
+        f"Only include components whose symbol is visible in this tile. For a pipe that "
+        f"continues beyond the tile edge, use '{OFF_TILE}' as its source or target and keep "
+        f"its line label so it can be joined with the neighbouring tile."
+    )
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def merge_tile_results(
+    tile_results: list[tuple[Tile, dict[str, Any]]],
+    width: int,
+    height: int,
+    merge_radius: float,
+) -> dict[str, Any]:
+    """Merge per-tile PNID data (coordinates already in sheet pixels) into one PNID.
+
+    Args:
+        tile_results: (tile, PNID dict) pairs
+        width: Sheet width in pixels
+        height: Sheet height in pixels
+        merge_radius: Max distance (px) between detections of the same component
+
+    Returns:
+        PNID dict with de-duplicated components and reconciled pipes
+    """
+    # --- Components: greedy spatial clustering per (label, category), best-centred copy wins
+    candidates = []
+    for tile_index, (tile, pnid) in enumerate(tile_results):
+        for component in pnid["components"]:
+            margin = tile.border_distance(component["x"], component["y"], width, height)
+            candidates.append((margin, tile_index, component))
+    candidates.sort(key=lambda item: -item[0])
+
+    merged: list[dict[str, Any]] = []
+    clusters: dict[tuple[str, str], list[int]] = {}
+    local_to_global: dict[tuple[int, str], str] = {}
+    used_ids: set[str] = set()
+
+    for _, tile_index, component in candidates:
+        key = (_normalize(component["label"]), _normalize(component["category"]))
+        target = None
+        for index in clusters.get(key, []):
+            kept = merged[index]
+            if math.hypot(kept["x"] - component["x"], kept["y"] - component["y"]) <= merge_radius:
+                target = kept
+                break
+        if target is None:
+            target = dict(component)
+            base_id, suffix = target["id"], 2
+            while target["id"] in used_ids:
+                target["id"] = f"{base_id}_{suffix}"
+                suffix += 1
+            used_ids.add(target["id"])
+            clusters.setdefault(key, []).append(len(merged))
+            merged.append(target)
+        local_to_global[(tile_index, component["id"])] = target["id"]
+
+    # A pipe may name a component that only another tile listed; match by id or label
+    # when the name is unambiguous across the sheet
+    by_name: dict[str, set[str]] = {}
+    for (_, local_id), global_id in local_to_global.items():
+        by_name.setdefault(_normalize(local_id), set()).add(global_id)
+    for component in merged:
+        by_name.setdefault(_normalize(component["label"]), set()).add(component["id"])
+
+    # --- Pipes: remap endpoints, then join border stubs and drop duplicates
+    def resolve(tile_index: int, endpoint: str) -> str | None:
+        """Merged id for a tile-local endpoint, None for an off-tile stub end."""
+        if endpoint == OFF_TILE:
+            return None
+        if (tile_index, endpoint) in local_to_global:
+            return local_to_global[(tile_index, endpoint)]
+        matches = by_name.get(_normalize(endpoint), set())
+        return next(iter(matches)) if len(matches) == 1 else endpoint
+
+    complete: list[tuple[float, dict[str, Any]]] = []
+    stubs: list[tuple[float, int, dict[str, Any]]] = []
+    for tile_index, (tile, pnid) in enumerate(tile_results):
+        for pipe in pnid["pipes"]:
+            margin = tile.border_distance(pipe["x"], pipe["y"], width, height)
+            pipe = {
+                **pipe,
+                "source": resolve(tile_index, pipe["source"]),
+                "target": resolve(tile_index, pipe["target"]),
+            }
+            if pipe["source"] is None or pipe["target"] is None:
+                stubs.append((margin, tile_index, pipe))
+            else:
+                complete.append((margin, pipe))
+
+    # Join an outgoing stub (known source) with an incoming stub (known target) from
+    # another tile that carries the same line label
+    incoming: dict[str, list[int]] = {}
+    for index, (_, _, pipe) in enumerate(stubs):
+        if pipe["source"] is None and pipe["target"] is not None:
+            incoming.setdefault(_normalize(pipe["label"]), []).append(index)
+
+    joined: set[int] = set()
+    for index, (margin, tile_index, pipe) in enumerate(stubs):
+        label = _normalize(pipe["label"])
+        if pipe["source"] is None or pipe["target"] is not None or not label:
+            continue
+        for other in incoming.get(label, []):
+            other_margin, other_tile, other_pipe = stubs[other]
+            if other in joined or other_tile == tile_index:
+                continue
+            joined.update((index, other))
+            # Keep the label position from the copy seen furthest from a tile border
+            best = pipe if margin >= other_margin else other_pipe
+            complete.append(
+                (
+                    max(margin, other_margin),
+                    {**best, "source": pipe["source"], "target": other_pipe["target"]},
+                )
+            )
+            break
+
+    for index, (margin, _, pipe) in enumerate(stubs):
+        if index in joined or (pipe["source"] is None and pipe["target"] is None):
+            continue
+        # Unmatched stub: keep it, naming the open end like other off-sheet connections
+        open_end = f"External - {pipe['label'] or 'unknown'}"
+        complete.append(
+            (
+                margin,
+                {
+                    **pipe,
+                    "source": pipe["source"] or open_end,
+                    "target": pipe["target"] or open_end,
+                },
+            )
+        )
+
+    pipes: list[dict[str, Any]] = []
+    seen: dict[tuple[str, str, str], int] = {}
+    for _, pipe in sorted(complete, key=lambda item: -item[0]):
+        key = (pipe["source"], pipe["target"], _normalize(pipe["label"]))
+        if key in seen:
+            continue
+        seen[key] = len(pipes)
+        pipes.append(pipe)
+
+    return {"components": merged, "pipes": pipes}
+
+
+async def extract_pnid_tiled_async(
+    image_path: str | Path,
+    provider: Provider = Provider.GOOGLE_GEMINI,
+    model_name: str | None = None,
+    output_path: str | Path | None = None,
+    tile_size: int = 2048,
+    tile_overlap: int = 256,
+    max_concurrency: int = 8,
+    merge_radius: float | None = None,
+    use_cache: bool = True,
+    image_prep: ImagePrep | None = None,
+) -> dict[str, Any]:
+    """Extract a P&ID tile by tile, concurrently, and merge the results.
+
+    Args:
+        image_path: Path to the P&ID diagram image
+        provider: AI provider to use
+        model_name: Optional model name override
+        output_path: Optional path to save JSON output
+        tile_size: Tile edge length in sheet pixels
+        tile_overlap: Overlap between neighbouring tiles in pixels (should exceed the
+            size of the largest symbol so every component is whole in some tile)
+        max_concurrency: Maximum tile requests in flight
+        merge_radius: Distance below which same-label detections are merged
+            (default: half the overlap)
+        use_cache: Reuse cached per-tile results (see llm_cache)
+        image_prep: Optional downscale / re-encode of each tile before sending
+
+    Returns:
+        Same dictionary as extract_pnid, plus "tiles" (tile count)
+    """
+    image_path = Path(image_path)
+    source = load_image_content(image_path)
+    # Large-format scans exceed Pillow's decompression-bomb limit; the input is trusted
+    max_image_pixels = Image.MAX_IMAGE_PIXELS
+    Image.MAX_IMAGE_PIXELS = None
+    try:
+        with Image.open(io.BytesIO(source.data)) as sheet:
+            sheet.load()
+    finally:
+        Image.MAX_IMAGE_PIXELS = max_image_pixels
+    width, height = sheet.size
+    tiles = tile_grid(width, height, tile_size, tile_overlap)
+    print(f"🔍 Extracting {len(tiles)} tile(s) of {tile_size}px from {width}x{height} sheet")
+
+    agent = create_agent(provider, model_name)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    def encode_tile(tile: Tile) -> tuple[bytes, str, float, float]:
+        buffer = io.BytesIO()
+        sheet.crop((tile.x0, tile.y0, tile.x1, tile.y1)).save(buffer, format="PNG")
+        data, media_type, scale_x, scale_y = buffer.getvalue(), "image/png", 1.0, 1.0
+        if image_prep is not None:
+            prepared = image_prep.apply(data, media_type)
+            data, media_type = prepared.data, prepared.media_type
+            scale_x, scale_y = prepared.scale_x, prepared.scale_y
+        return data, media_type, scale_x, scale_y
+
+    async def extract_tile(tile: Tile) -> tuple[Tile, dict[str, Any], str]:
+        # Encode inside the slot (off the event loop) so only in-flight tiles are held
+        async with semaphore:
+            data, media_type, scale_x, scale_y = await asyncio.to_thread(encode_tile, tile)
+            output, model = await run_extraction_async(
+                provider,
+                model_name,
+                BinaryContent(data=data, media_type=media_type),
+                prompt_parts=[_tile_prompt(tile, tiles, width, height)],
+                agent=agent,
+                use_cache=use_cache,
+            )
+
+        # Tile (possibly downscaled) pixels -> sheet pixels
+        def to_sheet(item: dict[str, Any]) -> dict[str, Any]:
+            return {
+                **item,
+                "x": item["x"] / scale_x + tile.x0,
+                "y": item["y"] / scale_y + tile.y0,
+            }
+
+        output = {
+            "components": [to_sheet(c) for c in output["components"]],
+            "pipes": [to_sheet(p) for p in output["pipes"]],
+        }
+        print(
+            f"   Tile ({tile.row}, {tile.col}): {len(output['components'])} components, "
+            f"{len(output['pipes'])} pipes"
+        )
+        return tile, output, model
+
+    results = await asyncio.gather(*(extract_tile(tile) for tile in tiles))
+    merged = merge_tile_results(
+        [(tile, output) for tile, output, _ in results],
+        width,
+        height,
+        merge_radius if merge_radius is not None else tile_overlap / 2,
+    )
+
+    output_data = {
+        "output": merged,
+        "provider": provider.value,
+        "model": results[0][2] if results else model_name or "unknown",
+        "image_path": str(image_path),
+        "tiles": len(tiles),
+    }
+
+    # Save to file if requested
+    if output_path:
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(output_data, indent=4, ensure_ascii=False))
+        print(f"✅ Saved output to: {output_path}")
+
+    return output_data
+
+
+def extract_pnid_tiled(*args: Any, **kwargs: Any) -> dict[str, Any]:
+    """Synchronous wrapper for extract_pnid_tiled_async (same arguments)."""
+    return asyncio.run(extract_pnid_tiled_async(*args, **kwargs))
@@ -0,0 +1,113 @@
+"""The streaming DEXPI parser must match the ElementTree parser; batch conversion state."""
+
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from dexpi_reader import collect_xml_files, convert_batch, parse_dexpi_xml
+
+SAMPLES = Path(__file__).resolve().parent.parent / "data" / "input" / "TrainingTestCases-master"
+SAMPLE_FILES = sorted(SAMPLES.rglob("*.xml"))
+
+
+@pytest.mark.skipif(not SAMPLE_FILES, reason="DEXPI training test cases not available")
+@pytest.mark.parametrize(
+    "xml_path", SAMPLE_FILES, ids=[str(p.relative_to(SAMPLES)) for p in SAMPLE_FILES]
+)
+def test_stream_matches_tree(xml_path):
+    stream = parse_dexpi_xml(xml_path, method="stream", verbose=False)
+    tree = parse_dexpi_xml(xml_path, method="tree", verbose=False)
+    assert stream == tree
+
+
+def test_reference_pid_is_not_empty():
+    xml_path = next((p for p in SAMPLE_FILES if p.name.startswith("C01V04")), None)
+    if xml_path is None:
+        pytest.skip("DEXPI reference P&ID not available")
+    graph = parse_dexpi_xml(xml_path, verbose=False)["@graph"]
+    assert any(item.get("@type") == "pid:Connection" for item in graph)
+    assert len(graph) > 50
+
+
+def dexpi_xml(tag: str) -> str:
+    return (
+        f'<PlantModel><Equipment ID="T1" ComponentClass="Tank" TagName="{tag}"/>'
+        '<Equipment ID="T2" ComponentClass="Tank"/><PipingNetworkSystem>'
+        '<PipingNetworkSegment ID="S1"><Connection FromID="T1" ToID="T2"/>'
+        "</PipingNetworkSegment></PipingNetworkSystem></PlantModel>"
+    )
+
+
+@pytest.fixture
+def dexpi_dir(tmp_path):
+    root = tmp_path / "in"
+    (root / "sub").mkdir(parents=True)
+    (root / "a.xml").write_text(dexpi_xml("T-A"), encoding="utf-8")
+    (root / "sub" / "b.xml").write_text(dexpi_xml("T-B"), encoding="utf-8")
+    (root / "bad.xml").write_text("<PlantModel><Equipment", encoding="utf-8")
+    (root / "notes.txt").write_text("not DEXPI", encoding="utf-8")
+    return root
+
+
+def test_collect_xml_files(dexpi_dir):
+    names = ["a.xml", "bad.xml", "sub/b.xml"]
+    found = collect_xml_files([str(dexpi_dir)], recursive=True)
+    assert [p.relative_to(dexpi_dir).as_posix() for p in found] == names
+    assert collect_xml_files([str(dexpi_dir)]) == found[:2]
+    # Files named twice (directly and through a pattern) are kept once
+    found = collect_xml_files([str(dexpi_dir / "sub" / "b.xml"), str(dexpi_dir / "**" / "*.xml")])
+    assert [p.relative_to(dexpi_dir).as_posix() for p in found] == ["sub/b.xml", "a.xml", "bad.xml"]
+    with pytest.raises(FileNotFoundError):
+        collect_xml_files([str(dexpi_dir / "missing")])
+
+
+def test_convert_batch_skips_unchanged_files(dexpi_dir, tmp_path):
+    files = collect_xml_files([str(dexpi_dir)], recursive=True)
+    out = tmp_path / "out"
+
+    def statuses(summary):
+        return {Path(e["input"]).name: e["status"] for e in summary["files"]}
+
+    summary = convert_batch(files, out, workers=1)
+    assert statuses(summary) == {"a.xml": "ok", "bad.xml": "failed", "b.xml": "ok"}
+    assert (summary["ok"], summary["failed"], summary["skipped"]) == (2, 1, 0)
+    for name in ("a", "sub/b"):
+        output = out / f"{name}.json"
+        expected = parse_dexpi_xml(dexpi_dir / f"{name}.xml", verbose=False)
+        assert json.loads(output.read_text(encoding="utf-8")) == expected
+    assert not (out / "bad.json").exists()
+    assert not list(out.rglob("*.tmp"))
+    assert json.loads((out / "summary.json").read_text(encoding="utf-8")) == summary
+
+    # Nothing changed: converted files are skipped by mtime/size, failures are retried
+    summary = convert_batch(files, out, workers=1)
+    assert statuses(summary) == {"a.xml": "skipped", "b.xml": "skipped", "bad.xml": "failed"}
+
+    # Touched but identical content is hashed, not parsed; edited content is converted
+    stat = (dexpi_dir / "a.xml").stat()
+    os.utime(dexpi_dir / "a.xml", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    (dexpi_dir / "sub" / "b.xml").write_text(dexpi_xml("T-B2"), encoding="utf-8")
+    summary = convert_batch(files, out, workers=1)
+    assert statuses(summary) == {"a.xml": "unchanged", "bad.xml": "failed", "b.xml": "ok"}
+    assert "T-B2" in (out / "sub" / "b.json").read_text(encoding="utf-8")
+
+    # force converts everything again, here through the process pool
+    summary = convert_batch(files, out, workers=2, force=True)
+    assert statuses(summary) == {"a.xml": "ok", "bad.xml": "failed", "b.xml": "ok"}
+    assert not list(out.rglob("*.tmp"))
+
+
+def test_forced_partial_run_keeps_state_of_other_files(dexpi_dir, tmp_path):
+    a, b = dexpi_dir / "a.xml", dexpi_dir / "sub" / "b.xml"
+    out = tmp_path / "out"
+    convert_batch([a, b], out, workers=1)
+
+    summary = convert_batch([a], out, workers=1, force=True)
+    assert [e["status"] for e in summary["files"]] == ["ok"]
+    state = json.loads((out / "batch_state.json").read_text(encoding="utf-8"))
+    assert sorted(state) == sorted(str(p.resolve()) for p in (a, b))
+
+    summary = convert_batch([a, b], out, workers=1)
+    assert [e["status"] for e in summary["files"]] == ["skipped", "skipped"]
@@ -0,0 +1,205 @@
+"""Pipe network grouping and connectivity in dwg_reader, checked on small layouts."""
+
+import math
+
+import ezdxf
+import numpy as np
+import pytest
+
+from dwg_reader import (
+    PIDNode,
+    _entity_byte_ranges,
+    _iter_entity_range,
+    build_pipe_network,
+    infer_network_connectivity,
+    scan_dxf_parallel,
+    scan_modelspace,
+    stream_modelspace,
+)
+
+
+def node(node_id: str, x: float, y: float) -> PIDNode:
+    return PIDNode(
+        id=node_id,
+        type="pid:Valve",
+        name=None,
+        tag=None,
+        layer=None,
+        x=x,
+        y=y,
+        block_name=None,
+        line_number=None,
+    )
+
+
+def point_segment_distance(px, py, x1, y1, x2, y2):
+    dx, dy = x2 - x1, y2 - y1
+    length_sq = dx * dx + dy * dy
+    t = 0.0 if length_sq == 0 else max(0.0, min(1.0, ((px - x1) * dx + (py - y1) * dy) / length_sq))
+    return math.hypot(px - (x1 + t * dx), py - (y1 + t * dy))
+
+
+def brute_network_labels(segments: np.ndarray, tolerance: float) -> list[int]:
+    """Pairwise scan: join two segments when an endpoint of one snaps onto the other."""
+    parent = list(range(len(segments)))
+
+    def find(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for i, (x1, y1, x2, y2) in enumerate(segments.tolist()):
+        for j, other in enumerate(segments.tolist()):
+            if i == j:
+                continue
+            if min(point_segment_distance(x, y, *other) for x, y in ((x1, y1), (x2, y2))) <= (
+                tolerance
+            ):
+                ri, rj = find(i), find(j)
+                parent[max(ri, rj)] = min(ri, rj)
+    return [find(i) for i in range(len(segments))]
+
+
+@pytest.mark.parametrize("seed, count", [(0, 20), (1, 150), (2, 400)])
+@pytest.mark.parametrize("tolerance", [0.0, 5.0, 20.0])
+def test_build_pipe_network_matches_pairwise_scan(seed, count, tolerance):
+    rng = np.random.default_rng(seed)
+    start = rng.integers(0, 1000, size=(count, 2))
+    # Mostly horizontal/vertical pipe pieces, some sharing endpoints with earlier ones
+    length = rng.integers(10, 150, size=count)
+    horizontal = rng.random(count) < 0.5
+    end = start + np.stack([length * horizontal, length * ~horizontal], axis=1)
+    shared = rng.random(count) < 0.3
+    shared[0] = False
+    start[shared] = end[rng.integers(0, count, size=shared.sum())]
+    segments = np.hstack([start, end]).astype(np.float64)
+
+    labels = build_pipe_network(segments, tolerance)
+    assert labels.tolist() == brute_network_labels(segments, tolerance)
+
+
+def test_build_pipe_network_joins_tees_not_crossings():
+    segments = np.array(
+        [
+            [0, 0, 100, 0],  # header
+            [50, 0, 50, 80],  # tee branch ending on the header interior
+            [0, 40, 100, 40],  # crosses the branch without ending on it
+            [103, 40, 200, 40],  # continues the crossing line across a 3-unit gap
+        ],
+        dtype=np.float64,
+    )
+    assert build_pipe_network(segments, snap_tolerance=5.0).tolist() == [0, 0, 2, 2]
+    assert build_pipe_network(segments, snap_tolerance=1.0).tolist() == [0, 0, 2, 3]
+
+
+def test_inline_valves_form_a_chain():
+    segments = np.array([[0, 0, 300, 0]], dtype=np.float64)
+    nodes = [node(f"v{i}", x, 0.0) for i, x in enumerate([0.0, 200.0, 100.0, 300.0])]
+    junctions, edges = infer_network_connectivity(nodes, segments)
+    assert junctions == []
+    assert sorted((e.source, e.target) for e in edges) == [
+        ("v0", "v2"),
+        ("v1", "v2"),
+        ("v1", "v3"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "segments",
+    [
+        [[0, 0, 100, 0], [100, 0, 200, 0]],
+        [[0, 0, 100, 0], [200, 0, 100, 0]],
+        [[100, 0, 0, 0], [100, 0, 200, 0]],
+        [[100, 0, 0, 0], [200, 0, 100, 0]],
+    ],
+)
+def test_inline_valve_chain_ignores_segment_direction(segments):
+    segments = np.array(segments, dtype=np.float64)
+    nodes = [node("a", 0, 0), node("b", 100, 0), node("c", 200, 0)]
+    junctions, edges = infer_network_connectivity(nodes, segments)
+    assert junctions == []
+    assert sorted((e.source, e.target) for e in edges) == [("a", "b"), ("b", "c")]
+
+
+def test_tee_between_components_gets_a_junction():
+    segments = np.array(
+        [[0, 0, 100, 0], [100, 0, 200, 0], [100, 0, 100, 100]],
+        dtype=np.float64,
+    )
+    nodes = [node("pump", 0, 0), node("tank", 200, 0), node("valve", 100, 100)]
+    junctions, edges = infer_network_connectivity(nodes, segments)
+
+    assert [j.type for j in junctions] == ["pid:PipeJunction"]
+    assert sorted((e.source, e.target) for e in edges) == [
+        (junctions[0].id, "pump"),
+        (junctions[0].id, "tank"),
+        (junctions[0].id, "valve"),
+    ]
+
+
+def test_unconnected_nodes_have_no_edges():
+    segments = np.array([[0, 0, 100, 0], [0, 50, 100, 50]], dtype=np.float64)
+    nodes = [node("a", 0, 0), node("b", 100, 50), node("c", 500, 500)]
+    assert infer_network_connectivity(nodes, segments) == ([], [])
+
+
+@pytest.fixture
+def pid_dxf(tmp_path):
+    """ASCII DXF with attributed valve INSERTs, pipe LINEs/LWPOLYLINEs and paperspace noise."""
+    doc = ezdxf.new()
+    block = doc.blocks.new("VALVE")
+    block.add_line((-5, 0), (5, 0))
+    block.add_attdef("TAG", (0, 5))
+    msp = doc.modelspace()
+    rng = np.random.default_rng(9)
+    for i in range(60):
+        x, y = (float(v) for v in rng.integers(0, 1000, size=2))
+        insert = msp.add_blockref("VALVE", (x, y), dxfattribs={"layer": "VALVES"})
+        insert.add_attrib("TAG", f"V-{i:03d}", (x, y + 5))
+        msp.add_line((x, y), (x + 50, y), dxfattribs={"layer": "PIPE"})
+        msp.add_lwpolyline([(x, y), (x, y + 40), (x + 30, y + 40)], dxfattribs={"layer": "PIPE"})
+        msp.add_circle((x, y), 3)
+    doc.layout("Layout1").add_line((0, 0), (10, 10), dxfattribs={"layer": "PIPE"})
+    path = tmp_path / "pid.dxf"
+    doc.saveas(path)
+    return path
+
+
+def entity_summary(entity) -> tuple:
+    attribs = tuple(a.dxf.text for a in getattr(entity, "attribs", ()))
+    return entity.dxftype(), entity.dxf.handle, entity.dxf.layer, attribs
+
+
+def test_entity_ranges_match_iterdxf(pid_dxf):
+    # Pins the ezdxf internals used by _iter_entity_range to iterdxf's behaviour
+    expected = [entity_summary(e) for e in stream_modelspace(pid_dxf)]
+    encoding = ezdxf.filemanagement.dxf_file_info(str(pid_dxf)).encoding
+    ranges = _entity_byte_ranges(pid_dxf, chunk_bytes=2000)
+    assert len(ranges) > 5
+    chunked = [
+        entity_summary(e)
+        for start, stop in ranges
+        for e in _iter_entity_range(str(pid_dxf), encoding, start, stop)
+    ]
+    assert chunked == expected
+    assert sum(1 for kind, *_ in expected if kind == "INSERT") == 60
+
+
+def test_parallel_scan_matches_streaming_scan(pid_dxf):
+    streamed = scan_modelspace(stream_modelspace(pid_dxf))
+    chunked = scan_dxf_parallel(pid_dxf, workers=1, chunk_bytes=2000)
+    assert chunked.nodes == streamed.nodes
+    assert chunked.pipe_vertices == streamed.pipe_vertices
+    np.testing.assert_array_equal(chunked.pipe_segments, streamed.pipe_segments)
+    assert len(streamed.nodes) == 60
+    assert len(streamed.pipe_segments) == 60 * 3
+
+
+def test_parallel_scan_of_empty_modelspace(tmp_path):
+    path = tmp_path / "empty.dxf"
+    ezdxf.new().saveas(path)
+    streamed = scan_modelspace(stream_modelspace(path))
+    chunked = scan_dxf_parallel(path, workers=1)
+    assert chunked.nodes == streamed.nodes == []
+    assert chunked.pipe_vertices == streamed.pipe_vertices == []
+    assert chunked.pipe_segments.shape == streamed.pipe_segments.shape == (0, 4)
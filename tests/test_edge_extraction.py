@@ -0,0 +1,265 @@
+"""Parity tests for the geometry post-processing in opencv_edge_extraction."""
+
+import math
+import random
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import cv2
+import numpy as np
+import pytest
+from benchmark_edge_extraction import make_synthetic_lines
+from opencv_edge_extraction import (
+    LineTable,
+    PNIDEdgeExtractor,
+    _map_bounded,
+    _merge_collinear_segments,
+    _tile_grid,
+    format_features_for_llm,
+    scale_features,
+)
+
+
+def random_lines(count: int, seed: int, side: int = 400) -> list[dict[str, Any]]:
+    """Uniformly random segments on a small canvas, so endpoints often cluster."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        x1, y1, x2, y2 = (rng.randrange(side) for _ in range(4))
+        angle = math.degrees(math.atan2(y2 - y1, x2 - x1))
+        lines.append(
+            {
+                "start": [x1, y1],
+                "end": [x2, y2],
+                "center": [int((x1 + x2) / 2), int((y1 + y2) / 2)],
+                "length": math.hypot(x2 - x1, y2 - y1),
+                "angle": angle,
+                "orientation": "vertical" if 60 < abs(angle) < 120 else "horizontal",
+            }
+        )
+    return lines
+
+
+CASES = [
+    *(
+        pytest.param(make_synthetic_lines(n, seed=seed), id=f"chain-{n}-{seed}")
+        for n, seed in [(50, 0), (200, 1), (400, 2)]
+    ),
+    *(
+        pytest.param(random_lines(n, seed=seed), id=f"random-{n}-{seed}")
+        for n, seed in [(40, 3), (120, 4), (250, 5)]
+    ),
+]
+
+
+@pytest.mark.parametrize("lines", CASES)
+@pytest.mark.parametrize("threshold", [5.0, 10.0, 25.0])
+def test_detect_junctions_grid_matches_scan(lines, threshold):
+    extractor = PNIDEdgeExtractor()
+    grid = extractor.detect_junctions(lines, threshold, method="grid")
+    scan = extractor.detect_junctions(lines, threshold, method="scan")
+    # Same junctions, in the same (creation) order, with the same member lines
+    assert list(grid.items()) == list(scan.items())
+
+
+@pytest.mark.parametrize("lines", CASES)
+@pytest.mark.parametrize("threshold", [5.0, 10.0, 25.0])
+def test_trace_pipe_routes_grid_matches_scan(lines, threshold):
+    extractor = PNIDEdgeExtractor()
+    grid = extractor.trace_pipe_routes(lines, threshold, method="grid")
+    scan = extractor.trace_pipe_routes(lines, threshold, method="scan")
+    assert grid == scan
+
+
+def test_unknown_method_rejected():
+    extractor = PNIDEdgeExtractor()
+    with pytest.raises(ValueError):
+        extractor.detect_junctions(random_lines(5, seed=0), method="bogus")
+
+
+def hough_line_dicts(hough_lines: np.ndarray) -> list[dict[str, Any]]:
+    """Per-line dictionaries as detect_lines_hough built them before LineTable."""
+    lines = []
+    for line in hough_lines:
+        x1, y1, x2, y2 = line[0]
+        length = np.sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
+        angle = np.arctan2(y2 - y1, x2 - x1) * 180 / np.pi
+        orientation = "horizontal"
+        if 60 < abs(angle) < 120:
+            orientation = "vertical"
+        elif 30 < abs(angle) < 60 or 120 < abs(angle) < 150:
+            orientation = "diagonal"
+        lines.append(
+            {
+                "start": [int(x1), int(y1)],
+                "end": [int(x2), int(y2)],
+                "center": [int((x1 + x2) / 2), int((y1 + y2) / 2)],
+                "length": float(length),
+                "angle": float(angle),
+                "orientation": orientation,
+            }
+        )
+    return lines
+
+
+def test_line_table_matches_per_line_dicts():
+    hough = np.random.default_rng(6).integers(0, 2000, size=(300, 1, 4), dtype=np.int32)
+    table = LineTable.from_hough(hough)
+    expected = hough_line_dicts(hough)
+
+    assert table.to_dicts() == expected
+    assert list(table) == expected
+    assert [table[i] for i in range(len(table))] == expected
+    assert table.orientation.tolist() == [line["orientation"] for line in expected]
+    assert table.center.tolist() == [line["center"] for line in expected]
+
+
+def test_line_table_round_trip():
+    lines = random_lines(200, seed=7)
+    table = LineTable.from_dicts(lines)
+    assert table.to_dicts() == lines
+    assert LineTable.coerce(table) is table
+    assert LineTable.coerce(lines).to_dicts() == lines
+
+    vertical = table.mask("vertical")
+    assert table.take(vertical).to_dicts() == [
+        line for line in lines if line["orientation"] == "vertical"
+    ]
+    assert table[10:20].to_dicts() == lines[10:20]
+
+
+def test_line_table_empty():
+    table = LineTable.from_hough(None)
+    assert len(table) == 0
+    assert table.to_dicts() == []
+    assert LineTable.from_dicts([]).to_dicts() == []
+
+
+@pytest.mark.parametrize("width, height", [(900, 600), (256, 256), (257, 1000)])
+def test_tile_cores_cover_image_once(width, height):
+    coverage = np.zeros((height, width), dtype=np.int32)
+    for (ex0, ey0, ex1, ey1), (cx0, cy0, cx1, cy1) in _tile_grid(width, height, 256, 64):
+        coverage[cy0:cy1, cx0:cx1] += 1
+        assert (ex0, ey0) == (max(cx0 - 64, 0), max(cy0 - 64, 0))
+        assert (ex1, ey1) == (min(cx1 + 64, width), min(cy1 + 64, height))
+    assert (coverage == 1).all()
+
+
+def split_segment(segment: list[int], rng: random.Random, max_gap: int) -> list[list[int]]:
+    """Cut an axis-aligned or 45° segment into pieces separated by gaps <= max_gap."""
+    x1, y1, x2, y2 = segment
+    steps = max(abs(x2 - x1), abs(y2 - y1))
+    sx, sy = (x2 > x1) - (x2 < x1), (y2 > y1) - (y2 < y1)
+    pieces, t = [], 0
+    while t < steps:
+        # Diagonal gaps are sqrt(2) longer than their step count
+        gap = rng.randint(0, max_gap // 2)
+        end = min(t + rng.randint(20, 120), steps)
+        if end + gap >= steps:
+            end = steps
+        piece = [x1 + sx * t, y1 + sy * t, x1 + sx * end, y1 + sy * end]
+        pieces.append(piece if rng.random() < 0.5 else piece[2:] + piece[:2])
+        t = end + gap
+    return pieces
+
+
+def normalized(segments: np.ndarray) -> list[tuple[int, ...]]:
+    return sorted(tuple(min(s[:2], s[2:]) + max(s[:2], s[2:])) for s in segments.tolist())
+
+
+def test_merge_collinear_segments_restores_split_lines():
+    rng = random.Random(8)
+    originals = [
+        [10, 100, 900, 100],
+        [10, 110, 900, 110],
+        [400, 0, 400, 700],
+        [100, 200, 600, 700],
+        [700, 650, 200, 650],
+    ]
+    pieces = [piece for segment in originals for piece in split_segment(segment, rng, 10)]
+    rng.shuffle(pieces)
+    merged = _merge_collinear_segments(np.array(pieces, dtype=np.int32), max_gap=10)
+    assert normalized(merged) == normalized(np.array(originals))
+
+
+def test_merge_collinear_segments_keeps_separate_lines():
+    segments = np.array(
+        [
+            [0, 0, 100, 0],
+            [130, 0, 200, 0],  # gap of 30 along the line
+            [0, 5, 100, 5],  # parallel, 5 px away
+            [0, 0, 0, 100],  # perpendicular, sharing an endpoint
+        ],
+        dtype=np.int32,
+    )
+    merged = _merge_collinear_segments(segments, max_gap=10)
+    assert normalized(merged) == normalized(segments)
+
+
+def drawing_with_long_lines() -> np.ndarray:
+    image = np.full((600, 900, 3), 255, dtype=np.uint8)
+    cv2.line(image, (50, 150), (850, 150), (0, 0, 0), 3)
+    cv2.line(image, (300, 50), (300, 550), (0, 0, 0), 3)
+    cv2.rectangle(image, (500, 300), (700, 450), (0, 0, 0), 3)
+    return image
+
+
+def test_tiled_detection_stitches_lines_across_seams():
+    image = drawing_with_long_lines()
+    extractor = PNIDEdgeExtractor()
+    tiled = extractor.extract_features_from_image(image, tile_size=256, max_workers=1)
+
+    # Both long lines cross several tile seams and must come back in one piece
+    lengths = sorted(line["length"] for line in tiled["lines"])
+    assert lengths[-1] > 790
+    assert sum(1 for length in lengths if length > 390) >= 4
+
+    whole = extractor.extract_features_from_image(image)
+    assert tiled["statistics"]["total_contours"] == whole["statistics"]["total_contours"]
+
+
+def test_tiled_detection_is_worker_independent():
+    image = drawing_with_long_lines()
+    extractor = PNIDEdgeExtractor()
+    serial = extractor.extract_features_from_image(image, tile_size=256, max_workers=1)
+    parallel = extractor.extract_features_from_image(image, tile_size=256, max_workers=2)
+    assert serial == parallel
+
+
+def test_map_bounded_keeps_order_and_limits_tasks_in_flight():
+    pulled = 0
+
+    def tasks():
+        nonlocal pulled
+        for k in range(50):
+            pulled += 1
+            yield k, k % 7
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        results = []
+        for result in _map_bounded(pool, pow, tasks(), window=4):
+            # Tasks are only pulled (and submitted) once earlier results are consumed
+            assert pulled <= len(results) + 1 + 4
+            results.append(result)
+    assert results == [pow(k, k % 7) for k in range(50)]
+
+
+def test_scale_features_maps_geometry_per_axis():
+    features = PNIDEdgeExtractor().extract_features_from_image(drawing_with_long_lines())
+    assert format_features_for_llm(scale_features(features, 1.0, 1.0)) == (
+        format_features_for_llm(features)
+    )
+
+    scaled = scale_features(features, 0.5, 0.25)
+    assert scaled["image_size"] == [450, 150]
+    for original, line in zip(features["lines"], scaled["lines"]):
+        assert line["start"] == [
+            round(original["start"][0] * 0.5),
+            round(original["start"][1] * 0.25),
+        ]
+    for original, contour in zip(features["contours"], scaled["contours"]):
+        assert contour["area"] == original["area"] * 0.125
+    assert scaled["statistics"]["total_lines"] == len(scaled["lines"])
+    assert scaled["statistics"]["total_line_length"] == pytest.approx(
+        sum(route["total_length"] for route in scaled["pipe_routes"])
+    )
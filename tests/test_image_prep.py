@@ -0,0 +1,45 @@
+"""Resize bookkeeping of ImagePrep."""
+
+import io
+
+import pytest
+from PIL import Image
+
+from image_prep import ImagePrep
+
+
+def png_bytes(width: int, height: int) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_unchanged_image_is_passed_through():
+    data = png_bytes(300, 200)
+    prepared = ImagePrep(max_long_edge=1000).apply(data, "image/png")
+    assert prepared.data is data
+    assert not prepared.resized
+    assert (prepared.scale_x, prepared.scale_y) == (1.0, 1.0)
+
+
+@pytest.mark.parametrize("size", [(999, 601), (601, 999), (1001, 3)])
+def test_scale_is_tracked_per_axis(size):
+    prepared = ImagePrep(max_long_edge=500, image_format="png").apply(png_bytes(*size), "")
+    with Image.open(io.BytesIO(prepared.data)) as image:
+        assert image.size == prepared.size
+    assert prepared.resized
+    assert prepared.scale_x == prepared.size[0] / size[0]
+    assert prepared.scale_y == prepared.size[1] / size[1]
+
+    # The far corner maps exactly onto the far corner in both directions
+    assert prepared.to_sent(*size) == pytest.approx(prepared.size)
+    assert prepared.to_original(*prepared.size) == pytest.approx(size)
+
+
+def test_resized_gif_is_labelled_with_the_encoded_format():
+    buffer = io.BytesIO()
+    Image.new("P", (800, 400)).save(buffer, format="GIF")
+    prepared = ImagePrep(max_long_edge=200).apply(buffer.getvalue(), "image/gif")
+    assert prepared.resized
+    with Image.open(io.BytesIO(prepared.data)) as image:
+        assert Image.MIME[image.format] == prepared.media_type
@@ -0,0 +1,136 @@
+"""LLM result cache: key derivation, LRU eviction and the running size total."""
+
+import os
+
+import pytest
+from pydantic import BaseModel
+
+import llm_cache
+from llm_cache import EVICT_LOW_WATER, LLMCache, get_cache, make_key
+
+
+def value_of_size(size: int) -> str:
+    """A JSON string value that encodes to exactly ``size`` bytes."""
+    return "x" * (size - 2)
+
+
+def set_mtime(cache: LLMCache, key: str, mtime: float) -> None:
+    os.utime(cache._path(key), (mtime, mtime))
+
+
+def test_get_miss_and_corrupt_entry(tmp_path):
+    cache = LLMCache(tmp_path)
+    assert cache.get("ab" * 32) is None
+
+    cache.put("cd" * 32, {"components": [1, 2]})
+    assert cache.get("cd" * 32) == {"components": [1, 2]}
+    cache._path("cd" * 32).write_text('{"components": [1,', encoding="utf-8")
+    assert cache.get("cd" * 32) is None
+
+
+def test_get_refreshes_mtime(tmp_path):
+    cache = LLMCache(tmp_path)
+    cache.put("ab" * 32, [1])
+    set_mtime(cache, "ab" * 32, 1_000_000)
+    assert cache.get("ab" * 32) == [1]
+    assert cache._path("ab" * 32).stat().st_mtime > 1_000_000
+
+
+def test_put_replacing_a_key_does_not_double_count(tmp_path):
+    cache = LLMCache(tmp_path, max_bytes=10_000)
+    cache.put("aa" * 32, value_of_size(100))
+    cache.put("bb" * 32, value_of_size(300))
+    assert cache._total_bytes == 400
+
+    cache.put("aa" * 32, value_of_size(50))
+    cache.put("bb" * 32, value_of_size(300))
+    assert cache._total_bytes == 350
+    assert cache.evict() == 0
+    assert cache._total_bytes == 350
+    assert not list(tmp_path.glob("*/*.tmp"))
+
+
+def test_evict_removes_least_recently_used_down_to_low_water(tmp_path):
+    cache = LLMCache(tmp_path, max_bytes=1000)
+    keys = [f"{i:02d}" * 32 for i in range(11)]
+    for i, key in enumerate(keys[:10]):
+        cache.put(key, value_of_size(100))
+        set_mtime(cache, key, 1_000_000 + i)
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0]) is not None
+    assert cache._total_bytes == 1000
+
+    cache.put(keys[10], value_of_size(100))
+
+    remaining = [key for key in keys if cache._path(key).exists()]
+    assert remaining == [keys[0], *keys[3:]]
+    assert cache._total_bytes == int(1000 * EVICT_LOW_WATER)
+    assert sum(p.stat().st_size for p in tmp_path.glob("*/*.json")) == cache._total_bytes
+
+
+def test_evict_below_limit_keeps_everything(tmp_path):
+    cache = LLMCache(tmp_path, max_bytes=1000)
+    for i in range(5):
+        cache.put(f"{i:02d}" * 32, value_of_size(100))
+    assert cache.evict(target_bytes=0) == 0
+    cache.clear()
+    assert not list(tmp_path.glob("*/*.json"))
+    assert cache._total_bytes == 0
+
+
+def test_get_cache_configuration(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_cache, "_default_cache", None)
+    monkeypatch.setenv("PNID_LLM_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("PNID_LLM_CACHE_MAX_MB", "2")
+    monkeypatch.delenv("PNID_LLM_CACHE", raising=False)
+
+    assert get_cache(False) is None
+    cache = get_cache()
+    assert (cache.cache_dir, cache.max_bytes) == (tmp_path, 2 * 1024 * 1024)
+    assert get_cache() is cache
+
+    for value in ("0", "false", "off"):
+        monkeypatch.setenv("PNID_LLM_CACHE", value)
+        assert get_cache() is None
+
+
+class Output(BaseModel):
+    label: str
+
+
+class OutputV2(BaseModel):
+    label: str
+    x: float
+
+
+BASE = {
+    "provider": "openai",
+    "model": "gpt-5",
+    "prompt": ["system", "user"],
+    "images": [b"\x89PNG image"],
+    "schema": Output,
+}
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"images": [b"\x89PNG image!"]},
+        {"images": [b"\x89PNG image", b"\x89PNG image"]},
+        {"prompt": ["system", "user "]},
+        {"prompt": "system"},
+        {"model": "gpt-5-mini"},
+        {"provider": "azure-openai"},
+        {"schema": OutputV2},
+        {"schema": None},
+        {"reasoning_effort": "high"},
+    ],
+)
+def test_make_key_changes_with_every_input(change):
+    assert make_key(**{**BASE, **change}) != make_key(**BASE)
+
+
+def test_make_key_is_stable():
+    assert make_key(**BASE) == make_key(**dict(BASE))
+    assert make_key(**BASE, effort="low", seed=1) == make_key(**BASE, seed=1, effort="low")
+    assert make_key(**{**BASE, "schema": Output.model_json_schema()}) == make_key(**BASE)
@@ -0,0 +1,225 @@
+"""Batch runner: input collection, output naming, checkpoint resume, retries and caching."""
+
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+import pnid_batch
+from pnid_agent import Provider
+from pnid_batch import _output_names, collect_images, load_checkpoint, run_batch
+
+PROVIDER = Provider.GOOGLE_GEMINI
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def result_for(image: Path, model: str = "fake-model") -> dict:
+    return {
+        "output": {"components": [{"id": image.stem}], "pipes": []},
+        "provider": PROVIDER.value,
+        "model": model,
+        "image_path": str(image),
+    }
+
+
+@pytest.fixture
+def images(tmp_path):
+    root = tmp_path / "drawings"
+    (root / "sub").mkdir(parents=True)
+    paths = [root / "a.png", root / "b.jpg", root / "sub" / "c.png"]
+    for path in paths:
+        path.write_bytes(b"image")
+    (root / "notes.txt").write_text("not an image", encoding="utf-8")
+    return paths
+
+
+@pytest.fixture
+def extractor(monkeypatch):
+    """Fake extract_pnid_async; set ``errors[name]`` to a list of exceptions to raise first."""
+    calls: list[str] = []
+    errors: dict[str, list[Exception]] = {}
+
+    async def fake_extract(image, provider, model_name=None, **kwargs):
+        calls.append(Path(image).name)
+        pending = errors.get(Path(image).name)
+        if pending:
+            raise pending.pop(0)
+        if not Path(image).exists():
+            raise FileNotFoundError(f"Image not found: {image}")
+        return result_for(Path(image))
+
+    monkeypatch.setattr(pnid_batch, "create_agent", lambda provider, model_name=None: object())
+    monkeypatch.setattr(pnid_batch, "extract_pnid_async", fake_extract)
+    monkeypatch.setattr(pnid_batch, "load_cached_extraction", lambda *args: None)
+    return calls, errors
+
+
+def batch(images, output_dir, **kwargs):
+    kwargs = {"rate_limits": {PROVIDER: 0}, "backoff_base": 0.0, **kwargs}
+    return asyncio.run(run_batch(images, [PROVIDER], output_dir, **kwargs))
+
+
+def statuses(summary):
+    return {Path(job["image_path"]).name: job["status"] for job in summary["jobs"]}
+
+
+def test_collect_images_from_directories_globs_and_manifests(images, tmp_path):
+    root = images[0].parent
+    assert collect_images([str(root)]) == images[:2]
+    assert collect_images([str(root)], recursive=True) == images
+    assert collect_images([str(root / "**" / "*.png")]) == [images[0], images[2]]
+
+    (root / "list.txt").write_text("# drawings\nb.jpg\n\nsub/c.png\n", encoding="utf-8")
+    (root / "list.json").write_text(json.dumps(["a.png", {"image_path": "b.jpg"}]))
+    (root / "list.jsonl").write_text(
+        json.dumps({"image_path": str(images[2])}) + "\n", encoding="utf-8"
+    )
+    assert collect_images([str(root / "list.txt")]) == [root / "b.jpg", root / "sub/c.png"]
+    assert collect_images([str(root / "list.json")]) == [root / "a.png", root / "b.jpg"]
+    assert collect_images([str(root / "list.jsonl")]) == [images[2]]
+    # Duplicates across inputs are dropped, keeping the first occurrence
+    assert collect_images([str(root / "list.jsonl"), str(root)]) == [images[2], *images[:2]]
+
+    with pytest.raises(FileNotFoundError):
+        collect_images([str(tmp_path / "missing" / "*.png")])
+
+
+def test_output_names_disambiguate_shared_stems(tmp_path):
+    a_png, a_jpg, sub_a = tmp_path / "a.png", tmp_path / "a.jpg", tmp_path / "sub" / "a.png"
+    b = tmp_path / "b.png"
+    assert _output_names([a_png, a_jpg, sub_a, b]) == {
+        a_png: "a_png",
+        a_jpg: "a_jpg",
+        sub_a: "sub__a_png",
+        b: "b",
+    }
+    with pytest.raises(ValueError, match="a_png"):
+        _output_names([a_png, sub_a, tmp_path / "a_png.jpg"])
+
+
+def test_load_checkpoint_skips_a_truncated_last_line(tmp_path):
+    entries = [
+        {"output": "a.json", "status": "failed"},
+        {"output": "b.json", "status": "ok"},
+        {"output": "a.json", "status": "ok"},
+    ]
+    lines = [json.dumps(e) for e in entries] + ['{"output": "c.json", "sta']
+    (tmp_path / pnid_batch.CHECKPOINT_FILE).write_text("\n".join(lines), encoding="utf-8")
+    assert load_checkpoint(tmp_path) == {"a.json": entries[2], "b.json": entries[1]}
+    assert load_checkpoint(tmp_path / "empty") == {}
+
+
+def test_resume_skips_finished_jobs_and_reruns_failed_ones(images, extractor, tmp_path):
+    calls, errors = extractor
+    output_dir = tmp_path / "out"
+    errors["b.jpg"] = [FileNotFoundError("gone")]
+
+    summary = batch(images, output_dir)
+    assert statuses(summary) == {"a.png": "ok", "b.jpg": "failed", "c.png": "ok"}
+    assert sorted(calls) == ["a.png", "b.jpg", "c.png"]
+
+    calls.clear()
+    summary = batch(images, output_dir)
+    assert calls == ["b.jpg"]
+    assert statuses(summary) == {"a.png": "skipped", "c.png": "skipped", "b.jpg": "ok"}
+
+    # A result file removed since the checkpoint was written is redone
+    (output_dir / "a.google.json").unlink()
+    calls.clear()
+    batch(images, output_dir)
+    assert calls == ["a.png"]
+
+    calls.clear()
+    batch(images, output_dir, resume=False)
+    assert sorted(calls) == ["a.png", "b.jpg", "c.png"]
+
+
+def test_retryable_errors_are_retried_up_to_max_attempts(images, extractor, tmp_path):
+    calls, errors = extractor
+    errors["a.png"] = [ProviderError(503), ProviderError(429)]
+    errors["b.jpg"] = [ProviderError(500)] * 5
+    errors["c.png"] = [ProviderError(400)]
+
+    summary = batch(images, tmp_path / "out", max_attempts=3)
+    jobs = {Path(job["image_path"]).name: job for job in summary["jobs"]}
+    assert (jobs["a.png"]["status"], jobs["a.png"]["attempts"]) == ("ok", 3)
+    assert (jobs["b.jpg"]["status"], jobs["b.jpg"]["attempts"]) == ("failed", 3)
+    assert jobs["b.jpg"]["error"] == "ProviderError: HTTP 500"
+    assert (jobs["c.png"]["status"], jobs["c.png"]["attempts"]) == ("failed", 1)
+    assert calls.count("a.png") == 3 and calls.count("b.jpg") == 3 and calls.count("c.png") == 1
+
+
+def test_missing_file_is_not_retried(images, extractor, tmp_path):
+    calls, _ = extractor
+    missing = images[0].parent / "missing.png"
+
+    summary = batch([*images, missing], tmp_path / "out", max_attempts=4)
+    job = summary["jobs"][-1]
+    assert (job["status"], job["attempts"]) == ("failed", 1)
+    assert job["error"].startswith("FileNotFoundError")
+    assert calls.count("missing.png") == 1
+    assert summary["ok"] == 3
+
+
+def test_cache_hits_never_call_the_extractor(images, extractor, monkeypatch, tmp_path):
+    calls, _ = extractor
+    cached = result_for(images[1], model="cached-model")
+
+    def fake_cache(image, provider, model_name, image_prep):
+        if Path(image).name == "missing.png":
+            raise FileNotFoundError(image)
+        return cached if Path(image) == images[1] else None
+
+    monkeypatch.setattr(pnid_batch, "load_cached_extraction", fake_cache)
+    missing = images[0].parent / "missing.png"
+    summary = batch([*images, missing], tmp_path / "out")
+
+    assert sorted(calls) == ["a.png", "c.png", "missing.png"]
+    job = summary["jobs"][1]
+    assert (job["status"], job["attempts"], job["cached"], job["model"]) == (
+        "ok",
+        0,
+        True,
+        "cached-model",
+    )
+    assert json.loads((tmp_path / "out" / "b.google.json").read_text("utf-8")) == cached
+    assert (summary["cached"], summary["failed"]) == (1, 1)
+
+    calls.clear()
+    batch(images, tmp_path / "out", use_cache=False, resume=False)
+    assert sorted(calls) == ["a.png", "b.jpg", "c.png"]
+
+
+def test_summary_file(images, extractor, tmp_path):
+    output_dir = tmp_path / "out"
+    extractor[1]["c.png"] = [FileNotFoundError("gone")]
+    summary = batch(images, output_dir, model_name="fake-model")
+
+    assert json.loads((output_dir / pnid_batch.SUMMARY_FILE).read_text("utf-8")) == summary
+    assert {k: summary[k] for k in ("total", "ok", "failed", "skipped", "cached")} == {
+        "total": 3,
+        "ok": 2,
+        "failed": 1,
+        "skipped": 0,
+        "cached": 0,
+    }
+    assert summary["providers"] == [PROVIDER.value]
+    assert summary["model"] == "fake-model"
+    assert [job["output"] for job in summary["jobs"]] == [
+        "a.google.json",
+        "b.google.json",
+        "c.google.json",
+    ]
+    ok = summary["jobs"][0]
+    assert (ok["components"], ok["pipes"], ok["model"]) == (1, 0, "fake-model")
+    assert json.loads((output_dir / "a.google.json").read_text("utf-8")) == result_for(images[0])
+    assert not (output_dir / "c.google.json").exists()
+    assert not list(output_dir.glob("*.tmp"))
+    checkpoint = load_checkpoint(output_dir)
+    assert sorted(checkpoint) == ["a.google.json", "b.google.json", "c.google.json"]
@@ -0,0 +1,178 @@
+"""PnidGraph loaders and adjacency checked against the per-tool logic they replaced."""
+
+import json
+import random
+from collections import deque
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from generate_pnid_variations import remove_random_components
+from pnid_graph import PnidGraph
+
+OUTPUT = Path(__file__).resolve().parent.parent / "data" / "output"
+
+
+def random_pnid(seed: int, components: int, pipes: int) -> dict:
+    """Random PNID with inlets/outlets, missing endpoints and duplicate pipes."""
+    rng = random.Random(seed)
+    ids = [f"C-{i}" for i in range(components)]
+    endpoints = ids + ["Inlet - A", "Outlet - B", None]
+    return {
+        "components": [
+            {"id": i, "label": i, "category": "Valve", "x": rng.random(), "y": rng.random()}
+            for i in ids
+        ],
+        "pipes": [
+            {"label": f"L{k}", "source": rng.choice(endpoints), "target": rng.choice(endpoints)}
+            for k in range(pipes)
+        ],
+    }
+
+
+def dict_bfs(seeds, pipes, hops):
+    """Dict-of-sets BFS from the former focus_viz.build_adjacency / bfs_neighborhood."""
+    adj = {}
+    for p in pipes:
+        s, t = p.get("source"), p.get("target")
+        if not s or not t:
+            continue
+        adj.setdefault(str(s), set()).add(str(t))
+        adj.setdefault(str(t), set()).add(str(s))
+    visited = set(seeds)
+    queue = deque((s, 0) for s in seeds)
+    while queue:
+        node, depth = queue.popleft()
+        if depth >= hops:
+            continue
+        for nb in adj.get(node, ()):
+            if nb not in visited:
+                visited.add(nb)
+                queue.append((nb, depth + 1))
+    return visited
+
+
+def test_jsonld_loader_splits_nodes_and_connections():
+    graph = [
+        {"@id": "pid:T1", "@type": "pid:Tank", "name": "T-1", "x": 10, "y": 20},
+        {"@id": "pid:V1", "@type": "pid:BallValve", "tag": "V-1"},
+        {"@id": "c1", "@type": "pid:Connection", "connectedTo": ["pid:T1", "pid:V1"]},
+        {"@id": "c2", "@type": "pnid:Pipe", "pnid:connectsFrom": {"@id": "pid:V1"}},
+        {"@id": "c3", "@type": "pid:Connection", "connectedTo": ["pid:V1", "pid:Outlet"]},
+    ]
+    pid_graph = PnidGraph.from_jsonld({"@graph": graph})
+
+    assert pid_graph.nodes == graph[:2]
+    assert pid_graph.edges == graph[2:]
+    assert pid_graph.labels == ["T-1", "V-1"]
+    np.testing.assert_array_equal(pid_graph.x, [10.0, np.nan])
+    assert pid_graph.ids == ["pid:T1", "pid:V1", "pid:Outlet"]
+    assert pid_graph.n_components == 2
+    np.testing.assert_array_equal(pid_graph.source, [0, 1, 1])
+    np.testing.assert_array_equal(pid_graph.target, [1, -1, 2])
+
+
+def test_jsonld_loader_matches_sample_node_edge_split():
+    path = OUTPUT / "pnid_dexpi_final.json"
+    if not path.exists():
+        pytest.skip("sample JSON-LD not available")
+    graph = json.loads(path.read_text(encoding="utf-8"))["@graph"]
+    pid_graph = PnidGraph.load(path)
+
+    assert pid_graph.nodes == [n for n in graph if n.get("@type") != "pid:Connection"]
+    assert pid_graph.edges == [e for e in graph if e.get("@type") == "pid:Connection"]
+    for k, edge in enumerate(pid_graph.edges):
+        expected = edge["connectedTo"]
+        assert [pid_graph.ids[pid_graph.source[k]], pid_graph.ids[pid_graph.target[k]]] == expected
+
+
+def test_pnid_loader_unwraps_output_and_interns_terminals():
+    pnid = {
+        "components": [{"label": "P-1", "category": "Pump"}, {"id": "V-1", "label": "valve"}],
+        "pipes": [
+            {"label": "L1", "source": "Inlet", "target": "P-1"},
+            {"label": "L2", "source": "P-1", "target": "V-1"},
+            {"label": "L3", "source": "V-1", "target": None},
+        ],
+    }
+    pid_graph = PnidGraph.from_data({"output": pnid})
+
+    assert pid_graph.ids == ["P-1", "V-1", "Inlet"]
+    assert pid_graph.types == ["Pump", None]
+    assert pid_graph.is_component("V-1") and not pid_graph.is_component("Inlet")
+    assert pid_graph.edge_ids == ["L1", "L2", "L3"]
+    np.testing.assert_array_equal(pid_graph.source, [2, 0, 1])
+    np.testing.assert_array_equal(pid_graph.target, [0, 1, -1])
+    np.testing.assert_array_equal(pid_graph.degree(), [2, 1, 1])
+
+
+@pytest.mark.parametrize("seed, components, pipes", [(0, 5, 4), (1, 40, 60), (2, 200, 500)])
+def test_csr_matches_edge_list(seed, components, pipes):
+    pid_graph = PnidGraph.from_pnid(random_pnid(seed, components, pipes))
+    incident = [[] for _ in range(pid_graph.num_nodes)]
+    adjacent = [[] for _ in range(pid_graph.num_nodes)]
+    for k, (s, t) in enumerate(
+        zip(pid_graph.source.tolist(), pid_graph.target.tolist(), strict=True)
+    ):
+        if s < 0 or t < 0:
+            continue
+        incident[s].append(k)
+        incident[t].append(k)
+        adjacent[s].append(t)
+        adjacent[t].append(s)
+
+    for row in range(pid_graph.num_nodes):
+        assert sorted(pid_graph.incident_edges(row).tolist()) == sorted(incident[row])
+        assert sorted(pid_graph.neighbors(row).tolist()) == sorted(adjacent[row])
+    np.testing.assert_array_equal(pid_graph.degree(), [len(e) for e in incident])
+
+
+@pytest.mark.parametrize("seed, components, pipes", [(3, 10, 8), (4, 80, 100), (5, 300, 400)])
+@pytest.mark.parametrize("hops", [0, 1, 2, 5])
+def test_neighborhood_matches_dict_bfs(seed, components, pipes, hops):
+    pnid = random_pnid(seed, components, pipes)
+    pid_graph = PnidGraph.from_pnid(pnid)
+    seeds = [f"C-{i}" for i in range(0, components, 7)] + ["Inlet - A"]
+    seeds = [s for s in seeds if s in pid_graph.index]
+
+    rows = [pid_graph.index[s] for s in seeds]
+    reached = {pid_graph.ids[i] for i in pid_graph.neighborhood(rows, hops)}
+    assert reached == dict_bfs(seeds, pnid["pipes"], hops)
+
+
+def test_neighborhood_matches_dict_bfs_on_sample():
+    path = OUTPUT / "pnid_merged_fixed.json"
+    if not path.exists():
+        pytest.skip("sample PNID not available")
+    pnid = json.loads(path.read_text(encoding="utf-8"))
+    pid_graph = PnidGraph.from_pnid(pnid)
+    seeds = pid_graph.ids[: pid_graph.n_components : 5]
+    for hops in (1, 2, 3):
+        reached = pid_graph.neighborhood([pid_graph.index[s] for s in seeds], hops)
+        assert {pid_graph.ids[i] for i in reached} == dict_bfs(seeds, pnid["pipes"], hops)
+
+
+def test_removed_components_drop_edges_with_a_missing_endpoint():
+    graph = [
+        {"@id": "a", "@type": "pid:Tank"},
+        {"@id": "b", "@type": "pid:Pump"},
+        {"@id": "c", "@type": "pid:Valve"},
+        {"@id": "ab", "@type": "pid:Connection", "connectedTo": ["a", "b"]},
+        {"@id": "a-", "@type": "pid:Connection", "connectedTo": ["a"]},
+        {"@id": "b-", "@type": "pid:Connection", "connectedTo": ["b"]},
+        {"@id": "c-", "@type": "pid:Connection", "connectedTo": ["c"]},
+    ]
+    random.seed(0)
+    result = remove_random_components({"@graph": graph}, count=2)["@graph"]
+
+    kept = {item["@id"] for item in result if item["@type"] != "pid:Connection"}
+    assert len(kept) == 1
+    # The former filter: drop every connection naming a removed node
+    removed = {"a", "b", "c"} - kept
+    expected = [
+        item
+        for item in graph
+        if item["@id"] not in removed and not any(n in removed for n in item.get("connectedTo", []))
+    ]
+    assert result == expected
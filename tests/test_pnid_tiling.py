@@ -0,0 +1,142 @@
+"""Tile grid coverage and the merge rules for per-tile extraction results."""
+
+import numpy as np
+import pytest
+
+from pnid_tiling import OFF_TILE, Tile, merge_tile_results, tile_grid
+
+
+def component(cid, label, x, y, category="Valve"):
+    return {"id": cid, "label": label, "category": category, "x": x, "y": y}
+
+
+def pipe(source, target, label, x, y):
+    return {"label": label, "source": source, "target": target, "x": x, "y": y}
+
+
+def by_label(items):
+    return {item["label"]: item for item in items}
+
+
+@pytest.mark.parametrize(
+    "width, height, tile_size, overlap",
+    [(1000, 600, 400, 100), (5000, 3500, 2048, 256), (300, 200, 512, 64), (2049, 2048, 2048, 0)],
+)
+def test_tile_grid_covers_the_sheet_with_overlap(width, height, tile_size, overlap):
+    tiles = tile_grid(width, height, tile_size, overlap)
+    covered = np.zeros((height, width), dtype=np.int32)
+    for tile in tiles:
+        assert 0 <= tile.x0 < tile.x1 <= width and 0 <= tile.y0 < tile.y1 <= height
+        assert tile.x1 - tile.x0 <= tile_size and tile.y1 - tile.y0 <= tile_size
+        covered[tile.y0 : tile.y1, tile.x0 : tile.x1] += 1
+    assert covered.min() >= 1
+
+    grid = {(tile.row, tile.col): tile for tile in tiles}
+    for (row, col), tile in grid.items():
+        if (row, col + 1) in grid:
+            assert tile.x1 - grid[row, col + 1].x0 >= overlap
+        if (row + 1, col) in grid:
+            assert tile.y1 - grid[row + 1, col].y0 >= overlap
+
+
+@pytest.mark.parametrize("overlap", [512, 600])
+def test_tile_grid_rejects_overlap_not_below_tile_size(overlap):
+    with pytest.raises(ValueError):
+        tile_grid(2000, 2000, 512, overlap)
+
+
+# Two tiles side by side on a 1000 x 500 sheet, overlapping in x = 400..600
+LEFT = Tile(0, 0, 0, 0, 600, 500)
+RIGHT = Tile(0, 1, 400, 0, 1000, 500)
+
+
+def test_two_tiles_merge_components_and_join_pipes():
+    left = {
+        "components": [
+            component("t1", "T-1", 100, 100, "Tank"),
+            component("p1", "P-1", 580, 100, "Pump"),  # 20 px from the seam
+            component("v", "V-10", 200, 400),
+        ],
+        "pipes": [
+            pipe("t1", "p1", "L-1", 300, 100),
+            pipe("t1", OFF_TILE, "L-2", 250, 200),
+            pipe(OFF_TILE, OFF_TILE, "L-9", 300, 300),
+        ],
+    }
+    right = {
+        "components": [
+            component("pump", "P-1", 582, 101, "Pump"),  # 182 px from the seam
+            component("e1", "E-1", 900, 200, "Exchanger"),
+            component("v", "V-20", 800, 400),
+        ],
+        "pipes": [
+            pipe("T-1", "pump", "L-1", 500, 100),  # T-1 only listed by the left tile
+            pipe(OFF_TILE, "e1", "L-2", 700, 200),
+            pipe("e1", OFF_TILE, "L-3", 950, 300),
+        ],
+    }
+    merged = merge_tile_results([(LEFT, left), (RIGHT, right)], 1000, 500, merge_radius=50)
+
+    components = by_label(merged["components"])
+    assert sorted(components) == ["E-1", "P-1", "T-1", "V-10", "V-20"]
+    # The copy furthest from a tile border wins, keeping its id and position
+    assert (components["P-1"]["id"], components["P-1"]["x"]) == ("pump", 582)
+    # Distinct components sharing a tile-local id get suffixed ids
+    assert {components["V-10"]["id"], components["V-20"]["id"]} == {"v", "v_2"}
+
+    pipes = merged["pipes"]
+    assert sorted((p["label"], p["source"], p["target"]) for p in pipes) == [
+        ("L-1", "t1", "pump"),  # seen by both tiles, kept once
+        ("L-2", "t1", "e1"),  # stubs joined across the seam
+        ("L-3", "e1", "External - L-3"),  # unmatched stub
+    ]
+    # A joined pipe keeps the label position of the stub further from a tile border
+    assert by_label(pipes)["L-2"]["x"] == 250
+
+
+def test_stubs_from_the_same_tile_are_not_joined():
+    result = {
+        "components": [component("a", "A", 100, 100), component("b", "B", 100, 300)],
+        "pipes": [pipe("a", OFF_TILE, "L-1", 500, 100), pipe(OFF_TILE, "b", "L-1", 500, 300)],
+    }
+    merged = merge_tile_results([(LEFT, result)], 1000, 500, merge_radius=50)
+    assert sorted((p["source"], p["target"]) for p in merged["pipes"]) == [
+        ("External - L-1", "b"),
+        ("a", "External - L-1"),
+    ]
+
+
+def test_two_by_two_merge():
+    # 1000 x 1000 sheet, 600 px tiles overlapping in 400..600 along both axes
+    tiles = [
+        Tile(0, 0, 0, 0, 600, 600),
+        Tile(0, 1, 400, 0, 1000, 600),
+        Tile(1, 0, 0, 400, 600, 1000),
+        Tile(1, 1, 400, 400, 1000, 1000),
+    ]
+    # The centre valve is seen by all four tiles; the bottom-right copy is furthest inside
+    centre = [(510, 505), (505, 500), (500, 510), (520, 520)]
+    results = [
+        {"components": [component(f"fv{k}", "FV-1", x, y)], "pipes": []}
+        for k, (x, y) in enumerate(centre)
+    ]
+    results[0]["components"].append(component("a", "A", 100, 100))
+    results[0]["pipes"].append(pipe("a", OFF_TILE, "L-5", 300, 100))
+    results[1]["components"].append(component("b", "B", 900, 100))
+    results[1]["pipes"].append(pipe(OFF_TILE, "b", "L-5", 700, 100))
+    results[2]["components"].append(component("c", "C", 100, 900))
+    results[2]["pipes"].append(pipe(OFF_TILE, "c", "L-6", 100, 700))
+    results[0]["pipes"].append(pipe("a", OFF_TILE, "L-6", 100, 300))
+    results[3]["pipes"].append(pipe("fv3", OFF_TILE, "L-7", 800, 800))
+
+    merged = merge_tile_results(list(zip(tiles, results, strict=True)), 1000, 1000, 50)
+
+    components = by_label(merged["components"])
+    assert sorted(components) == ["A", "B", "C", "FV-1"]
+    fv = components["FV-1"]
+    assert (fv["id"], fv["x"], fv["y"]) == ("fv3", 520, 520)
+    assert sorted((p["label"], p["source"], p["target"]) for p in merged["pipes"]) == [
+        ("L-5", "a", "b"),  # joined across the vertical seam
+        ("L-6", "a", "c"),  # joined across the horizontal seam
+        ("L-7", "fv3", "External - L-7"),
+    ]
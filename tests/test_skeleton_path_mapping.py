@@ -0,0 +1,123 @@
+"""Tests for skeleton graph construction and the compact path encoding in skeleton_path_mapping."""
+
+import cv2
+import numpy as np
+import pytest
+from skeleton_path_mapping import (
+    build_skeleton_graph,
+    decode_polyline,
+    encode_polyline,
+    find_all_component_paths,
+    skeletonize_edge_map,
+)
+
+
+def random_skeleton(seed: int, size: int = 120) -> np.ndarray:
+    """Skeleton of random thick lines and circles: junctions, loops, spurs and isolated runs."""
+    rng = np.random.default_rng(seed)
+    img = np.zeros((size, size), dtype=np.uint8)
+    for _ in range(rng.integers(3, 12)):
+        p, q = rng.integers(0, size, size=(2, 2)).tolist()
+        cv2.line(img, p, q, 255, int(rng.integers(1, 4)))
+    for _ in range(rng.integers(0, 3)):
+        center = rng.integers(10, size - 10, size=2).tolist()
+        cv2.circle(img, center, int(rng.integers(3, 15)), 255, 1)
+    return skeletonize_edge_map(img > 0)
+
+
+def random_pixels(seed: int, size: int = 40) -> np.ndarray:
+    """Sparse random pixels: arbitrary (non-thinned) input with blobs and 2x2 squares."""
+    rng = np.random.default_rng(seed)
+    return (rng.random((size, size)) < 0.3).astype(np.uint8)
+
+
+def graph_summary(G) -> tuple:
+    nodes = [(n, G.nodes[n]["pos"]) for n in G.nodes]
+    edges = [(u, v, d["length"], [tuple(p) for p in d["pixels"]]) for u, v, d in G.edges(data=True)]
+    return nodes, edges
+
+
+@pytest.mark.parametrize(
+    "skel",
+    [random_skeleton(seed) for seed in range(40)] + [random_pixels(seed) for seed in range(20)],
+)
+def test_vectorized_graph_matches_walk(skel):
+    walk, walk_points = build_skeleton_graph(skel, method="walk", compact=False)
+    vectorized, vectorized_points = build_skeleton_graph(skel, method="vectorized", compact=False)
+    assert vectorized_points == walk_points
+    assert graph_summary(vectorized) == graph_summary(walk)
+
+    compact, _ = build_skeleton_graph(skel, method="vectorized")
+    assert graph_summary(compact) == graph_summary(walk)
+    np.testing.assert_array_equal(
+        compact.graph["pixel_buffer"],
+        build_skeleton_graph(skel, method="walk")[0].graph["pixel_buffer"],
+    )
+
+
+def encode_reference(points: list[tuple[int, int]]) -> str:
+    """Textbook scalar encoded-polyline algorithm."""
+    chunks = []
+    prev_x = prev_y = 0
+    for x, y in points:
+        for delta in (x - prev_x, y - prev_y):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+            while value >= 0x20:
+                chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            chunks.append(chr(value + 63))
+        prev_x, prev_y = x, y
+    return "".join(chunks)
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("max_path_length", [60.0, 5000.0])
+def test_single_source_paths_match_pairwise(seed, max_path_length):
+    G, _ = build_skeleton_graph(random_skeleton(seed))
+    rng = np.random.default_rng(seed)
+    nodes = rng.choice(list(G.nodes), size=min(12, G.number_of_nodes()), replace=False)
+    # A repeated node and an unknown one, as snapping can produce
+    comp_map = {f"C-{i}": int(node) for i, node in enumerate(nodes)}
+    comp_map["dup"] = int(nodes[0])
+    comp_map["missing"] = -1
+
+    single = find_all_component_paths(G, comp_map, max_path_length, method="single_source")
+    pairwise = find_all_component_paths(G, comp_map, max_path_length, method="pairwise")
+
+    # Equally short routes may be tie-broken differently, so only lengths must agree
+    assert [(p["source"], p["target"]) for p in single] == [
+        (p["source"], p["target"]) for p in pairwise
+    ]
+    for a, b in zip(single, pairwise, strict=True):
+        assert a["path_length"] == pytest.approx(b["path_length"])
+
+
+def test_encode_polyline_known_value():
+    # The published example of the format, with coordinates pre-scaled to integers
+    points = [(3850000, -12020000), (4070000, -12095000), (4325200, -12645300)]
+    assert encode_polyline(np.array(points)) == "_p~iF~ps|U_ulLnnqC_mqNvxq`@"
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_polyline_round_trip(seed):
+    rng = np.random.default_rng(seed)
+    # Mostly one-pixel skeleton steps, with a few long jumps and negative coordinates
+    steps = rng.integers(-1, 2, size=(500, 2))
+    steps[rng.random(500) < 0.05] = rng.integers(-100_000, 100_000, size=2)
+    points = np.cumsum(steps, axis=0)
+
+    text = encode_polyline(points)
+    assert text == encode_reference(points.tolist())
+    assert text.isascii() and text.isprintable()
+
+    decoded = decode_polyline(text)
+    assert decoded.dtype == np.int32
+    np.testing.assert_array_equal(decoded, points)
+
+
+def test_polyline_edge_cases():
+    assert encode_polyline(np.empty((0, 2), dtype=np.int64)) == ""
+    assert decode_polyline("").shape == (0, 2)
+    np.testing.assert_array_equal(decode_polyline(encode_polyline([[0, 0]])), [[0, 0]])
+    # One-pixel steps cost two characters
+    assert len(encode_polyline([[0, 0], [1, 0], [1, 1], [0, 1]])) == 8
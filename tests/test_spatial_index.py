@@ -0,0 +1,131 @@
+"""Spatial index queries checked against brute-force linear scans."""
+
+import math
+
+import numpy as np
+import pytest
+import spatial_index
+from spatial_index import PointIndex, SegmentIndex, point_segment_distance
+
+BACKENDS = [
+    "grid",
+    pytest.param(
+        "kdtree",
+        marks=pytest.mark.skipif(spatial_index.cKDTree is None, reason="requires scipy"),
+    ),
+]
+
+
+def seeded_points(seed: int, count: int) -> np.ndarray:
+    """Integer coordinates on a small canvas, so exact distance ties are common."""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 200, size=(count, 2)).astype(np.float64)
+
+
+def brute_nearest(points, queries, max_distance=math.inf):
+    dist = np.full(len(queries), math.inf)
+    idx = np.full(len(queries), -1, dtype=np.int64)
+    for i, q in enumerate(queries):
+        for j, p in enumerate(points):
+            d = math.hypot(p[0] - q[0], p[1] - q[1])
+            if d < dist[i]:
+                dist[i], idx[i] = d, j
+        if dist[i] > max_distance:
+            dist[i], idx[i] = math.inf, -1
+    return dist, idx
+
+
+def brute_within(points, queries, radius):
+    results = []
+    for q in queries:
+        hits = [(math.hypot(p[0] - q[0], p[1] - q[1]), j) for j, p in enumerate(points)]
+        results.append([j for d, j in sorted(hits) if d <= radius])
+    return results
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("seed, count", [(0, 1), (1, 50), (2, 400)])
+def test_nearest_matches_linear_scan(backend, seed, count):
+    points = seeded_points(seed, count)
+    queries = np.vstack([seeded_points(seed + 100, 150), points[:20], [[-500.0, 900.0]]])
+    index = PointIndex(points, backend=backend)
+
+    for max_distance in (math.inf, 15.0):
+        dist, idx = index.nearest(queries, max_distance=max_distance)
+        expected_dist, expected_idx = brute_nearest(points, queries, max_distance)
+        np.testing.assert_array_equal(idx, expected_idx)
+        np.testing.assert_array_equal(dist, expected_dist)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("radius", [0.0, 7.0, 40.0])
+def test_within_matches_linear_scan(backend, radius):
+    points = seeded_points(3, 300)
+    queries = np.vstack([seeded_points(4, 100), points[:10]])
+    hits = PointIndex(points, backend=backend).within(queries, radius)
+    assert [h.tolist() for h in hits] == brute_within(points, queries, radius)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_empty_index(backend):
+    index = PointIndex(np.empty((0, 2)), backend=backend)
+    dist, idx = index.nearest([[1.0, 2.0]])
+    assert idx.tolist() == [-1] and dist.tolist() == [math.inf]
+    assert [h.tolist() for h in index.within([[1.0, 2.0]], 5.0)] == [[]]
+
+
+def seeded_segments(seed: int, count: int) -> tuple[np.ndarray, np.ndarray]:
+    """Short pipe pieces plus a few long diagonals and degenerate (point) segments."""
+    rng = np.random.default_rng(seed)
+    start = rng.integers(0, 1000, size=(count, 2)).astype(np.float64)
+    end = start + rng.integers(-30, 31, size=(count, 2))
+    end[::7] = start[::7]
+    long_start = rng.integers(0, 100, size=(3, 2)).astype(np.float64)
+    long_end = rng.integers(900, 1000, size=(3, 2)).astype(np.float64)
+    return np.vstack([start, long_start]), np.vstack([end, long_end])
+
+
+def brute_pairs(points, start, end, radius):
+    pairs = []
+    for i, q in enumerate(points):
+        for j in range(len(start)):
+            d = point_segment_distance(q[None], start[j][None], end[j][None])[0]
+            if d <= radius:
+                pairs.append((i, j, d))
+    return pairs
+
+
+@pytest.mark.parametrize("radius", [0.0, 10.0, 50.0])
+@pytest.mark.parametrize("cell_size, radius_hint", [(0.0, 0.0), (0.0, 50.0), (2.0, 0.0)])
+def test_segment_pairs_match_linear_scan(radius, cell_size, radius_hint):
+    start, end = seeded_segments(5, 300)
+    points = np.vstack([seeded_points(6, 100) * 5, start[:10], end[-3:]])
+    index = SegmentIndex(start, end, cell_size=cell_size, radius=radius_hint)
+
+    point_idx, segment_idx, dist = index.pairs_within(points, radius)
+    expected = brute_pairs(points, start, end, radius)
+    assert list(zip(point_idx.tolist(), segment_idx.tolist())) == [(i, j) for i, j, _ in expected]
+    np.testing.assert_array_equal(dist, [d for _, _, d in expected])
+
+
+def test_segment_index_bounds_grid_entries():
+    # One long diagonal among short segments used to be registered in every cell of its
+    # bounding box
+    rng = np.random.default_rng(7)
+    start = rng.uniform(0, 20_000, size=(1000, 2))
+    start[0] = (0.0, 0.0)
+    end = start + rng.uniform(-2, 2, size=(1000, 2))
+    end[0] = (20_000.0, 20_000.0)
+
+    index = SegmentIndex(start, end, radius=50.0)
+    assert index.cell_size >= 50.0
+    assert len(index._keys) <= len(start) * 4
+
+    point_idx, segment_idx, _ = index.pairs_within([[10_000.0, 10_010.0]], 50.0)
+    assert 0 in segment_idx.tolist()
+
+
+def test_empty_segment_index():
+    index = SegmentIndex(np.empty((0, 2)), np.empty((0, 2)))
+    point_idx, segment_idx, dist = index.pairs_within([[1.0, 2.0]], 5.0)
+    assert len(point_idx) == len(segment_idx) == len(dist) == 0
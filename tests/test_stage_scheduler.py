@@ -0,0 +1,119 @@
+"""StageScheduler: graph checks, dependency wiring, overlap, failures and timings."""
+
+import threading
+import time
+
+import pytest
+from stage_scheduler import StageScheduler
+
+
+def sleeper(seconds: float, value=None):
+    def run(**kwargs):
+        time.sleep(seconds)
+        return value
+
+    return run
+
+
+def test_rejects_unknown_dependency_and_cycles():
+    scheduler = StageScheduler()
+    scheduler.add("a", lambda: 1)
+    scheduler.add("b", lambda a: a, depends_on=["a", "missing"])
+    with pytest.raises(ValueError, match="unknown stage 'missing'"):
+        scheduler.run()
+
+    scheduler = StageScheduler()
+    scheduler.add("a", lambda c: c, depends_on=["c"])
+    scheduler.add("b", lambda a: a, depends_on=["a"])
+    scheduler.add("c", lambda b: b, depends_on=["b"])
+    with pytest.raises(ValueError, match="cycle"):
+        scheduler.run()
+
+    with pytest.raises(ValueError, match="Duplicate"):
+        scheduler.add("a", lambda: 1)
+
+
+def test_dependency_results_are_passed_as_kwargs():
+    scheduler = StageScheduler()
+    scheduler.add("sum", lambda ocr, edges: ocr + edges, depends_on=["ocr", "edges"])
+    scheduler.add("ocr", lambda: 2)
+    scheduler.add("edges", lambda: 3)
+    scheduler.add("report", lambda sum, ocr: f"{ocr}->{sum}", depends_on=["sum", "ocr"])
+    assert scheduler.run() == {"ocr": 2, "edges": 3, "sum": 5, "report": "2->5"}
+
+
+def test_independent_stages_overlap():
+    scheduler = StageScheduler()
+    scheduler.add("ocr", sleeper(0.3, "text"))
+    scheduler.add("edges", sleeper(0.3, "lines"))
+    scheduler.add("llm", lambda ocr, edges: (ocr, edges), depends_on=["ocr", "edges"])
+
+    start = time.perf_counter()
+    assert scheduler.run()["llm"] == ("text", "lines")
+    elapsed = time.perf_counter() - start
+    assert elapsed < 0.5
+    assert scheduler.timings["ocr"] + scheduler.timings["edges"] >= 0.6
+
+
+def test_failing_stage_raises_and_cancels_pending_stages():
+    started: list[str] = []
+
+    def record(name, seconds=0.05):
+        def run(**kwargs):
+            started.append(name)
+            time.sleep(seconds)
+
+        return run
+
+    def fail():
+        started.append("boom")
+        raise RuntimeError("stage failed")
+
+    scheduler = StageScheduler(max_workers=1)
+    scheduler.add("boom", fail)
+    scheduler.add("queued_1", record("queued_1"))
+    scheduler.add("queued_2", record("queued_2"))
+    scheduler.add("dependent", record("dependent"), depends_on=["boom"])
+
+    with pytest.raises(RuntimeError, match="stage failed"):
+        scheduler.run()
+    assert started == ["boom"]
+
+
+def test_single_worker_runs_stages_one_at_a_time():
+    lock = threading.Lock()
+    active = 0
+    peak = 0
+
+    def stage(**kwargs):
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with lock:
+            active -= 1
+
+    scheduler = StageScheduler(max_workers=1)
+    for name in "abcd":
+        scheduler.add(name, stage)
+    scheduler.run()
+    assert peak == 1
+    assert scheduler.total_time >= 0.2
+
+
+def test_timings_cover_every_stage():
+    scheduler = StageScheduler()
+    scheduler.add("ocr", sleeper(0.02))
+    scheduler.add("edge_detection", sleeper(0.02))
+    scheduler.add("llm", sleeper(0.01), depends_on=["ocr", "edge_detection"])
+    scheduler.run()
+
+    assert set(scheduler.timings) == {"ocr", "edge_detection", "llm"}
+    assert all(seconds > 0 for seconds in scheduler.timings.values())
+    assert scheduler.total_time >= max(scheduler.timings.values())
+
+    # Stages are listed in completion order, then the sum and the wall time
+    names = [line.split()[0] for line in scheduler.format_timings().splitlines()]
+    assert names == [*scheduler.timings, "sum", "wall"]
+    assert names[2] == "llm"